@@ -0,0 +1,199 @@
+"""Cache of model tool-selection decisions for repeated agent prompts"""
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("AGENT_CACHE_BACKEND", "memory")  # memory, redis, off
+CACHE_TTL = int(os.getenv("AGENT_CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("AGENT_CACHE_MAX_ENTRIES", "1024"))
+
+# Only read-only tools are replayed from cache; booking or creating twice
+# because two users typed the same words would be a real side effect.
+CACHEABLE_TOOLS = {"get_events", "get_tasks"}
+
+_PUNCTUATION = re.compile(r"[^\w\s@:/-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    message = _PUNCTUATION.sub(" ", message.lower())
+    return _WHITESPACE.sub(" ", message).strip()
+
+
+class InMemoryCacheBackend:
+    """LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Redis-backed cache; a sorted set of insert times bounds the entry count"""
+
+    def __init__(self, client, max_entries: int = CACHE_MAX_ENTRIES, prefix: str = "aether:agent_cache:"):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index_key = prefix + "index"
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: str, ttl: int):
+        pipe = self.client.pipeline()
+        pipe.setex(self.prefix + key, ttl, value)
+        pipe.zadd(self.index_key, {key: time.time()})
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+
+        overflow = size - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in self.client.zpopmin(self.index_key, overflow)]
+            if evicted:
+                self.client.delete(*[self.prefix + member for member in evicted])
+                self.evictions += len(evicted)
+
+    def clear(self):
+        members = self.client.zrange(self.index_key, 0, -1)
+        if members:
+            self.client.delete(*[self.prefix + member for member in members])
+        self.client.delete(self.index_key)
+
+    def __len__(self) -> int:
+        return self.client.zcard(self.index_key)
+
+
+class DecisionCache:
+    """Maps a normalized user message to the tool calls the model chose for it"""
+
+    def __init__(self, backend, ttl: int = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _key(self, message: str, tool_state: str) -> str:
+        raw = f"{tool_state}\n{normalize_message(message)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, message: str, tool_state: str) -> Optional[List[List[Any]]]:
+        """Cached [[tool_name, args], ...] for this message, if any"""
+        try:
+            value = self.backend.get(self._key(message, tool_state))
+        except Exception as e:
+            logger.error(f"Agent cache read failed: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def put(self, message: str, tool_state: str, tool_calls: List[tuple]) -> bool:
+        """Store a tool-selection decision if every tool in it is cacheable"""
+        if not tool_calls or any(name not in CACHEABLE_TOOLS for name, _ in tool_calls):
+            return False
+        try:
+            self.backend.set(
+                self._key(message, tool_state),
+                json.dumps([[name, args] for name, args in tool_calls]),
+                self.ttl
+            )
+        except Exception as e:
+            logger.error(f"Agent cache write failed: {e}")
+            return False
+        self.stores += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        try:
+            size = len(self.backend)
+        except Exception:
+            size = None
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.backend.evictions,
+            'size': size
+        }
+
+
+class _DisabledCacheBackend:
+    evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str, ttl: int):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+def _create_backend():
+    if CACHE_BACKEND == "off":
+        return _DisabledCacheBackend()
+    if CACHE_BACKEND == "redis":
+        try:
+            from database import get_redis
+            client = get_redis()
+            if client is not None:
+                return RedisCacheBackend(client)
+            logger.warning("Redis unavailable, using in-memory agent cache")
+        except Exception as e:
+            logger.error(f"Failed to set up Redis agent cache: {e}")
+    return InMemoryCacheBackend()
+
+
+# Global decision cache
+decision_cache = DecisionCache(_create_backend())
@@ -1,5 +1,10 @@
 import os
+import json
+import time
+import asyncio
 import logging
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional
 
 from datetime import datetime
@@ -7,10 +12,19 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except Exception:
-    OPENAI_AVAILABLE = False
+    from .llm_clients import llm_clients, OPENAI_AVAILABLE
+except ImportError:
+    from llm_clients import llm_clients, OPENAI_AVAILABLE
+
+try:
+    from .agent_cache import decision_cache
+except ImportError:
+    from agent_cache import decision_cache
+
+try:
+    from .tool_executor import tool_executor
+except ImportError:
+    from tool_executor import tool_executor
 
 
 def _get_tools_spec() -> List[Dict[str, Any]]:
@@ -91,6 +105,77 @@ def _call_tool(tool_name: str, args: Dict[str, Any]) -> str:
     return f"Unknown tool: {tool_name}"
 
 
+# Tool calls from a single model turn run concurrently on the shared tool executor
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT", "20"))
+TOOL_TIMEOUTS: Dict[str, float] = {
+    "book_appointment": 15.0,
+    "get_events": 10.0,
+    "create_task": 5.0,
+    "get_tasks": 5.0,
+}
+
+# Executor limit group each tool's calls count against
+TOOL_GROUPS: Dict[str, str] = {
+    "book_appointment": "calendar",
+    "get_events": "calendar",
+    "create_task": "tasks",
+    "get_tasks": "tasks",
+}
+
+
+def _tool_group(tool_name: str) -> str:
+    return TOOL_GROUPS.get(tool_name, tool_name)
+
+
+def _tool_timeout(tool_name: str) -> float:
+    return TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+
+
+def _tool_timeout_message(tool_name: str) -> str:
+    return f"Tool {tool_name} timed out after {_tool_timeout(tool_name):g}s. Let the user know it may be retried."
+
+
+def _run_tool_calls(parsed: List[tuple]) -> List[str]:
+    """Dispatch every (tool_name, args) call concurrently, returning results in call order."""
+    started = time.monotonic()
+    futures = [
+        tool_executor.submit(_tool_group(tool_name), _call_tool, tool_name, args)
+        for tool_name, args in parsed
+    ]
+
+    results = []
+    for (tool_name, _), future in zip(parsed, futures):
+        # Timeouts are measured from dispatch so waiting on one tool doesn't extend another
+        remaining = started + _tool_timeout(tool_name) - time.monotonic()
+        try:
+            results.append(future.result(timeout=max(remaining, 0)))
+        except FuturesTimeoutError:
+            future.cancel()
+            logger.warning(f"Tool {tool_name} timed out")
+            results.append(_tool_timeout_message(tool_name))
+        except Exception as e:
+            logger.error(f"Tool {tool_name} failed: {e}")
+            results.append(f"Tool {tool_name} failed: {e}")
+    return results
+
+
+async def _run_tool_calls_async(parsed: List[tuple]) -> List[str]:
+    """Async variant of _run_tool_calls, keeping blocking tools off the event loop."""
+    async def run_one(tool_name: str, args: Dict[str, Any]) -> str:
+        try:
+            return await tool_executor.run(
+                _tool_group(tool_name), _call_tool, tool_name, args, timeout=_tool_timeout(tool_name)
+            )
+        except TimeoutError:
+            logger.warning(f"Tool {tool_name} timed out")
+            return _tool_timeout_message(tool_name)
+        except Exception as e:
+            logger.error(f"Tool {tool_name} failed: {e}")
+            return f"Tool {tool_name} failed: {e}"
+
+    return list(await asyncio.gather(*(run_one(tool_name, args) for tool_name, args in parsed)))
+
+
 SYSTEM_PROMPT = (
     "You are Aether, a smart productivity assistant. "
     "Understand the user's intent and either respond helpfully or call a tool. "
@@ -99,56 +184,114 @@ SYSTEM_PROMPT = (
 )
 
 
-def run_agent(message: str, chat_id: Optional[str] = None) -> str:
-    """LLM-backed intent router with tool-calling. Returns a final text response."""
-    if not OPENAI_AVAILABLE or not os.getenv("OPENAI_API_KEY"):
-        # Fallback: use legacy rule-based agent
-        try:
-            from .agents import automate_task
-            return automate_task(message)
-        except Exception:
-            return f"I received your request: {message}. Configure OPENAI_API_KEY to enable advanced reasoning."
+def llm_enabled() -> bool:
+    return OPENAI_AVAILABLE and bool(os.getenv("OPENAI_API_KEY"))
+
 
-    client = OpenAI()
+def _fallback_response(message: str) -> str:
+    # Fallback: use legacy rule-based agent
+    try:
+        from .agents import automate_task
+        return automate_task(message)
+    except Exception:
+        return f"I received your request: {message}. Configure OPENAI_API_KEY to enable advanced reasoning."
 
-    tools_spec = _get_tools_spec()
 
-    messages: List[Dict[str, str]] = [
+def _initial_messages(message: str) -> List[Dict[str, Any]]:
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": message},
     ]
 
-    for _ in range(3):
-        response = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            messages=messages,
-            tools=tools_spec,
-            tool_choice="auto",
-            temperature=0.2,
-        )
 
-        choice = response.choices[0]
-        msg = choice.message
+def _completion_kwargs(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "messages": messages,
+        "tools": _get_tools_spec(),
+        "tool_choice": "auto",
+        "temperature": 0.2,
+    }
+
+
+def _tool_state() -> str:
+    # Cached decisions are only valid for the model, prompt and tools that produced them,
+    # and only on the day they were made: args may hold dates resolved from "today"/"tomorrow"
+    return json.dumps(
+        [os.getenv("OPENAI_MODEL", "gpt-4o-mini"), SYSTEM_PROMPT, _get_tools_spec(), datetime.now().date().isoformat()],
+        sort_keys=True
+    )
+
+
+def _replayed_message(tool_calls: List[tuple]):
+    """A cached decision in the shape of the model's tool-calling message"""
+    return SimpleNamespace(content=None, tool_calls=[
+        SimpleNamespace(id=f"cached_{i}", function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+        for i, (name, args) in enumerate(tool_calls)
+    ])
+
+
+def _parse_tool_call(tool_call) -> tuple:
+    try:
+        args = json.loads(tool_call.function.arguments or "{}")
+    except Exception:
+        args = {}
+    return tool_call.function.name, args
+
+
+def _append_tool_results(messages: List[Dict[str, Any]], msg, tool_results: List[str]) -> None:
+    # Feed every tool result back to the model, matched to its call id
+    messages.append({
+        "role": "assistant",
+        "content": msg.content or "",
+        "tool_calls": [
+            {
+                "id": tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments or "{}",
+                },
+            }
+            for tool_call in msg.tool_calls
+        ],
+    })
+    for tool_call, tool_result in zip(msg.tool_calls, tool_results):
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "name": tool_call.function.name,
+            "content": tool_result,
+        })
+
+
+def run_agent(message: str, chat_id: Optional[str] = None) -> str:
+    """LLM-backed intent router with tool-calling. Returns a final text response."""
+    if not llm_enabled():
+        return _fallback_response(message)
+
+    # Repeated prompts reuse the model's earlier tool choice and skip the
+    # tool-selection call; the model still phrases the reply from the results
+    tool_state = _tool_state()
+    cached = decision_cache.get(message, tool_state)
+
+    client = llm_clients.get_client()
+    messages = _initial_messages(message)
+
+    for turn in range(3):
+        if turn == 0 and cached is not None:
+            msg = _replayed_message(cached)
+        else:
+            response = client.chat.completions.create(**_completion_kwargs(messages))
+            msg = response.choices[0].message
 
         if msg.tool_calls:
-            # Take the first tool call (sequentially handle multiple if present)
-            tool_call = msg.tool_calls[0]
-            tool_name = tool_call.function.name
-            import json
-            try:
-                args = json.loads(tool_call.function.arguments or "{}")
-            except Exception:
-                args = {}
-            tool_result = _call_tool(tool_name, args)
-
-            # Feed tool result back to the model
-            messages.append({"role": "user", "content": message}) if len(messages) == 1 else None
-            messages.append({"role": "assistant", "content": msg.content or "", "tool_calls": []})
-            messages.append({
-                "role": "tool",
-                "content": tool_result,
-                "name": tool_name,
-            })
+            parsed = [_parse_tool_call(tool_call) for tool_call in msg.tool_calls]
+            if turn == 0 and cached is None:
+                decision_cache.put(message, tool_state, parsed)
+            # Run every tool call from this turn concurrently
+            tool_results = _run_tool_calls(parsed)
+            _append_tool_results(messages, msg, tool_results)
             # Continue loop to let model produce final response
             continue
 
@@ -158,3 +301,48 @@ def run_agent(message: str, chat_id: Optional[str] = None) -> str:
     return "I couldn't complete that. Could you rephrase or provide more details?"
 
 
+async def run_agent_async(message: str, chat_id: Optional[str] = None) -> str:
+    """Awaitable variant of run_agent for use from the WebSocket handler."""
+    if not llm_enabled():
+        return await asyncio.to_thread(_fallback_response, message)
+
+    tool_state = _tool_state()
+    cached = decision_cache.get(message, tool_state)
+
+    client = llm_clients.get_async_client()
+    messages = _initial_messages(message)
+
+    for turn in range(3):
+        if turn == 0 and cached is not None:
+            msg = _replayed_message(cached)
+        else:
+            response = await client.chat.completions.create(**_completion_kwargs(messages))
+            msg = response.choices[0].message
+
+        if msg.tool_calls:
+            parsed = [_parse_tool_call(tool_call) for tool_call in msg.tool_calls]
+            if turn == 0 and cached is None:
+                decision_cache.put(message, tool_state, parsed)
+            tool_results = await _run_tool_calls_async(parsed)
+            _append_tool_results(messages, msg, tool_results)
+            continue
+
+        return msg.content or "(No response)"
+
+    return "I couldn't complete that. Could you rephrase or provide more details?"
+
+
+async def select_tools_async(message: str) -> List[tuple]:
+    """Ask the model which tools it would call for a message, without running them."""
+    tool_state = _tool_state()
+    cached = decision_cache.get(message, tool_state)
+    if cached is not None:
+        return [tuple(call) for call in cached]
+
+    client = llm_clients.get_async_client()
+    response = await client.chat.completions.create(**_completion_kwargs(_initial_messages(message)))
+    msg = response.choices[0].message
+
+    parsed = [_parse_tool_call(tool_call) for tool_call in msg.tool_calls or []]
+    decision_cache.put(message, tool_state, parsed)
+    return parsed
@@ -2,38 +2,33 @@ import logging
 from datetime import datetime, timedelta
 import re
 
+from intents import intent_engine, CHAT_INTENTS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CHAT_RESPONSES = {
+    'greeting': "Hello! I'm your AI assistant. I can help you with booking meetings, creating tasks, managing your calendar, and answering questions. How can I assist you today?",
+    'about': "I'm an AI assistant that specializes in productivity and automation. I can help you:\n• Book meetings and appointments\n• Create and manage tasks\n• View calendar events\n• Answer questions and have conversations\n\nWhat would you like to do?",
+    'how_meeting': "To book a meeting, just tell me: 'Book a [meeting name] on [date] at [time] with [email]'\n\nExample: 'Book a team standup tomorrow at 2 PM with john@example.com'",
+    'how_task': "To create a task, just say: 'Create a [priority] task to [description]'\n\nExample: 'Create a high priority task to review the project proposal'",
+    'how': "I can help you with various tasks! Try asking me to book meetings, create tasks, or view your calendar. You can also ask me questions and I'll do my best to help.",
+    'what': "I can help you with productivity tasks like scheduling, task management, and general questions. What specific thing would you like to know about?",
+    'thanks': "You're welcome! I'm here to help whenever you need assistance with your tasks and schedule.",
+}
+
+MISSING_DETAIL_PROMPTS = {
+    'time': "⏰ What time would you like to schedule it?",
+    'attendees': "👥 Who should I invite? (provide email addresses)",
+    'title': "📝 What's the meeting about? (meeting title/purpose)",
+}
+
 def handle_general_chat(message: str) -> str:
     """Handle general chat messages and questions"""
-    message_lower = message.lower()
-    
-    # Greetings
-    if any(word in message_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening']):
-        return "Hello! I'm your AI assistant. I can help you with booking meetings, creating tasks, managing your calendar, and answering questions. How can I assist you today?"
-    
-    # About the assistant
-    if any(word in message_lower for word in ['what are you', 'who are you', 'what can you do']):
-        return "I'm an AI assistant that specializes in productivity and automation. I can help you:\n• Book meetings and appointments\n• Create and manage tasks\n• View calendar events\n• Answer questions and have conversations\n\nWhat would you like to do?"
-    
-    # How questions
-    if message_lower.startswith('how'):
-        if 'meeting' in message_lower or 'appointment' in message_lower:
-            return "To book a meeting, just tell me: 'Book a [meeting name] on [date] at [time] with [email]'\n\nExample: 'Book a team standup tomorrow at 2 PM with john@example.com'"
-        elif 'task' in message_lower:
-            return "To create a task, just say: 'Create a [priority] task to [description]'\n\nExample: 'Create a high priority task to review the project proposal'"
-        else:
-            return "I can help you with various tasks! Try asking me to book meetings, create tasks, or view your calendar. You can also ask me questions and I'll do my best to help."
-    
-    # What questions
-    if message_lower.startswith('what'):
-        return "I can help you with productivity tasks like scheduling, task management, and general questions. What specific thing would you like to know about?"
-    
-    # Thank you
-    if any(word in message_lower for word in ['thank', 'thanks']):
-        return "You're welcome! I'm here to help whenever you need assistance with your tasks and schedule."
+    intent = intent_engine.chat_intent(message)
+    if intent in CHAT_RESPONSES:
+        return CHAT_RESPONSES[intent]
     
     # General questions - provide helpful response
     return f"I understand you're asking about: '{message}'. While I specialize in calendar and task management, I'm happy to help! Could you provide more details or let me know if you'd like to book a meeting or create a task instead?"
@@ -81,29 +76,16 @@ def automate_task(command: str) -> str:
         except ImportError:
             tools_available = False
         
+        match = intent_engine.classify(command)
+        
         # Handle general chat/questions first
-        if not any(keyword in command_lower for keyword in ['book', 'create', 'show', 'list', 'schedule', 'task', 'meeting', 'appointment', 'event', 'calendar']):
+        if match.intent in CHAT_INTENTS:
             return handle_general_chat(command)
         
         # Book meeting/appointment
-        if "book" in command_lower and ("meeting" in command_lower or "appointment" in command_lower):
+        if match.intent == 'book_meeting':
             # Check for missing details
-            missing_details = []
-            
-            # Check for time
-            has_time = any(word in command_lower for word in ['tomorrow', 'today', 'am', 'pm', ':', 'at']) or re.search(r'\d{1,2}', command)
-            if not has_time:
-                missing_details.append("⏰ What time would you like to schedule it?")
-            
-            # Check for attendees
-            has_attendees = '@' in command or any(word in command_lower for word in ['with', 'attendees', 'invite'])
-            if not has_attendees:
-                missing_details.append("👥 Who should I invite? (provide email addresses)")
-            
-            # Check for meeting purpose/title
-            has_purpose = len(command.replace('book', '').replace('meeting', '').replace('appointment', '').strip()) > 10
-            if not has_purpose:
-                missing_details.append("📝 What's the meeting about? (meeting title/purpose)")
+            missing_details = [MISSING_DETAIL_PROMPTS[detail] for detail in match.slots['missing']]
             
             if missing_details:
                 return f"I'd be happy to book that meeting! I need a few more details:\n\n" + "\n".join(missing_details) + "\n\nExample: 'Book a project review meeting tomorrow at 2 PM with john@example.com'"
@@ -120,8 +102,7 @@ def automate_task(command: str) -> str:
                         title = parts[0].strip().replace("book", "").replace("a", "").strip() + " Meeting"
                 
                 start_iso, end_iso = parse_datetime(command)
-                emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', command)
-                email_str = ",".join(emails) if emails else ""
+                email_str = ",".join(match.slots['emails'])
                 
                 tool_input = f"{title} | {start_iso} | {end_iso} | {email_str}"
                 return book_appointment(tool_input)
@@ -129,7 +110,7 @@ def automate_task(command: str) -> str:
                 return f"❌ Error booking meeting: {str(e)}"
         
         # Create task
-        elif "create" in command_lower and "task" in command_lower:
+        elif match.intent == 'create_task':
             if not tools_available:
                 task_name = command.replace("create", "").replace("task", "").replace("to", "").strip()
                 return f"✅ Task '{task_name}' created successfully! (Task storage needs setup)"
@@ -140,21 +121,21 @@ def automate_task(command: str) -> str:
                 return f"❌ Error creating task: {str(e)}"
         
         # Show/list tasks
-        elif ("show" in command_lower or "list" in command_lower) and "task" in command_lower:
+        elif match.intent == 'list_tasks':
             try:
                 return get_tasks(command)
             except Exception as e:
                 return f"❌ Error fetching tasks: {str(e)}"
         
         # Show/list events
-        elif ("show" in command_lower or "list" in command_lower) and ("event" in command_lower or "calendar" in command_lower):
+        elif match.intent == 'list_events':
             try:
                 return get_events(command)
             except Exception as e:
                 return f"❌ Error fetching events: {str(e)}"
         
         # Help
-        elif "help" in command_lower:
+        elif match.intent == 'help':
             return """I can help you with:
 • Book meetings: "book a meeting tomorrow at 2 PM"
 • Create tasks: "create a high priority task to review code"
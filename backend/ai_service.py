@@ -1,18 +1,60 @@
 """AI Service with Amazon Q integration and OpenAI fallback"""
 import boto3
-import openai
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 from config import settings
+from tool_executor import tool_executor
+from provider_scheduler import AllProvidersFailed, ProviderAttempt, ProviderScheduler
+from provider_health import ProviderHealth
+from context_window import PromptWindow, context_assembler
+from llm_clients import llm_clients
+import os
+import time
 import logging
 import json
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Per-provider deadlines (seconds) for generate_response
+AMAZON_Q_DEADLINE = float(os.getenv("AMAZON_Q_DEADLINE", "15"))
+OPENAI_DEADLINE = float(os.getenv("OPENAI_DEADLINE", "30"))
+
+OPENAI_SYSTEM_PROMPT = """You are Aether, an intelligent AI assistant specializing in productivity and automation. 
+                    You help users with:
+                    - Calendar management and meeting scheduling
+                    - Task creation and management
+                    - General questions and conversations
+                    - Google Calendar integration
+                    
+                    Be helpful, concise, and professional. When users want to schedule meetings or create tasks, 
+                    guide them through the process and ask for any missing information."""
+
+class ResponseStream:
+    """Async iterator over the text deltas of one AI response.
+
+    ``source``, ``confidence`` and ``metadata`` are filled in once a
+    provider starts answering, i.e. by the time the first delta arrives.
+    """
+    
+    def __init__(self, deltas_factory):
+        self.source: Optional[str] = None
+        self.confidence = 0.0
+        self.metadata: Dict[str, Any] = {}
+        self._deltas = deltas_factory(self)
+    
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._deltas
+    
+    async def aclose(self):
+        """Stop the response early and release the provider connection"""
+        await self._deltas.aclose()
+
 class AIService:
     def __init__(self):
         self.amazon_q_client = None
         self.openai_client = None
+        self.health = ProviderHealth()
+        self.scheduler = ProviderScheduler(health=self.health)
         self._setup_clients()
     
     def _setup_clients(self):
@@ -33,8 +75,8 @@ class AIService:
         # Setup OpenAI as fallback
         if settings.openai_api_key:
             try:
-                openai.api_key = settings.openai_api_key
-                self.openai_client = openai
+                llm_clients.api_key = settings.openai_api_key
+                self.openai_client = llm_clients.get_async_client()
                 logger.info("OpenAI client initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI: {e}")
@@ -45,24 +87,146 @@ class AIService:
         context: Optional[List[Dict]] = None,
         user_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Generate AI response using Amazon Q or OpenAI fallback"""
+        """Generate AI response using Amazon Q or OpenAI fallback.
         
-        # Try Amazon Q first
-        if self.amazon_q_client and settings.amazon_q_application_id:
+        Amazon Q goes first; OpenAI is started as a hedge once Amazon Q runs
+        past its usual (p95) latency, or straight away if it fails. The
+        first answer wins and the other call is cancelled. A provider whose
+        circuit breaker is open is skipped, and one whose health score has
+        dropped well below the other's is tried second.
+        """
+        attempts = self._provider_attempts(message, context, user_id)
+        if attempts:
             try:
-                return await self._amazon_q_response(message, context, user_id)
-            except Exception as e:
-                logger.error(f"Amazon Q failed: {e}")
+                return await self.scheduler.run(attempts)
+            except AllProvidersFailed as e:
+                logger.error(f"All AI providers failed: {e}")
         
-        # Fallback to OpenAI
+        # Final fallback to rule-based
+        return await self._rule_based_response(message)
+    
+    def _provider_attempts(
+        self,
+        message: str,
+        context: Optional[List[Dict]],
+        user_id: Optional[str]
+    ) -> List[ProviderAttempt]:
+        attempts = {
+            'amazon_q': ProviderAttempt(
+                'amazon_q', lambda: self._amazon_q_response(message, context, user_id), AMAZON_Q_DEADLINE
+            ),
+            'openai': ProviderAttempt(
+                'openai', lambda: self._openai_response(message, context), OPENAI_DEADLINE
+            )
+        }
+        return [attempts[name] for name in self._ordered_providers()]
+    
+    def _configured_providers(self) -> List[str]:
+        """Configured providers in preference order"""
+        providers = []
+        if self.amazon_q_client and settings.amazon_q_application_id:
+            providers.append('amazon_q')
         if self.openai_client:
+            providers.append('openai')
+        return providers
+    
+    def _ordered_providers(self) -> List[str]:
+        """Configured providers whose breaker allows a call, healthiest first"""
+        return self.health.order(self._configured_providers())
+    
+    def stream_response(
+        self, 
+        message: str, 
+        context: Optional[List[Dict]] = None,
+        user_id: Optional[str] = None
+    ) -> ResponseStream:
+        """Like generate_response, but yields text as the provider produces it.
+        
+        OpenAI streams token deltas. Amazon Q and the rule-based fallback
+        have no streaming API, so their whole reply arrives as one delta.
+        Falls back to the next provider only if one fails before answering.
+        """
+        return ResponseStream(lambda stream: self._stream_deltas(stream, message, context, user_id))
+    
+    async def _stream_deltas(
+        self,
+        stream: ResponseStream,
+        message: str,
+        context: Optional[List[Dict]],
+        user_id: Optional[str]
+    ) -> AsyncIterator[str]:
+        for name in self._ordered_providers():
+            if not self.health.allow(name):
+                continue
+            started = time.monotonic()
             try:
-                return await self._openai_response(message, context)
+                deltas = await self._open_stream(name, stream, message, context, user_id)
             except Exception as e:
-                logger.error(f"OpenAI failed: {e}")
+                self.health.record_failure(name, time.monotonic() - started)
+                logger.error(f"{name} failed: {e}")
+                continue
+            except BaseException:
+                # Cancelled before the provider answered
+                self.health.release(name)
+                raise
+            self.health.record_success(name, time.monotonic() - started)
+            
+            try:
+                async for delta in deltas:
+                    yield delta
+            finally:
+                await deltas.aclose()
+            return
         
         # Final fallback to rule-based
-        return await self._rule_based_response(message)
+        response = await self._rule_based_response(message)
+        self._describe(stream, response)
+        yield response['content']
+    
+    async def _open_stream(
+        self,
+        name: str,
+        stream: ResponseStream,
+        message: str,
+        context: Optional[List[Dict]],
+        user_id: Optional[str]
+    ):
+        """Start a provider's reply; returns its deltas once it has answered"""
+        if name == 'amazon_q':
+            response = await self._amazon_q_response(message, context, user_id)
+            self._describe(stream, response)
+            return self._single_delta(response['content'])
+        
+        prompt = self._openai_prompt(message, context)
+        chunks = await self.openai_client.chat.completions.create(
+            model="gpt-4",
+            messages=prompt.messages,
+            max_tokens=500,
+            temperature=0.7,
+            stream=True
+        )
+        stream.source = 'openai'
+        stream.confidence = 0.8
+        stream.metadata = {'model': 'gpt-4', 'context': prompt.report()}
+        return self._openai_deltas(chunks)
+    
+    async def _single_delta(self, content: str) -> AsyncIterator[str]:
+        yield content
+    
+    async def _openai_deltas(self, chunks) -> AsyncIterator[str]:
+        try:
+            async for chunk in chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            # Release the upstream connection if the consumer stopped early
+            await chunks.close()
+    
+    def _describe(self, stream: ResponseStream, response: Dict[str, Any]):
+        stream.source = response['source']
+        stream.confidence = response['confidence']
+        stream.metadata = response['metadata']
     
     async def _amazon_q_response(
         self, 
@@ -70,25 +234,16 @@ class AIService:
         context: Optional[List[Dict]] = None,
         user_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Generate response using Amazon Q"""
+        """Generate response using Amazon Q.
+        
+        Amazon Q keeps the conversation history itself (keyed by
+        conversationId), so only the new message is sent.
+        """
         try:
-            # Prepare conversation context
-            conversation_context = []
-            if context:
-                for msg in context[-10:]:  # Last 10 messages for context
-                    conversation_context.append({
-                        'role': 'user' if msg.get('is_user') else 'assistant',
-                        'content': msg.get('content', '')
-                    })
-            
-            # Add current message
-            conversation_context.append({
-                'role': 'user',
-                'content': message
-            })
-            
-            # Call Amazon Q
-            response = self.amazon_q_client.chat_sync(
+            # Call Amazon Q (boto3 is blocking, so run it in the tool pool)
+            response = await tool_executor.run(
+                'amazon_q',
+                self.amazon_q_client.chat_sync,
                 applicationId=settings.amazon_q_application_id,
                 userMessage=message,
                 conversationId=user_id or 'default',
@@ -109,6 +264,12 @@ class AIService:
             logger.error(f"Amazon Q API error: {e}")
             raise
     
+    def _openai_prompt(self, message: str, context: Optional[List[Dict]] = None) -> PromptWindow:
+        """Prepare messages for OpenAI, fitting the history into the token budget"""
+        prompt = context_assembler.assemble(OPENAI_SYSTEM_PROMPT, message, context)
+        logger.debug(f"OpenAI prompt: {prompt.tokens} tokens, {prompt.tokens_saved} saved")
+        return prompt
+    
     async def _openai_response(
         self, 
         message: str, 
@@ -116,37 +277,11 @@ class AIService:
     ) -> Dict[str, Any]:
         """Generate response using OpenAI"""
         try:
-            # Prepare messages for OpenAI
-            messages = [
-                {
-                    "role": "system",
-                    "content": """You are Aether, an intelligent AI assistant specializing in productivity and automation. 
-                    You help users with:
-                    - Calendar management and meeting scheduling
-                    - Task creation and management
-                    - General questions and conversations
-                    - Google Calendar integration
-                    
-                    Be helpful, concise, and professional. When users want to schedule meetings or create tasks, 
-                    guide them through the process and ask for any missing information."""
-                }
-            ]
-            
-            # Add conversation context
-            if context:
-                for msg in context[-10:]:
-                    messages.append({
-                        "role": "user" if msg.get('is_user') else "assistant",
-                        "content": msg.get('content', '')
-                    })
-            
-            # Add current message
-            messages.append({"role": "user", "content": message})
-            
             # Call OpenAI
-            response = await self.openai_client.ChatCompletion.acreate(
+            prompt = self._openai_prompt(message, context)
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-4",
-                messages=messages,
+                messages=prompt.messages,
                 max_tokens=500,
                 temperature=0.7
             )
@@ -157,7 +292,8 @@ class AIService:
                 'confidence': 0.8,
                 'metadata': {
                     'model': 'gpt-4',
-                    'tokens_used': response.usage.total_tokens
+                    'tokens_used': response.usage.total_tokens,
+                    'context': prompt.report()
                 }
             }
             
@@ -197,12 +333,29 @@ Try saying: "Book a meeting tomorrow at 2 PM" or "Create a task to review docume
         }
     
     def is_available(self) -> Dict[str, bool]:
-        """Check which AI services are available"""
+        """Check which AI services are configured and not cut off by their breaker"""
+        usable = set(self._ordered_providers())
         return {
-            'amazon_q': bool(self.amazon_q_client and settings.amazon_q_application_id),
-            'openai': bool(self.openai_client and settings.openai_api_key),
+            'amazon_q': 'amazon_q' in usable,
+            'openai': 'openai' in usable and bool(settings.openai_api_key),
             'rule_based': True
         }
+    
+    def get_health(self) -> Dict[str, Any]:
+        """Breaker state, health score and latency per provider"""
+        health = self.health.get_stats()
+        latency = self.scheduler.get_stats()
+        return {
+            'order': self._ordered_providers() + ['rule_based'],
+            'context': context_assembler.get_stats(),
+            'providers': {
+                name: {
+                    **health.get(name, {'state': 'closed', 'score': 1.0}),
+                    'scheduler': latency.get(name)
+                }
+                for name in self._configured_providers()
+            }
+        }
 
 # Global AI service instance
 ai_service = AIService()
\ No newline at end of file
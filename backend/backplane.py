@@ -0,0 +1,281 @@
+"""Cross-worker message routing and presence for WebSocket sessions"""
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKPLANE = os.getenv("WS_BACKPLANE", "off")  # off, memory, redis
+# Presence entries expire unless refreshed; a crashed worker's sessions vanish after this
+PRESENCE_TTL = float(os.getenv("WS_PRESENCE_TTL", "30"))
+HEARTBEAT_INTERVAL = float(os.getenv("WS_PRESENCE_HEARTBEAT", "10"))
+KEY_PREFIX = "aether:ws"
+# Delay before resubscribing after the Redis pub/sub connection drops, doubling up to the max
+RECONNECT_MIN_DELAY = float(os.getenv("WS_BACKPLANE_RECONNECT_MIN", "0.5"))
+RECONNECT_MAX_DELAY = float(os.getenv("WS_BACKPLANE_RECONNECT_MAX", "30"))
+
+Deliver = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class _Backplane:
+    """Routing shared by the backplanes.
+
+    Every worker subscribes to its own channel and to a broadcast
+    channel. Presence records which worker holds each session of a user,
+    so a message for a user is published only to the workers that need
+    it. Subclasses provide the transport and the presence index.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, ttl: float = PRESENCE_TTL):
+        self.worker_id = worker_id or new_worker_id()
+        self.ttl = ttl
+        self.published = 0
+        self.received = 0
+
+    def worker_channel(self, worker_id: str) -> str:
+        return f"{KEY_PREFIX}:worker:{worker_id}"
+
+    @property
+    def all_channel(self) -> str:
+        return f"{KEY_PREFIX}:all"
+
+    def _envelope(self, kind: str, message: dict, user_id: Optional[str] = None) -> Dict[str, Any]:
+        return {'origin': self.worker_id, 'kind': kind, 'user_id': user_id, 'message': message}
+
+    async def publish_to_user(self, user_id: str, message: dict) -> int:
+        """Forward a message to other workers holding the user's sessions; returns how many"""
+        workers = await self.workers_for_user(user_id)
+        workers.discard(self.worker_id)
+        envelope = self._envelope('user', message, user_id)
+        for worker_id in workers:
+            await self.publish(self.worker_channel(worker_id), envelope)
+        return len(workers)
+
+    async def publish_all(self, message: dict):
+        await self.publish(self.all_channel, self._envelope('all', message))
+
+    async def is_user_online(self, user_id: str) -> bool:
+        return bool(await self.workers_for_user(user_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self).__name__,
+            'worker_id': self.worker_id,
+            'published': self.published,
+            'received': self.received
+        }
+
+
+class InProcessHub:
+    """Shared state standing in for Redis between backplanes in one process"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Dict[str, Deliver]] = {}  # channel -> worker_id -> deliver
+        self.presence: Dict[str, Dict[Tuple[str, str], float]] = {}  # user -> (worker, session) -> expiry
+
+
+class InProcessBackplane(_Backplane):
+    """Backplane for a single process, e.g. several managers simulating workers.
+
+    Messages are round-tripped through JSON so they look exactly as they
+    would after crossing Redis.
+    """
+
+    def __init__(self, hub: Optional[InProcessHub] = None, worker_id: Optional[str] = None, ttl: float = PRESENCE_TTL):
+        super().__init__(worker_id, ttl)
+        self.hub = hub or _default_hub
+
+    async def start(self, deliver: Deliver):
+        async def receive(envelope: Dict[str, Any]):
+            self.received += 1
+            await deliver(envelope)
+
+        for channel in (self.worker_channel(self.worker_id), self.all_channel):
+            self.hub.subscribers.setdefault(channel, {})[self.worker_id] = receive
+
+    async def stop(self):
+        for channel in (self.worker_channel(self.worker_id), self.all_channel):
+            self.hub.subscribers.get(channel, {}).pop(self.worker_id, None)
+        for sessions in self.hub.presence.values():
+            for key in [key for key in sessions if key[0] == self.worker_id]:
+                del sessions[key]
+
+    async def publish(self, channel: str, envelope: Dict[str, Any]):
+        self.published += 1
+        payload = json.dumps(envelope)
+        for deliver in list(self.hub.subscribers.get(channel, {}).values()):
+            asyncio.ensure_future(deliver(json.loads(payload)))
+
+    async def add_session(self, user_id: str, session_id: str):
+        self.hub.presence.setdefault(user_id, {})[(self.worker_id, session_id)] = time.time() + self.ttl
+
+    async def remove_session(self, user_id: str, session_id: str):
+        sessions = self.hub.presence.get(user_id)
+        if sessions is not None:
+            sessions.pop((self.worker_id, session_id), None)
+            if not sessions:
+                del self.hub.presence[user_id]
+
+    async def heartbeat(self, sessions: Dict[str, str]):
+        """Refresh presence for this worker's sessions (session_id -> user_id)"""
+        for session_id, user_id in sessions.items():
+            await self.add_session(user_id, session_id)
+
+    async def workers_for_user(self, user_id: str) -> Set[str]:
+        now = time.time()
+        sessions = self.hub.presence.get(user_id, {})
+        return {worker_id for (worker_id, _), expiry in sessions.items() if expiry > now}
+
+
+class RedisBackplane(_Backplane):
+    """Redis pub/sub for routing, one sorted set per user for presence.
+
+    Presence members are ``worker_id|session_id`` scored by expiry time,
+    so stale entries are skipped (and pruned) without a sweeper. If the
+    pub/sub connection drops, the reader resubscribes with exponential
+    backoff; messages published while it was down are lost, as with any
+    Redis pub/sub subscriber.
+    """
+
+    def __init__(self, url: str, worker_id: Optional[str] = None, ttl: float = PRESENCE_TTL):
+        super().__init__(worker_id, ttl)
+        import redis.asyncio as aioredis
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self.reconnects = 0
+
+    def _presence_key(self, user_id: str) -> str:
+        return f"{KEY_PREFIX}:presence:{user_id}"
+
+    async def start(self, deliver: Deliver):
+        self._pubsub = await self._subscribe()
+        self._reader = asyncio.create_task(self._read(deliver))
+
+    async def _subscribe(self):
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(self.worker_channel(self.worker_id), self.all_channel)
+        except Exception:
+            await pubsub.aclose()
+            raise
+        return pubsub
+
+    async def _read(self, deliver: Deliver):
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = await self._subscribe()
+                async for item in self._pubsub.listen():
+                    # Anything arriving means the connection is healthy again
+                    delay = RECONNECT_MIN_DELAY
+                    await self._handle(item, deliver)
+                raise ConnectionError("subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.reconnects += 1
+                logger.warning(f"Backplane subscription lost ({e}), reconnecting in {delay:g}s")
+                await self._close_pubsub()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _handle(self, item: Dict[str, Any], deliver: Deliver):
+        if item.get('type') != 'message':
+            return
+        try:
+            envelope = json.loads(item['data'])
+        except ValueError:
+            logger.warning("Skipping malformed backplane message")
+            return
+        self.received += 1
+        try:
+            await deliver(envelope)
+        except Exception as e:
+            logger.error(f"Error delivering backplane message: {e}")
+
+    async def _close_pubsub(self):
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def stop(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Backplane unsubscribe failed: {e}")
+            await self._close_pubsub()
+        await self.client.aclose()
+
+    async def publish(self, channel: str, envelope: Dict[str, Any]):
+        self.published += 1
+        await self.client.publish(channel, json.dumps(envelope))
+
+    async def add_session(self, user_id: str, session_id: str):
+        key = self._presence_key(user_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, {f"{self.worker_id}|{session_id}": time.time() + self.ttl})
+            pipe.expire(key, int(self.ttl) + 1)
+            await pipe.execute()
+
+    async def remove_session(self, user_id: str, session_id: str):
+        await self.client.zrem(self._presence_key(user_id), f"{self.worker_id}|{session_id}")
+
+    async def heartbeat(self, sessions: Dict[str, str]):
+        """Refresh presence for this worker's sessions (session_id -> user_id)"""
+        if not sessions:
+            return
+        expiry = time.time() + self.ttl
+        async with self.client.pipeline(transaction=False) as pipe:
+            for session_id, user_id in sessions.items():
+                key = self._presence_key(user_id)
+                pipe.zadd(key, {f"{self.worker_id}|{session_id}": expiry})
+                pipe.expire(key, int(self.ttl) + 1)
+            await pipe.execute()
+
+    async def workers_for_user(self, user_id: str) -> Set[str]:
+        key = self._presence_key(user_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(key, '-inf', time.time())
+            pipe.zrange(key, 0, -1)
+            _, members = await pipe.execute()
+        return {member.split('|', 1)[0] for member in members}
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats['reconnects'] = self.reconnects
+        return stats
+
+
+_default_hub = InProcessHub()
+
+
+def create_backplane():
+    """Backplane selected by WS_BACKPLANE, or None for a single worker"""
+    if BACKPLANE == "redis":
+        try:
+            from config import settings
+            return RedisBackplane(settings.redis_url)
+        except Exception as e:
+            logger.error(f"Failed to set up Redis backplane, running single-worker: {e}")
+    elif BACKPLANE == "memory":
+        return InProcessBackplane()
+    return None
@@ -0,0 +1,162 @@
+"""Bulk intent routing for transcript replays and chat imports"""
+import os
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import agent_router
+from intents import CHAT_INTENTS, intent_engine
+
+logger = logging.getLogger(__name__)
+
+LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+# 0 disables the rate limit
+LLM_RATE_PER_SECOND = float(os.getenv("BATCH_LLM_RATE_PER_SECOND", "5"))
+
+# Rule-based intents that need the model to decide: every chat-family
+# intent (the agent hands these to the model too) plus unmatched messages
+AMBIGUOUS_INTENTS = CHAT_INTENTS | {'unknown'}
+
+TOOL_INTENTS = {
+    'book_appointment': 'book_meeting',
+    'get_events': 'list_events',
+    'create_task': 'create_task',
+    'get_tasks': 'list_tasks',
+}
+
+
+class RateLimiter:
+    """Token bucket shared by concurrent LLM calls; a rate of 0 or less is unlimited"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        self.rate = rate_per_second
+        self.capacity = burst or max(int(rate_per_second), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BatchStats:
+    """Throughput and per-stage timing for one batch"""
+
+    def __init__(self):
+        self.total = 0
+        self.rule_based = 0
+        self.llm = 0
+        self.llm_errors = 0
+        # Every model call made, successful or not; llm_call_seconds covers all of them
+        self.llm_calls = 0
+        self.rule_seconds = 0.0
+        self.llm_seconds = 0.0
+        self.llm_call_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'rule_based': self.rule_based,
+            'llm': self.llm,
+            'llm_errors': self.llm_errors,
+            'llm_calls': self.llm_calls,
+            'rule_seconds': round(self.rule_seconds, 4),
+            'llm_seconds': round(self.llm_seconds, 4),
+            'llm_avg_call_seconds': round(self.llm_call_seconds / self.llm_calls, 4) if self.llm_calls else 0.0,
+            'total_seconds': round(self.total_seconds, 4),
+            'messages_per_second': round(self.total / self.total_seconds, 1) if self.total_seconds else 0.0
+        }
+
+
+async def route_batch(
+    messages: Iterable[str],
+    stats: Optional[BatchStats] = None,
+    use_llm: Optional[bool] = None,
+    concurrency: int = LLM_CONCURRENCY,
+    rate_per_second: float = LLM_RATE_PER_SECOND
+) -> AsyncIterator[Dict[str, Any]]:
+    """Classify many messages, yielding results in input order.
+
+    Every message goes through the rule-based engine first. Only ambiguous
+    ones are sent to the model, concurrently and rate limited. Results for
+    rule-based messages are yielded as soon as everything before them is
+    ready.
+    """
+    stats = stats or BatchStats()
+    if use_llm is None:
+        use_llm = agent_router.llm_enabled()
+
+    started = time.perf_counter()
+    results: List[Any] = []
+    for index, message in enumerate(messages):
+        match = intent_engine.classify(message)
+        results.append({
+            'index': index,
+            'message': message,
+            'intent': match.intent,
+            'slots': match.slots,
+            'tools': [],
+            'source': 'rule_based'
+        })
+    stats.total = len(results)
+    stats.rule_seconds = time.perf_counter() - started
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate_per_second)
+    llm_started = time.perf_counter()
+
+    async def classify_with_llm(result: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            await limiter.acquire()
+            stats.llm_calls += 1
+            call_started = time.perf_counter()
+            try:
+                tools = await agent_router.select_tools_async(result['message'])
+            except Exception as e:
+                logger.error(f"Batch LLM classification failed: {e}")
+                stats.llm_errors += 1
+                return result
+            finally:
+                stats.llm_call_seconds += time.perf_counter() - call_started
+
+        stats.llm += 1
+        result.update({
+            'intent': TOOL_INTENTS.get(tools[0][0], 'chat') if tools else 'chat',
+            'tools': [{'name': name, 'args': args} for name, args in tools],
+            'source': 'llm'
+        })
+        return result
+
+    pending: Dict[int, asyncio.Task] = {}
+    if use_llm:
+        for result in results:
+            if result['intent'] in AMBIGUOUS_INTENTS:
+                pending[result['index']] = asyncio.ensure_future(classify_with_llm(result))
+
+    try:
+        for result in results:
+            task = pending.pop(result['index'], None)
+            if task is not None:
+                result = await task
+            if result['source'] == 'rule_based':
+                stats.rule_based += 1
+            yield result
+    finally:
+        for task in pending.values():
+            task.cancel()
+        if use_llm:
+            stats.llm_seconds = time.perf_counter() - llm_started
+        stats.total_seconds = time.perf_counter() - started
+        logger.info(f"Batch routing finished: {stats.to_dict()}")
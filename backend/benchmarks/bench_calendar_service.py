@@ -0,0 +1,74 @@
+"""Per-call overhead of getting the Calendar service: rebuilt every call vs. cached.
+
+Run from backend/:  python benchmarks/bench_calendar_service.py [calls]
+Writes a throwaway token.json holding credentials that are still valid, so
+no refresh happens. Each call then runs ``events().list()`` against
+googleapiclient's HttpMockSequence, so no network is involved. The old
+get_calender_service re-read token.json and called build() every time.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.oauth2.credentials import Credentials  # noqa: E402
+from googleapiclient.discovery import build  # noqa: E402
+from googleapiclient.http import HttpMockSequence  # noqa: E402
+
+import tools  # noqa: E402
+
+EVENTS = json.dumps({'items': [{'id': 'e1', 'summary': 'Standup', 'start': {'dateTime': '2025-01-01T10:00:00Z'}}]})
+
+
+def write_token(path: str):
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+    with open(path, 'w') as f:
+        json.dump({
+            'token': 'access-token',
+            'refresh_token': 'refresh-token',
+            'client_id': 'bench.apps.googleusercontent.com',
+            'client_secret': 'secret',
+            'expiry': expiry.isoformat() + 'Z'
+        }, f)
+
+
+def legacy_service():
+    """What every tool call used to do"""
+    creds = Credentials.from_authorized_user_file(tools.TOKEN_FILE, tools.SCOPES)
+    return build('calendar', 'v3', credentials=creds)
+
+
+def list_events(service):
+    http = HttpMockSequence([({'status': '200'}, EVENTS)])
+    return service.events().list(calendarId='primary', maxResults=10).execute(http=http)
+
+
+def timed_calls(get_service, calls: int) -> list:
+    durations = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        list_events(get_service())
+        durations.append(time.perf_counter() - started)
+    return sorted(durations)
+
+
+def report(label: str, durations: list):
+    p50 = durations[len(durations) // 2]
+    p99 = durations[min(int(len(durations) * 0.99), len(durations) - 1)]
+    print(f"  {label:<18} p50 {p50 * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms")
+
+
+def main(calls: int):
+    tools.TOKEN_FILE = os.path.join(tempfile.mkdtemp(), 'token.json')
+    write_token(tools.TOKEN_FILE)
+    print(f"{calls} events().list() calls on a mocked HTTP layer")
+    report("rebuilt per call", timed_calls(legacy_service, calls))
+    report("cached service", timed_calls(tools.get_calender_service, calls))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
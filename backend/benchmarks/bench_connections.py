@@ -0,0 +1,126 @@
+"""Connect, broadcast and disconnect with 10k simulated WebSocket connections.
+
+Run from backend/:  python benchmarks/bench_connections.py [connections] [sessions_per_user] [slow]
+Fake sockets spread over connections / sessions_per_user users. ``slow`` of
+them never finish a send, so they should be evicted after the send timeout
+without holding up delivery to the rest. The old disconnect scanned every
+user to find the session, so it is timed too for comparison.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_manager import ConnectionManager  # noqa: E402
+
+# Evictions are logged per socket
+logging.getLogger('websocket_manager').setLevel(logging.ERROR)
+
+SEND_TIMEOUT = 0.2
+
+
+class Deliveries:
+    """Counts frames delivered to the fast sockets"""
+
+    def __init__(self):
+        self.count = 0
+        self.target = None
+        self.reached = asyncio.Event()
+
+    def add(self):
+        self.count += 1
+        if self.count == self.target:
+            self.reached.set()
+
+    async def wait(self, frames: int):
+        self.target = self.count + frames
+        self.reached.clear()
+        await self.reached.wait()
+
+
+class FakeSocket:
+    def __init__(self, deliveries: Deliveries, slow: bool = False):
+        self.deliveries = deliveries
+        self.slow = slow
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        if self.slow:
+            await asyncio.sleep(3600)
+        self.deliveries.add()
+
+    async def close(self, code=1000):
+        pass
+
+
+def legacy_disconnect_all(connections: int, sessions_per_user: int) -> float:
+    """The old user -> one session dict, scanned on every disconnect"""
+    user_sessions = {f"user-{i // sessions_per_user}": f"s{i}" for i in range(connections)}
+    started = time.perf_counter()
+    for i in range(connections):
+        session_id = f"s{i}"
+        for user_id, sess_id in list(user_sessions.items()):
+            if sess_id == session_id:
+                del user_sessions[user_id]
+                break
+    return time.perf_counter() - started
+
+
+async def main(connections: int, sessions_per_user: int, slow: int):
+    manager = ConnectionManager(send_timeout=SEND_TIMEOUT)
+    users = max(connections // sessions_per_user, 1)
+    deliveries = Deliveries()
+    fast = connections - slow
+
+    started = time.perf_counter()
+    welcomed = asyncio.ensure_future(deliveries.wait(fast))
+    for i in range(connections):
+        await manager.connect(FakeSocket(deliveries, slow=i < slow), f"user-{i % users}", f"s{i}")
+    connect_time = time.perf_counter() - started
+    await welcomed
+
+    started = time.perf_counter()
+    delivered = asyncio.ensure_future(deliveries.wait(fast))
+    queued = 0
+    for user in range(users):
+        queued += await manager.broadcast_to_user(f"user-{user}", {'type': 'notification', 'content': 'hi'})
+    await delivered
+    user_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    delivered = asyncio.ensure_future(deliveries.wait(fast))
+    await manager.broadcast_all({'type': 'system_notice', 'content': 'maintenance'})
+    await delivered
+    all_time = time.perf_counter() - started
+
+    await asyncio.sleep(SEND_TIMEOUT * 2)
+    evicted = manager.evicted
+
+    remaining = manager.get_active_sessions()
+    started = time.perf_counter()
+    for session_id in remaining:
+        manager.disconnect(session_id)
+    disconnect_time = time.perf_counter() - started
+    legacy_time = legacy_disconnect_all(len(remaining), sessions_per_user)
+
+    print(f"{connections} connections, {users} users, {slow} slow sockets (send timeout {SEND_TIMEOUT}s)")
+    print(f"  connect all:               {connect_time * 1000:8.1f} ms")
+    print(f"  broadcast_to_user, each:   {user_time * 1000:8.1f} ms ({queued} frames queued, {fast} delivered)")
+    print(f"  broadcast_all:             {all_time * 1000:8.1f} ms to reach {fast} fast sockets")
+    print(f"  slow sockets evicted:      {evicted:8d}")
+    print(f"  disconnect all, indexed:   {disconnect_time * 1000:8.1f} ms ({len(remaining)} sessions)")
+    print(f"  disconnect all, old scan:  {legacy_time * 1000:8.1f} ms")
+    assert not manager.user_sessions and not manager.session_users
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    ))
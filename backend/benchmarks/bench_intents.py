@@ -0,0 +1,155 @@
+"""Intent classification: the shared IntentEngine vs. the old per-keyword scans.
+
+Run from backend/:  python benchmarks/bench_intents.py [utterances] [rounds]
+Generates a corpus of chat utterances from templates. Each is classified
+for the rule-based agent and routed for the WebSocket handler. The legacy
+functions repeat the any(word in message_lower ...) checks that agents.py
+and websocket_manager.py ran before the engine, and the benchmark checks
+both sides agree. The engine is timed cold, on each distinct message once
+with its scan cache cleared, and warm, over the whole corpus with its
+repeats.
+"""
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intents  # noqa: E402
+from intents import intent_engine  # noqa: E402
+
+TEMPLATES = [
+    "book a {topic} meeting {day} at {time} with {email}",
+    "Book an appointment with the {topic} team {day}",
+    "schedule a call about {topic} {day} at {time}",
+    "create a {priority} priority task to {action} the {topic} doc",
+    "add task {action} {topic} notes",
+    "show my calendar for {day}",
+    "list events {day}",
+    "show my tasks",
+    "get the {topic} tasks please",
+    "hello there",
+    "hey, good morning!",
+    "what can you do",
+    "how do I book a meeting?",
+    "how do I create a task",
+    "what is the weather like {day}",
+    "thanks a lot for the {topic} summary",
+    "can you {action} the {topic} report for me",
+    "I need help with {topic}",
+    "tell me a joke about {topic}",
+]
+WORDS = {
+    'topic': ['roadmap', 'budget', 'hiring', 'design review', 'launch', 'quarterly planning', 'onboarding'],
+    'day': ['today', 'tomorrow', 'next week', 'on friday', '2025-03-14'],
+    'time': ['2pm', '10:30', '9 am', '4:15 pm'],
+    'email': ['jo@example.com', 'sam.lee@corp.io', 'team@example.org'],
+    'priority': ['high', 'medium', 'low'],
+    'action': ['review', 'update', 'draft', 'send', 'finish'],
+}
+
+
+def corpus(size: int, rng: random.Random) -> list:
+    return [
+        rng.choice(TEMPLATES).format(**{key: rng.choice(values) for key, values in WORDS.items()})
+        for _ in range(size)
+    ]
+
+
+def legacy_classify(command: str) -> str:
+    """agents.automate_task's checks before the engine"""
+    command_lower = command.lower()
+    if not any(keyword in command_lower for keyword in ['book', 'create', 'show', 'list', 'schedule', 'task',
+                                                        'meeting', 'appointment', 'event', 'calendar']):
+        if any(word in command_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good afternoon',
+                                                  'good evening']):
+            return 'greeting'
+        if any(word in command_lower for word in ['what are you', 'who are you', 'what can you do']):
+            return 'about'
+        if command_lower.startswith('how'):
+            return 'how'
+        if command_lower.startswith('what'):
+            return 'what'
+        if any(word in command_lower for word in ['thank', 'thanks']):
+            return 'thanks'
+        return 'chat'
+    if "book" in command_lower and ("meeting" in command_lower or "appointment" in command_lower):
+        any(word in command_lower for word in ['tomorrow', 'today', 'am', 'pm', ':', 'at']) or re.search(r'\d{1,2}', command)
+        '@' in command or any(word in command_lower for word in ['with', 'attendees', 'invite'])
+        len(command.replace('book', '').replace('meeting', '').replace('appointment', '').strip())
+        re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', command)
+        return 'book_meeting'
+    if "create" in command_lower and "task" in command_lower:
+        return 'create_task'
+    if ("show" in command_lower or "list" in command_lower) and "task" in command_lower:
+        return 'list_tasks'
+    if ("show" in command_lower or "list" in command_lower) and ("event" in command_lower or "calendar" in command_lower):
+        return 'list_events'
+    if "help" in command_lower:
+        return 'help'
+    return 'unknown'
+
+
+def legacy_route(content: str) -> str:
+    """websocket_manager's routing before the engine"""
+    content_lower = content.lower()
+    if any(keyword in content_lower for keyword in ['book', 'schedule', 'meeting', 'appointment']):
+        return 'book_meeting'
+    if any(keyword in content_lower for keyword in ['create', 'add']) and 'task' in content_lower:
+        return 'create_task'
+    if any(keyword in content_lower for keyword in ['show', 'list', 'get']) and ('event' in content_lower or 'calendar' in content_lower):
+        return 'list_events'
+    if any(keyword in content_lower for keyword in ['show', 'list', 'get']) and 'task' in content_lower:
+        return 'list_tasks'
+    return 'chat'
+
+
+def legacy(message: str) -> tuple:
+    return legacy_classify(message), legacy_route(message)
+
+
+def engine(message: str) -> tuple:
+    intent = intent_engine.classify(message).intent
+    # The legacy agent didn't split how-questions by topic
+    return ('how' if intent.startswith('how') else intent), intent_engine.route(message)
+
+
+def timed(fn, messages: list, rounds: int, clear_cache: bool = False) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        if clear_cache:
+            intents._scan.cache_clear()
+        started = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(messages)
+
+
+def main(size: int, rounds: int):
+    messages = corpus(size, random.Random(7))
+    disagreements = [message for message in messages if legacy(message) != engine(message)]
+    assert not disagreements, disagreements[:5]
+
+    legacy_time = timed(legacy, messages, rounds)
+    cold_time = timed(engine, list(dict.fromkeys(messages)), rounds, clear_cache=True)
+    warm_time = timed(engine, messages, rounds)
+    # classify() also extracts slots for bookings and new tasks, which the old code mostly didn't
+    actionable = [message for message in messages if engine(message)[0] in ('book_meeting', 'create_task')]
+    slots_time = timed(intents.extract_slots, actionable, rounds)
+
+    print(f"{size} utterances ({len(set(messages))} distinct), classify + route, best of {rounds}")
+    print(f"  legacy per-keyword scans: {legacy_time * 1e6:6.2f} us/message")
+    print(f"  intent engine, cold:      {cold_time * 1e6:6.2f} us/message")
+    print(f"  intent engine, warm:      {warm_time * 1e6:6.2f} us/message")
+    print(f"  of which slot extraction: {slots_time * len(actionable) / size * 1e6:6.2f} us/message "
+          f"({slots_time * 1e6:.2f} us on each of {len(actionable)} bookings and tasks)")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    )
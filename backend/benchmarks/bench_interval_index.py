@@ -0,0 +1,63 @@
+"""Conflict checks and free-slot searches: IntervalIndex vs. a linear scan.
+
+Run from backend/:  python benchmarks/bench_interval_index.py [events]
+Builds a synthetic calendar (default 10k events over ~2 years of working days).
+"""
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interval_index import IntervalIndex  # noqa: E402
+
+QUERIES = 10000
+START = datetime(2024, 1, 1)
+
+
+def calendar(events: int, rng: random.Random) -> tuple:
+    items = []
+    span_minutes = max(events // 10, 1) * 24 * 60
+    for _ in range(events):
+        start = START + timedelta(minutes=rng.randrange(0, span_minutes, 15))
+        items.append({'start': start, 'end': start + timedelta(minutes=rng.choice([15, 30, 45, 60, 120]))})
+    return items, span_minutes
+
+
+def linear_overlaps(items: list, start: datetime, end: datetime) -> bool:
+    return any(item['start'] < end and item['end'] > start for item in items)
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main(events: int):
+    rng = random.Random(42)
+    items, span_minutes = calendar(events, rng)
+    windows = []
+    for _ in range(QUERIES):
+        start = START + timedelta(minutes=rng.randrange(0, span_minutes, 30))
+        windows.append((start, start + timedelta(minutes=rng.choice([30, 60]))))
+
+    build = timed(IntervalIndex, items)
+    index = IntervalIndex(items)
+    indexed = timed(lambda: [index.overlaps(start, end) for start, end in windows])
+    linear = timed(lambda: [linear_overlaps(items, start, end) for start, end in windows])
+    assert [index.overlaps(s, e) for s, e in windows[:500]] == [linear_overlaps(items, s, e) for s, e in windows[:500]]
+    slot_windows = windows[:1000]
+    slots = timed(lambda: [index.free_slots(start, timedelta(hours=1), 3) for start, _ in slot_windows])
+
+    print(f"{events} events")
+    print(f"  build index:        {build * 1000:8.1f} ms")
+    print(f"  overlap, indexed:   {indexed / QUERIES * 1e6:8.1f} us/query")
+    print(f"  overlap, linear:    {linear / QUERIES * 1e6:8.1f} us/query")
+    print(f"  next 3 free slots:  {slots / len(slot_windows) * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
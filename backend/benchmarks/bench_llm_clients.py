@@ -0,0 +1,124 @@
+"""Chat completion latency: a new OpenAI client per call vs. the pooled llm_clients.
+
+Run from backend/:  python benchmarks/bench_llm_clients.py [calls] [handshake_ms]
+Serves a fake chat-completions endpoint on localhost with HTTP keep-alive.
+Each new connection waits ``handshake_ms`` before its first response,
+standing in for the TCP and TLS setup to api.openai.com. run_agent used to
+build ``OpenAI()`` on every message, so every call paid for client
+construction and a fresh connection; the pooled client pays once.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAKE_PORT = 18903
+os.environ["OPENAI_API_KEY"] = "sk-bench"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}/v1"
+
+from openai import OpenAI  # noqa: E402
+
+from llm_clients import LLMClientRegistry  # noqa: E402
+
+COMPLETION = json.dumps({
+    'id': 'chatcmpl-bench',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'gpt-4o-mini',
+    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': 'ok'}, 'finish_reason': 'stop'}],
+    'usage': {'prompt_tokens': 5, 'completion_tokens': 1, 'total_tokens': 6}
+}).encode()
+
+
+class FakeOpenAI:
+    """Keep-alive chat-completions server running on its own thread"""
+
+    def __init__(self, handshake: float):
+        self.handshake = handshake
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.started = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode('latin-1').split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(COMPLETION)).encode() + b"\r\n\r\n" + COMPLETION
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(asyncio.start_server(self.handle, '127.0.0.1', FAKE_PORT))
+        self.started.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.started.wait()
+
+
+def complete(client):
+    client.chat.completions.create(model='gpt-4o-mini', messages=[{'role': 'user', 'content': 'hi'}])
+
+
+def per_call_client():
+    # What run_agent did before the registry
+    with OpenAI() as client:
+        complete(client)
+
+
+def timed_calls(fn, calls: int) -> list:
+    durations = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return sorted(durations)
+
+
+def report(label: str, durations: list, connections: int):
+    p50 = durations[len(durations) // 2]
+    p99 = durations[min(int(len(durations) * 0.99), len(durations) - 1)]
+    print(f"  {label:<22} p50 {p50 * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms   connections {connections}")
+
+
+def main(calls: int, handshake: float):
+    server = FakeOpenAI(handshake)
+    server.start()
+    print(f"{calls} sequential chat completions, {handshake * 1000:.0f} ms per new connection")
+
+    per_call = timed_calls(per_call_client, calls)
+    report("new client per call", per_call, server.connections)
+
+    server.connections = 0
+    registry = LLMClientRegistry()
+    pooled = timed_calls(lambda: complete(registry.get_client()), calls)
+    report("pooled client", pooled, server.connections)
+    print(f"  reuse: {registry.get_stats()['sync']}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    )
@@ -0,0 +1,117 @@
+"""Time to first token vs. total time for WebSocket replies from a fake streaming provider.
+
+Run from backend/:  python benchmarks/bench_stream_ttft.py [conversations] [tokens] [first_token_ms] [token_ms]
+Each conversation streams ``tokens`` deltas through
+ChatWebSocketHandler._stream_ai_response to a fake socket. The provider
+waits ``first_token_ms`` before its first delta and ``token_ms`` between
+the rest. Times are taken when frames reach the socket. Before streaming,
+the whole reply went out as one frame, so users waited the total time.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_manager import ChatWebSocketHandler, ConnectionManager  # noqa: E402
+
+
+class FakeProviderStream:
+    def __init__(self, tokens: int, first_delay: float, delay: float):
+        self.tokens = tokens
+        self.first_delay = first_delay
+        self.delay = delay
+        self.source = 'fake'
+        self.confidence = 1.0
+
+    async def _generate(self):
+        await asyncio.sleep(self.first_delay)
+        for i in range(self.tokens):
+            if i:
+                await asyncio.sleep(self.delay)
+            yield f"token{i} "
+
+    def __aiter__(self):
+        return self._generate()
+
+    async def aclose(self):
+        pass
+
+
+class FakeProvider:
+    def __init__(self, tokens: int, first_delay: float, delay: float):
+        self.args = (tokens, first_delay, delay)
+
+    def stream_response(self, message, context=None, user_id=None):
+        return FakeProviderStream(*self.args)
+
+
+class TimedSocket:
+    """Records when the first delta and the end frame arrive"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_delta = None
+        self.end = None
+        self.deltas = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        frame_type = json.loads(payload)['type']
+        if frame_type == 'message_delta':
+            self.deltas += 1
+            if self.first_delta is None:
+                self.first_delta = time.perf_counter() - self.started
+        elif frame_type == 'message_end':
+            self.end = time.perf_counter() - self.started
+
+    async def close(self, code=1000):
+        pass
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def conversation(manager: ConnectionManager, handler: ChatWebSocketHandler, provider, index: int):
+    session_id = f"bench-{index}"
+    socket = TimedSocket()
+    await manager.connect(socket, f"user-{index}", session_id)
+    socket.started = time.perf_counter()
+    await handler._stream_ai_response(provider, "hello", [], f"user-{index}",
+                                      lambda message: manager.send_message(session_id, message))
+    # Let the writer task deliver the last frames
+    while socket.end is None:
+        await asyncio.sleep(0.001)
+    manager.disconnect(session_id)
+    return socket
+
+
+async def main(conversations: int, tokens: int, first_delay: float, delay: float):
+    manager = ConnectionManager()
+    handler = ChatWebSocketHandler(manager)
+    provider = FakeProvider(tokens, first_delay, delay)
+    sockets = await asyncio.gather(*(conversation(manager, handler, provider, i) for i in range(conversations)))
+
+    ttft = [socket.first_delta * 1000 for socket in sockets]
+    total = [socket.end * 1000 for socket in sockets]
+    frames = sum(socket.deltas for socket in sockets) / len(sockets)
+    print(f"{conversations} concurrent replies, {tokens} tokens "
+          f"({first_delay * 1000:.0f} ms to first token, {delay * 1000:.0f} ms apart)")
+    print(f"  time to first delta:  p50 {percentile(ttft, 0.5):8.1f} ms   p99 {percentile(ttft, 0.99):8.1f} ms")
+    print(f"  total (old wait):     p50 {percentile(total, 0.5):8.1f} ms   p99 {percentile(total, 0.99):8.1f} ms")
+    print(f"  message_delta frames: {frames:.1f} per reply for {tokens} deltas")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        (float(sys.argv[3]) if len(sys.argv) > 3 else 300) / 1000,
+        (float(sys.argv[4]) if len(sys.argv) > 4 else 20) / 1000
+    ))
@@ -0,0 +1,84 @@
+"""Inserts and lookups: the append-only TaskStore vs. rewriting tasks.json.
+
+Run from backend/:  python benchmarks/bench_task_store.py [records]
+The tasks.json approach rewrites the whole file on every insert, so it is
+timed on at most LEGACY_LIMIT records; its per-insert cost keeps growing
+with the file.
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_store import TaskStore  # noqa: E402
+
+LEGACY_LIMIT = 2000
+LOOKUPS = 100000
+
+
+def legacy_inserts(path: str, records: int) -> float:
+    """What tools.create_task used to do: read, append, rewrite with indent=2"""
+    started = time.perf_counter()
+    for i in range(records):
+        tasks = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                tasks = json.load(f)
+        tasks.append({'id': len(tasks) + 1, 'task': f'task {i}', 'priority': 'medium', 'completed': False})
+        with open(path, 'w') as f:
+            json.dump(tasks, f, indent=2)
+    return time.perf_counter() - started
+
+
+def legacy_lookups(path: str, lookups: int, records: int) -> float:
+    rng = random.Random(1)
+    started = time.perf_counter()
+    for _ in range(lookups):
+        with open(path, 'r') as f:
+            tasks = json.load(f)
+        task_id = rng.randint(1, records)
+        next(task for task in tasks if task['id'] == task_id)
+    return time.perf_counter() - started
+
+
+def main(records: int):
+    workdir = tempfile.mkdtemp()
+    store = TaskStore(os.path.join(workdir, 'tasks.jsonl'), legacy_path=None)
+
+    started = time.perf_counter()
+    for i in range(records):
+        store.create({'task': f'task {i}', 'priority': 'medium', 'completed': False})
+    insert_time = time.perf_counter() - started
+
+    rng = random.Random(1)
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        store.get(rng.randint(1, records))
+    lookup_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reopened = TaskStore(store.path, legacy_path=None)
+    reopened.get(1)
+    load_time = time.perf_counter() - started
+
+    legacy_records = min(records, LEGACY_LIMIT)
+    legacy_path = os.path.join(workdir, 'tasks.json')
+    legacy_insert_time = legacy_inserts(legacy_path, legacy_records)
+    legacy_lookup_count = max(LOOKUPS // 100, 1)
+    legacy_lookup_time = legacy_lookups(legacy_path, legacy_lookup_count, legacy_records)
+
+    print(f"append-only log, {records} records")
+    print(f"  inserts:   {records / insert_time:10.0f} /s")
+    print(f"  lookups:   {LOOKUPS / lookup_time:10.0f} /s")
+    print(f"  reload:    {load_time * 1000:10.1f} ms")
+    print(f"tasks.json rewrite, {legacy_records} records")
+    print(f"  inserts:   {legacy_records / legacy_insert_time:10.0f} /s")
+    print(f"  lookups:   {legacy_lookup_count / legacy_lookup_time:10.0f} /s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,52 @@
+"""Commits/second: one transaction per row vs. the write-behind queue.
+
+Run from backend/:  python benchmarks/bench_write_behind.py [writes]
+Uses a throwaway SQLite file in WAL mode, like the default deployment.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from database import async_session_scope, dispose_async_engine, init_db  # noqa: E402
+from models import Task  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+
+
+async def per_row(writes: int) -> float:
+    async def insert(i: int):
+        async with async_session_scope() as db:
+            db.add(Task(user_id='bench', title=f'row {i}'))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(insert(i) for i in range(writes)))
+    return time.perf_counter() - started
+
+
+async def write_behind(writes: int) -> tuple:
+    queue = WriteBehindQueue()
+    started = time.perf_counter()
+    await asyncio.gather(*(queue.add('tasks:bench', Task(user_id='bench', title=f'queued {i}')) for i in range(writes)))
+    elapsed = time.perf_counter() - started
+    await queue.stop()
+    return elapsed, queue.get_stats()
+
+
+async def main(writes: int):
+    init_db()
+    row_time = await per_row(writes)
+    queue_time, stats = await write_behind(writes)
+    await dispose_async_engine()
+
+    print(f"{writes} concurrent inserts")
+    print(f"  per-row commits: {writes / row_time:8.0f} writes/s  ({writes} transactions)")
+    print(f"  write-behind:    {writes / queue_time:8.0f} writes/s  ({stats['batches']} transactions, "
+          f"avg batch {stats['avg_batch_size']})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,136 @@
+"""Concurrent /api/chat streams against a local fake OpenAI SSE server.
+
+Run from backend/:  python benchmarks/load_chat_stream.py [streams] [tokens] [token_delay_ms]
+Starts a fake chat-completions endpoint that streams ``tokens`` deltas,
+``token_delay_ms`` apart, points the openai client at it, serves main.app
+with uvicorn and opens ``streams`` chats at once. A blocking generator
+would cap concurrency at Starlette's 40 threadpool workers; the async path
+should finish every stream in about one stream's duration, on a handful of
+threads.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAKE_PORT = 18901
+APP_PORT = 18902
+os.environ["OPENAI_API_KEY"] = "sk-load-test"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}/v1"
+# The connection pool limit guards production; lift it so it doesn't cap the streams under test
+os.environ["LLM_POOL_MAX_CONNECTIONS"] = "10000"
+
+import uvicorn  # noqa: E402
+
+from main import app  # noqa: E402
+
+# main.py logs every stream at INFO
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def _chunk(content: str) -> bytes:
+    payload = {
+        'id': 'chatcmpl-load',
+        'object': 'chat.completion.chunk',
+        'created': 0,
+        'model': 'gpt-3.5-turbo',
+        'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}]
+    }
+    return f"data: {json.dumps(payload)}\n\n".encode()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> bytes:
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.decode('latin-1').split("\r\n"):
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return await reader.readexactly(length)
+
+
+def fake_openai(tokens: int, delay: float):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await _read_request(reader)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n")
+            for i in range(tokens):
+                writer.write(_chunk(f"token{i} "))
+                await writer.drain()
+                await asyncio.sleep(delay)
+            writer.write(b"data: [DONE]\n\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def chat(index: int) -> float:
+    body = json.dumps({'messages': [{'role': 'user', 'content': f'hello {index}'}]}).encode()
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', APP_PORT)
+    writer.write(
+        b"POST /api/chat HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        b"Connection: close\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    if b"[DONE]" not in response or b"token0" not in response:
+        raise RuntimeError(f"stream {index} incomplete: {response[-200:]!r}")
+    return time.perf_counter() - started
+
+
+async def main(streams: int, tokens: int, delay: float):
+    fake = await asyncio.start_server(fake_openai(tokens, delay), '127.0.0.1', FAKE_PORT, backlog=streams)
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=APP_PORT, log_level='warning',
+                                           backlog=streams))
+    serving = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    peak_threads = threading.active_count()
+
+    async def watch_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    watcher = asyncio.ensure_future(watch_threads())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(chat(i) for i in range(streams)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    watcher.cancel()
+
+    server.should_exit = True
+    await serving
+    fake.close()
+    await fake.wait_closed()
+
+    durations = sorted(result for result in results if isinstance(result, float))
+    failures = [result for result in results if not isinstance(result, float)]
+    one_stream = tokens * delay
+    print(f"{streams} concurrent streams, {tokens} tokens each ({one_stream:.1f}s per stream upstream)")
+    print(f"  completed:    {len(durations)} ({len(failures)} failed)")
+    print(f"  wall time:    {elapsed:.2f}s")
+    if durations:
+        print(f"  p50 / max:    {durations[len(durations) // 2]:.2f}s / {durations[-1]:.2f}s")
+    print(f"  peak threads: {peak_threads}")
+    if failures:
+        print(f"  first failure: {failures[0]!r}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        (float(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+    ))
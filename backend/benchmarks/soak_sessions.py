@@ -0,0 +1,49 @@
+"""Soak test: connection counts stay flat over many session_scope operations.
+
+Run from backend/:  python benchmarks/soak_sessions.py [operations] [threads]
+Mixes reads and writes (one in five) from a thread pool against a throwaway
+SQLite file, printing pool counters every tenth of the run.
+"""
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'soak.db')}"
+
+from sqlalchemy import func, select  # noqa: E402
+
+from database import engine, init_db, pool_stats, session_scope  # noqa: E402
+from models import Task  # noqa: E402
+
+
+def operation(i: int):
+    with session_scope() as db:
+        if i % 5:
+            db.execute(select(func.count()).select_from(Task)).scalar()
+        else:
+            db.add(Task(user_id='soak', title=f'op {i}'))
+
+
+def main(operations: int, threads: int):
+    init_db()
+    checkpoint = max(operations // 10, 1)
+    started = time.perf_counter()
+    print(f"{'ops':>8} {'checked out':>12} {'peak':>6} {'opened':>8}  pool")
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for done in range(0, operations, checkpoint):
+            list(pool.map(operation, range(done, min(done + checkpoint, operations))))
+            stats = pool_stats.to_dict()
+            print(f"{min(done + checkpoint, operations):>8} {stats['checked_out']:>12} "
+                  f"{stats['peak_checked_out']:>6} {stats['connects']:>8}  {engine.pool.status()}")
+    elapsed = time.perf_counter() - started
+    print(f"{operations / elapsed:.0f} operations/s with {threads} threads")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    )
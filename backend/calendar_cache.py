@@ -0,0 +1,276 @@
+"""Local event cache for Google Calendar, kept fresh with incremental sync"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from googleapiclient.errors import HttpError
+
+from interval_index import IntervalIndex
+
+logger = logging.getLogger(__name__)
+
+# Older snapshots are still served, but trigger a background sync
+MAX_STALENESS = float(os.getenv("CALENDAR_CACHE_MAX_STALENESS", "60"))
+# Full syncs cover [now - SYNC_PAST_DAYS, now + SYNC_FUTURE_DAYS]; reads outside it go to Google
+SYNC_PAST_DAYS = int(os.getenv("CALENDAR_SYNC_PAST_DAYS", "1"))
+SYNC_FUTURE_DAYS = int(os.getenv("CALENDAR_SYNC_FUTURE_DAYS", "90"))
+# Re-run the full sync once the window's end has fallen this far behind now + SYNC_FUTURE_DAYS
+WINDOW_SLACK = timedelta(days=1)
+SYNC_PAGE_SIZE = 2500
+
+
+def _parse_event_time(value: Dict[str, str]) -> tuple:
+    """Return (naive UTC datetime, wall-clock datetime, all_day) for a start/end field"""
+    if 'dateTime' in value:
+        wall = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        if wall.tzinfo is not None:
+            # Naive times are treated as UTC throughout the calendar tools
+            return wall.astimezone(timezone.utc).replace(tzinfo=None), wall, False
+        return wall, wall, False
+    day = datetime.fromisoformat(value['date'])
+    return day, day, True
+
+
+def normalize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a Google Calendar event into the fields the tools use"""
+    start, local_start, all_day = _parse_event_time(event['start'])
+    end, _, _ = _parse_event_time(event['end'])
+    return {
+        'id': event['id'],
+        'summary': event.get('summary', 'Untitled Event'),
+        'start': start,
+        'end': end,
+        'local_start': local_start,
+        'all_day': all_day,
+        'location': event.get('location', ''),
+        'attendees': [att.get('email') for att in event.get('attendees', [])],
+        'link': event.get('htmlLink', '')
+    }
+
+
+class _CalendarState:
+    def __init__(self):
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._index: Optional[IntervalIndex] = None
+        self.sync_token: Optional[str] = None
+        self.window: Optional[Tuple[datetime, datetime]] = None
+        self.synced_at = 0.0
+        self.refresher: Optional[threading.Thread] = None
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.lock = threading.Lock()
+
+    @property
+    def events(self) -> Dict[str, Dict[str, Any]]:
+        return self._events
+
+    @events.setter
+    def events(self, events: Dict[str, Dict[str, Any]]):
+        # Snapshots are replaced wholesale, so the index is rebuilt lazily on next read
+        self._events = events
+        self._index = None
+
+    @property
+    def index(self) -> IntervalIndex:
+        index = self._index
+        if index is None:
+            index = self._index = IntervalIndex(self._events.values())
+        return index
+
+
+class CalendarEventCache:
+    """In-memory copy of each calendar, refreshed with Calendar API sync tokens.
+
+    A full sync pulls the events in a bounded window around now; later
+    syncs fetch only what changed since the previous ``nextSyncToken``
+    (changes outside the window are ignored). The full sync is repeated
+    once the window has rolled forward by WINDOW_SLACK. Only the first
+    sync and forced refreshes run on the caller's thread; a stale snapshot
+    is served while a background thread catches it up. Events booked
+    through the tools are written through immediately.
+    """
+
+    def __init__(self, max_staleness: float = MAX_STALENESS, past_days: int = SYNC_PAST_DAYS,
+                 future_days: int = SYNC_FUTURE_DAYS):
+        self.max_staleness = max_staleness
+        self.past_days = past_days
+        self.future_days = future_days
+        self._calendars: Dict[str, _CalendarState] = {}
+        self._lock = threading.Lock()
+        self.local_reads = 0
+
+    def _state(self, calendar_id: str) -> _CalendarState:
+        with self._lock:
+            state = self._calendars.get(calendar_id)
+            if state is None:
+                state = self._calendars[calendar_id] = _CalendarState()
+            return state
+
+    def ensure_fresh(self, service, calendar_id: str = 'primary', force: bool = False):
+        """Sync inline if there is no snapshot yet or ``force`` is set; otherwise
+        start a background sync when the snapshot is older than ``max_staleness``"""
+        state = self._state(calendar_id)
+        if force or state.sync_token is None:
+            with state.lock:
+                # Another thread may have synced while we waited for the lock
+                if force or state.sync_token is None:
+                    self._sync(service, calendar_id, state)
+            return
+        if self._is_stale(state):
+            self._refresh_in_background(service, calendar_id, state)
+
+    def _is_stale(self, state: _CalendarState) -> bool:
+        return time.monotonic() - state.synced_at > self.max_staleness
+
+    def _refresh_in_background(self, service, calendar_id: str, state: _CalendarState):
+        with self._lock:
+            if state.refresher is not None and state.refresher.is_alive():
+                return
+            state.refresher = threading.Thread(
+                target=self._background_sync, args=(service, calendar_id, state),
+                name=f"calendar-sync-{calendar_id}", daemon=True
+            )
+        state.refresher.start()
+
+    def _background_sync(self, service, calendar_id: str, state: _CalendarState):
+        try:
+            with state.lock:
+                if self._is_stale(state):
+                    self._sync(service, calendar_id, state)
+        except Exception as e:
+            # Keep serving the old snapshot; the next stale read tries again
+            logger.warning(f"Background sync of calendar {calendar_id} failed: {e}")
+
+    def _window_expired(self, state: _CalendarState) -> bool:
+        wanted_end = datetime.utcnow() + timedelta(days=self.future_days)
+        return state.window is None or wanted_end - state.window[1] > WINDOW_SLACK
+
+    def _sync(self, service, calendar_id: str, state: _CalendarState):
+        incremental = state.sync_token is not None and not self._window_expired(state)
+        try:
+            changed = self._fetch(service, calendar_id, state, incremental)
+        except HttpError as e:
+            if incremental and getattr(e, 'resp', None) is not None and e.resp.status == 410:
+                # Sync token expired: start over with a full sync
+                logger.info(f"Calendar sync token for {calendar_id} expired, running full sync")
+                state.sync_token = None
+                incremental = False
+                changed = self._fetch(service, calendar_id, state, incremental)
+            else:
+                raise
+
+        if incremental:
+            state.incremental_syncs += 1
+        else:
+            state.full_syncs += 1
+        state.synced_at = time.monotonic()
+        logger.debug(f"Calendar {calendar_id} synced ({'incremental' if incremental else 'full'}, {changed} changes)")
+
+    def _fetch(self, service, calendar_id: str, state: _CalendarState, incremental: bool) -> int:
+        if incremental:
+            events = dict(state.events)
+            window = state.window
+        else:
+            events = {}
+            now = datetime.utcnow()
+            window = (now - timedelta(days=self.past_days), now + timedelta(days=self.future_days))
+        changed = 0
+        page_token = None
+        while True:
+            params = {
+                'calendarId': calendar_id,
+                'singleEvents': True,
+                'maxResults': SYNC_PAGE_SIZE,
+            }
+            if incremental:
+                # The API rejects timeMin/timeMax alongside a sync token
+                params['syncToken'] = state.sync_token
+            else:
+                params['timeMin'] = window[0].isoformat() + 'Z'
+                params['timeMax'] = window[1].isoformat() + 'Z'
+            if page_token:
+                params['pageToken'] = page_token
+
+            result = service.events().list(**params).execute()
+            for item in result.get('items', []):
+                changed += 1
+                if item.get('status') == 'cancelled':
+                    events.pop(item['id'], None)
+                    continue
+                try:
+                    event = normalize_event(item)
+                except (KeyError, ValueError) as e:
+                    logger.warning(f"Skipping calendar event {item.get('id')}: {e}")
+                    continue
+                if event['end'] <= window[0] or event['start'] >= window[1]:
+                    events.pop(item['id'], None)
+                else:
+                    events[item['id']] = event
+
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                state.sync_token = result.get('nextSyncToken')
+                break
+
+        # Swap in the new snapshot so readers never see a half-applied sync
+        state.events = events
+        state.window = window
+        return changed
+
+    def covers(self, start: datetime, end: datetime, calendar_id: str = 'primary') -> bool:
+        """Whether [start, end) lies inside the synced window"""
+        window = self._state(calendar_id).window
+        return window is not None and window[0] <= start and end <= window[1]
+
+    def upsert(self, event: Dict[str, Any], calendar_id: str = 'primary'):
+        """Write-through for events created locally"""
+        state = self._state(calendar_id)
+        with state.lock:
+            events = dict(state.events)
+            events[event['id']] = normalize_event(event)
+            state.events = events
+
+    def events_between(self, start: datetime, end: datetime, calendar_id: str = 'primary') -> List[Dict[str, Any]]:
+        """Events overlapping [start, end), ordered by start time"""
+        self.local_reads += 1
+        return self._state(calendar_id).index.overlapping(start, end)
+
+    def has_conflict(self, start: datetime, end: datetime, calendar_id: str = 'primary') -> bool:
+        self.local_reads += 1
+        return self._state(calendar_id).index.overlaps(start, end)
+
+    def free_slots(
+        self,
+        after: datetime,
+        duration: timedelta,
+        count: int = 3,
+        calendar_id: str = 'primary',
+        **working_hours
+    ) -> List[Tuple[datetime, datetime]]:
+        """Next free slots of ``duration``; see IntervalIndex.free_slots for options"""
+        self.local_reads += 1
+        return self._state(calendar_id).index.free_slots(after, duration, count, **working_hours)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calendars = dict(self._calendars)
+        now = time.monotonic()
+        return {
+            'local_reads': self.local_reads,
+            'calendars': {
+                calendar_id: {
+                    'events': len(state.events),
+                    'full_syncs': state.full_syncs,
+                    'incremental_syncs': state.incremental_syncs,
+                    'window': [bound.isoformat() for bound in state.window] if state.window else None,
+                    'age_seconds': round(now - state.synced_at, 1) if state.synced_at else None
+                }
+                for calendar_id, state in calendars.items()
+            }
+        }
+
+
+# Global calendar event cache
+calendar_event_cache = CalendarEventCache()
@@ -16,6 +16,11 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = Field("sqlite:///./aether.db", env="DATABASE_URL")
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    sqlite_busy_timeout_ms: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
     
     # Redis
     redis_url: str = Field("redis://localhost:6379", env="REDIS_URL")
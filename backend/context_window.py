@@ -0,0 +1,229 @@
+"""Token-budgeted conversation context for AI prompts"""
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Whole-prompt budget: system prompt, history and the new message
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# A single history message longer than this is cut down (e.g. a pasted document)
+CONTEXT_MAX_MESSAGE_TOKENS = int(os.getenv("CONTEXT_MAX_MESSAGE_TOKENS", "400"))
+# Room kept for the summary of turns that no longer fit
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "200"))
+TOKEN_CACHE_SIZE = int(os.getenv("CONTEXT_TOKEN_CACHE_SIZE", "4096"))
+
+# What the prompt used to include, kept to report the savings against
+BASELINE_MESSAGES = 10
+# Chat-format framing around each message (role, separators)
+MESSAGE_OVERHEAD = 4
+SUMMARY_LINE_TOKENS = 25
+TRUNCATION_MARKER = " [...]"
+ENCODING_NAME = "cl100k_base"
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when installed, else ~4 characters per token.
+
+    Counts are cached by content hash, so history resent with every
+    request is only tokenized once.
+    """
+
+    def __init__(self, cache_size: int = TOKEN_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoding = None
+        self._encoding_loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def encoding(self):
+        if not self._encoding_loaded:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception:
+                logger.info("tiktoken not available, estimating token counts")
+            self._encoding_loaded = True
+        return self._encoding
+
+    def _count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return (len(text) + 3) // 4
+
+    def count(self, text: str) -> int:
+        key = hashlib.blake2b(text.encode('utf-8', 'replace'), digest_size=16).digest()
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+
+        tokens = self._count(text)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """``text`` cut to at most ``max_tokens``, marker included"""
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max(max_tokens - self.count(TRUNCATION_MARKER), 0)
+        if self.encoding is not None:
+            head = self.encoding.decode(self.encoding.encode(text)[:keep])
+        else:
+            head = text[:keep * 4]
+        return head.rstrip() + TRUNCATION_MARKER
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'tokenizer': ENCODING_NAME if self.encoding is not None else 'estimate',
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+class PromptWindow:
+    """History picked for one prompt, and what it cost"""
+
+    def __init__(self, messages: List[Dict[str, str]], tokens: int, baseline_tokens: int,
+                 included: int, truncated: int, summarized: int):
+        self.messages = messages
+        self.tokens = tokens
+        self.baseline_tokens = baseline_tokens
+        self.included = included
+        self.truncated = truncated
+        self.summarized = summarized
+
+    @property
+    def tokens_saved(self) -> int:
+        """Prompt tokens saved against sending the last 10 messages verbatim (negative if more history fit)"""
+        return self.baseline_tokens - self.tokens
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'prompt_tokens': self.tokens,
+            'baseline_tokens': self.baseline_tokens,
+            'tokens_saved': self.tokens_saved,
+            'history_messages': self.included,
+            'truncated_messages': self.truncated,
+            'summarized_messages': self.summarized
+        }
+
+
+class ContextAssembler:
+    """Packs the most recent turns into a token budget.
+
+    Newest messages go in first, each capped at ``max_message_tokens``,
+    until the budget runs out. Older turns that don't fit are folded into
+    one short extractive summary (the opening of each turn), so the model
+    still knows what was discussed. Short chats get their whole history
+    rather than a fixed number of messages.
+    """
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        budget: int = CONTEXT_TOKEN_BUDGET,
+        max_message_tokens: int = CONTEXT_MAX_MESSAGE_TOKENS,
+        summary_tokens: int = CONTEXT_SUMMARY_TOKENS
+    ):
+        self.counter = counter or TokenCounter()
+        self.budget = budget
+        self.max_message_tokens = max_message_tokens
+        self.summary_tokens = summary_tokens
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.tokens_saved = 0
+
+    def _message_tokens(self, content: str) -> int:
+        return self.counter.count(content) + MESSAGE_OVERHEAD
+
+    def assemble(self, system_prompt: str, message: str, context: Optional[List[Dict]] = None) -> PromptWindow:
+        """Chat messages for a prompt: system prompt, fitted history, then ``message``"""
+        context = context or []
+        fixed = self._message_tokens(system_prompt) + self._message_tokens(message)
+        baseline = fixed + sum(self._message_tokens(msg.get('content', '')) for msg in context[-BASELINE_MESSAGES:])
+
+        remaining = self.budget - fixed
+        history: List[Dict[str, str]] = []
+        truncated = 0
+        cut = len(context)
+        for index in range(len(context) - 1, -1, -1):
+            msg = context[index]
+            content = msg.get('content', '')
+            too_long = self.counter.count(content) > self.max_message_tokens
+            if too_long:
+                content = self.counter.truncate(content, self.max_message_tokens)
+            # Keep room for the summary if anything older is left out
+            reserve = self.summary_tokens if index > 0 else 0
+            tokens = self._message_tokens(content)
+            if tokens > remaining - reserve:
+                break
+            truncated += too_long
+            history.append({"role": "user" if msg.get('is_user') else "assistant", "content": content})
+            remaining -= tokens
+            cut = index
+        history.reverse()
+
+        messages = [{"role": "system", "content": system_prompt}]
+        summary, summarized = self._summarize(context[:cut], min(self.summary_tokens, remaining))
+        if summary:
+            messages.append({"role": "system", "content": summary})
+            remaining -= self._message_tokens(summary)
+        messages.extend(history)
+        messages.append({"role": "user", "content": message})
+
+        window = PromptWindow(messages, self.budget - remaining, baseline, len(history), truncated, summarized)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += window.tokens
+            self.tokens_saved += window.tokens_saved
+        return window
+
+    def _summarize(self, older: List[Dict], budget: int) -> Tuple[Optional[str], int]:
+        """One line per older turn, newest kept first when space runs out;
+        returns the summary and how many turns it covers"""
+        if not older or budget <= MESSAGE_OVERHEAD:
+            return None, 0
+        header = "Summary of earlier conversation:"
+        remaining = budget - MESSAGE_OVERHEAD - self.counter.count(header)
+        lines = []
+        for msg in reversed(older):
+            speaker = "User" if msg.get('is_user') else "Assistant"
+            opening = " ".join(msg.get('content', '').split())
+            line = f"- {speaker}: {self.counter.truncate(opening, SUMMARY_LINE_TOKENS)}"
+            tokens = self.counter.count(line) + 1
+            if tokens > remaining:
+                break
+            lines.append(line)
+            remaining -= tokens
+        if not lines:
+            return None, 0
+        lines.reverse()
+        return "\n".join([header] + lines), len(lines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'budget': self.budget,
+            'requests': self.requests,
+            'avg_prompt_tokens': round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+            'tokens_saved': self.tokens_saved,
+            'counter': self.counter.get_stats()
+        }
+
+
+# Global context assembler instance
+context_assembler = ContextAssembler()
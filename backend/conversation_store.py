@@ -0,0 +1,193 @@
+"""Server-side chat history: in-memory ring buffers with write-behind persistence"""
+import os
+import json
+import uuid
+import asyncio
+import logging
+from functools import partial
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import select
+
+from database import async_session_scope
+from models import ChatSession, Message
+from write_behind import WriteBehindQueue, write_queue
+
+logger = logging.getLogger(__name__)
+
+# Messages kept in memory (and loaded back on reconnect) per session
+CONVERSATION_BUFFER_SIZE = int(os.getenv("CONVERSATION_BUFFER_SIZE", "50"))
+# Sessions kept in memory; the least recently used are dropped and reloaded on demand
+CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+
+
+class _Conversation:
+    __slots__ = ('messages', 'loaded', 'lock')
+
+    def __init__(self, capacity: int):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+
+class ConversationStore:
+    """Recent messages per chat session, persisted to the messages table in batches.
+
+    ``append`` only touches memory; the write queue inserts new messages
+    (and the session's ChatSession row, the first time) in batched
+    transactions. ``history`` serves hot sessions from memory and loads
+    the last ``capacity`` messages from the database the first time a
+    session is seen by this process, e.g. after a reconnect.
+    """
+
+    def __init__(
+        self,
+        capacity: int = CONVERSATION_BUFFER_SIZE,
+        max_sessions: int = CONVERSATION_MAX_SESSIONS,
+        writes: WriteBehindQueue = write_queue
+    ):
+        self.capacity = capacity
+        self.max_sessions = max_sessions
+        self.writes = writes
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._known_sessions = set()
+        self._evictions: Set[asyncio.Task] = set()
+        self.loads = 0
+        self.evicted = 0
+
+    def _conversation(self, session_id: str) -> _Conversation:
+        conversation = self._conversations.get(session_id)
+        if conversation is None:
+            conversation = self._conversations[session_id] = _Conversation(self.capacity)
+            if len(self._conversations) > self.max_sessions:
+                evicted, _ = self._conversations.popitem(last=False)
+                self._flush_evicted(evicted)
+        else:
+            self._conversations.move_to_end(session_id)
+        return conversation
+
+    def _flush_evicted(self, session_id: str):
+        """Commit a dropped session's queued messages now rather than with some later batch"""
+        self.evicted += 1
+        task = asyncio.ensure_future(self.writes.flush_for(_key(session_id)))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+    async def close_session(self, session_id: str):
+        """Commit the session's queued messages (call when its socket closes)"""
+        await self.writes.flush_for(_key(session_id))
+
+    async def history(self, session_id: str) -> List[Dict[str, Any]]:
+        """Recent messages for a session, oldest first"""
+        conversation = self._conversation(session_id)
+        if not conversation.loaded:
+            async with conversation.lock:
+                if not conversation.loaded:
+                    await self._load(session_id, conversation)
+        return list(conversation.messages)
+
+    async def _load(self, session_id: str, conversation: _Conversation):
+        try:
+            await self.writes.flush_for(_key(session_id))
+            async with async_session_scope() as db:
+                result = await db.execute(
+                    select(Message)
+                    .where(Message.session_id == session_id)
+                    .order_by(Message.timestamp.desc())
+                    .limit(self.capacity)
+                )
+                rows = list(result.scalars())
+        except Exception as e:
+            # Serve what's in memory; the next call tries again
+            logger.error(f"Failed to load history for session {session_id}: {e}")
+            return
+
+        self.loads += 1
+        if rows:
+            self._known_sessions.add(session_id)
+        older = [_message_dict(row) for row in reversed(rows)]
+        buffered = list(conversation.messages)
+        seen = {message['id'] for message in buffered}
+        merged = []
+        for message in older:
+            if message['id'] not in seen:
+                seen.add(message['id'])
+                merged.append(message)
+        conversation.messages = deque(merged + buffered, maxlen=self.capacity)
+        conversation.loaded = True
+
+    def append(
+        self,
+        session_id: str,
+        user_id: Optional[str],
+        content: str,
+        is_user: bool,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Record a message; it is written to the database in the background"""
+        created_at = datetime.utcnow()
+        message = {
+            'id': str(uuid.uuid4()),
+            'content': content,
+            'is_user': is_user,
+            'timestamp': created_at.isoformat(),
+            'metadata': metadata or {}
+        }
+        self._conversation(session_id).messages.append(message)
+
+        if session_id not in self._known_sessions:
+            self._known_sessions.add(session_id)
+            created = self.writes.execute(_key(session_id), partial(_ensure_session, session_id, user_id))
+            created.add_done_callback(partial(self._session_written, session_id))
+        self.writes.add(_key(session_id), Message(
+            id=message['id'],
+            session_id=session_id,
+            content=content,
+            is_user=is_user,
+            timestamp=created_at,
+            message_metadata=json.dumps(metadata) if metadata else None
+        ))
+        return message
+
+    def _session_written(self, session_id: str, future: asyncio.Future):
+        # Check again next time if the row couldn't be written
+        if future.cancelled() or future.exception() is not None:
+            self._known_sessions.discard(session_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'sessions_in_memory': len(self._conversations),
+            'loads': self.loads,
+            'evicted': self.evicted
+        }
+
+
+def _key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+async def _ensure_session(session_id: str, user_id: Optional[str], db):
+    if await db.get(ChatSession, session_id) is None:
+        db.add(ChatSession(id=session_id, user_id=user_id))
+        # Insert it ahead of the messages that reference it
+        await db.flush()
+
+
+def _message_dict(row: Message) -> Dict[str, Any]:
+    try:
+        metadata = json.loads(row.message_metadata) if row.message_metadata else {}
+    except ValueError:
+        metadata = {}
+    return {
+        'id': row.id,
+        'content': row.content or '',
+        'is_user': bool(row.is_user),
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+        'metadata': metadata
+    }
+
+
+# Global conversation store instance
+conversation_store = ConversationStore()
@@ -1,19 +1,158 @@
 """Database configuration and session management"""
-from sqlalchemy import create_engine
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import QueuePool
 from config import settings
 import redis
-from typing import Generator
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Generator, Iterator
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+_is_sqlite = settings.database_url.startswith("sqlite")
+_is_sqlite_memory = _is_sqlite and (":memory:" in settings.database_url or settings.database_url.rstrip("/") == "sqlite:")
+
+
+def _engine_kwargs() -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    if _is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory:
+            # Every connection to :memory: is a separate database; keep the default pool
+            return kwargs
+        # File databases get a real bounded pool instead of one connection per checkout
+        kwargs["poolclass"] = QueuePool
+    else:
+        kwargs["pool_recycle"] = settings.db_pool_recycle
+    kwargs.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout
+    )
+    return kwargs
+
 
 # SQLAlchemy setup
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+engine = create_engine(settings.database_url, **_engine_kwargs())
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class PoolStats:
+    """Connection pool counters, updated from pool events"""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+    def on_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out -= 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out
+            }
+
+
+pool_stats = PoolStats()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    pool_stats.on_connect()
+    if _is_sqlite and not _is_sqlite_memory:
+        # WAL lets readers run alongside the single writer; NORMAL sync is safe under WAL
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-20000")
+        cursor.close()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.on_checkout()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    pool_stats.on_checkin()
+
+
+def _instrument(target):
+    event.listen(target, "connect", _on_connect)
+    event.listen(target, "checkout", _on_checkout)
+    event.listen(target, "checkin", _on_checkin)
+
+
+_instrument(engine)
+
+
+def async_database_url(url: str) -> str:
+    """Map the configured URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    scheme, _, rest = url.partition("://")
+    driver = {
+        "sqlite": "sqlite+aiosqlite",
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+    }.get(scheme, scheme)
+    return f"{driver}://{rest}"
+
+
+_async_engine = None
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+
+def get_async_engine():
+    """Async engine over the same database, created on first use so the
+    async driver is only required by code paths that need it"""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        with _async_lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+                kwargs = _engine_kwargs()
+                # The async engine picks its own pool class; pysqlite's thread check doesn't apply
+                kwargs.pop("poolclass", None)
+                kwargs.pop("connect_args", None)
+                async_engine = create_async_engine(async_database_url(settings.database_url), **kwargs)
+                _instrument(async_engine.sync_engine)
+                _async_sessionmaker = async_sessionmaker(
+                    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+                )
+                _async_engine = async_engine
+    return _async_engine
+
+
 # Redis setup
 try:
     redis_client = redis.from_url(settings.redis_url, decode_responses=True)
@@ -23,13 +162,53 @@ except Exception as e:
     redis_client = None
 
 def get_db() -> Generator[Session, None, None]:
-    """Get database session"""
+    """Get database session (FastAPI dependency)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Unit of work: commit on success, roll back on error, always return the connection"""
     db = SessionLocal()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator["AsyncSession"]:
+    """Async unit of work, for code running on the event loop"""
+    get_async_engine()
+    db = _async_sessionmaker()
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+async def dispose_async_engine():
+    """Close pooled async connections (call on shutdown)"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool checkout metrics plus the pool's own status line"""
+    stats = pool_stats.to_dict()
+    stats['pool'] = engine.pool.status()
+    if _async_engine is not None:
+        stats['async_pool'] = _async_engine.pool.status()
+    return stats
+
 def get_redis():
     """Get Redis client"""
     return redis_client
@@ -37,4 +216,4 @@ def get_redis():
 def init_db():
     """Initialize database tables"""
     from models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
@@ -1,6 +1,8 @@
 """Enhanced tools with better error handling and features"""
 import os
 import json
+import uuid
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -8,13 +10,21 @@ from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from sqlalchemy.orm import Session
-from models import Task, CalendarEvent, User
-from database import get_db
+from sqlalchemy import and_, or_, select
+from models import Task, CalendarEvent
+from database import async_session_scope, session_scope
+from task_store import task_store
+from calendar_cache import calendar_event_cache, normalize_event
+from interval_index import FREE_SLOT_HORIZON_DAYS, IntervalIndex
+from tool_executor import tool_executor
+from write_behind import write_queue
 import re
 
 logger = logging.getLogger(__name__)
 
+# How long create_task_async waits for its batched insert to commit
+TASK_WRITE_TIMEOUT = float(os.getenv("TASK_WRITE_TIMEOUT", "5"))
+
 SCOPES = [
     'https://www.googleapis.com/auth/calendar',
     'https://www.googleapis.com/auth/calendar.events'
@@ -59,6 +69,7 @@ class CalendarService:
 class EnhancedCalendarTools:
     def __init__(self):
         self.calendar_service = CalendarService()
+        self.event_cache = calendar_event_cache
     
     def parse_datetime_natural(self, text: str) -> tuple[datetime, datetime]:
         """Parse natural language datetime with better accuracy"""
@@ -131,13 +142,37 @@ class EnhancedCalendarTools:
     
     def book_meeting(self, input_str: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Enhanced meeting booking with better parsing and validation"""
+        result, created_event = self._book(input_str)
+        
+        # Save to database
+        if created_event and user_id:
+            self._save_event_to_db(created_event, user_id)
+        return result
+    
+    async def book_meeting_async(self, input_str: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """book_meeting for the event loop.
+        
+        The Calendar API client is blocking, so the booking itself runs in
+        the tool pool; the database write goes through the async engine.
+        """
+        try:
+            result, created_event = await tool_executor.run('calendar', self._book, input_str)
+        except TimeoutError:
+            return self._timeout_result('book meeting')
+        
+        if created_event and user_id:
+            await self._save_event_to_db_async(created_event, user_id)
+        return result
+    
+    def _book(self, input_str: str) -> tuple[Dict[str, Any], Optional[Dict]]:
+        """Book the meeting, returning the result and the created Google event"""
         try:
             if not self.calendar_service.is_available():
                 return {
                     'success': False,
                     'message': '❌ Google Calendar is not configured. Please set up credentials.json',
                     'error_type': 'configuration'
-                }
+                }, None
             
             # Parse input
             parts = input_str.split('|') if '|' in input_str else [input_str]
@@ -159,7 +194,7 @@ class EnhancedCalendarTools:
                         'success': False,
                         'message': '❌ Invalid time format. Use ISO format: YYYY-MM-DDTHH:MM:SS',
                         'error_type': 'validation'
-                    }
+                    }, None
             else:
                 # Natural language parsing
                 start_dt, end_dt = self.parse_datetime_natural(input_str)
@@ -182,17 +217,26 @@ class EnhancedCalendarTools:
                     'success': False,
                     'message': '❌ Cannot schedule meetings in the past. Please choose a future time.',
                     'error_type': 'validation'
-                }
+                }, None
             
             # Check for conflicts
             conflicts = self._check_conflicts(start_dt, end_dt)
             if conflicts:
+                suggestions = self._suggest_slots(title, start_dt, end_dt, emails)
+                if suggestions:
+                    alternatives = ', '.join(
+                        datetime.fromisoformat(slot['start_time']).strftime('%a %I:%M %p') for slot in suggestions
+                    )
+                    next_step = f'Free slots: {alternatives}.'
+                else:
+                    next_step = 'Please choose a different time.'
                 return {
                     'success': False,
-                    'message': f'⚠️ Time conflict detected with: {conflicts[0]["summary"]}. Please choose a different time.',
+                    'message': f'⚠️ Time conflict detected with: {conflicts[0]["summary"]}. {next_step}',
                     'error_type': 'conflict',
-                    'conflicts': conflicts
-                }
+                    'conflicts': conflicts,
+                    'suggestions': suggestions
+                }, None
             
             # Create event
             attendees = [{'email': email} for email in emails if email]
@@ -223,9 +267,8 @@ class EnhancedCalendarTools:
                 body=event
             ).execute()
             
-            # Save to database
-            if user_id:
-                self._save_event_to_db(created_event, user_id)
+            # Keep the local cache current without waiting for the next sync
+            self.event_cache.upsert(created_event)
             
             attendee_info = f" with {', '.join(emails)}" if emails else ""
             
@@ -240,7 +283,7 @@ class EnhancedCalendarTools:
                     'attendees': emails,
                     'link': created_event.get('htmlLink')
                 }
-            }
+            }, created_event
             
         except Exception as e:
             logger.error(f"Error booking meeting: {e}")
@@ -248,7 +291,7 @@ class EnhancedCalendarTools:
                 'success': False,
                 'message': f'❌ Failed to book meeting: {str(e)}',
                 'error_type': 'system'
-            }
+            }, None
     
     def _check_conflicts(self, start_dt: datetime, end_dt: datetime) -> List[Dict]:
         """Check for calendar conflicts"""
@@ -256,56 +299,95 @@ class EnhancedCalendarTools:
             if not self.calendar_service.is_available():
                 return []
             
-            events_result = self.calendar_service.service.events().list(
-                calendarId='primary',
-                timeMin=start_dt.isoformat() + 'Z',
-                timeMax=end_dt.isoformat() + 'Z',
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            conflicts = []
-            
-            for event in events:
-                event_start = event['start'].get('dateTime', event['start'].get('date'))
-                event_end = event['end'].get('dateTime', event['end'].get('date'))
-                
-                conflicts.append({
-                    'summary': event.get('summary', 'Untitled Event'),
-                    'start': event_start,
-                    'end': event_end
-                })
-            
-            return conflicts
+            return [
+                {
+                    'summary': event['summary'],
+                    'start': event['start'].isoformat(),
+                    'end': event['end'].isoformat()
+                }
+                for event in self._events_between(start_dt, end_dt)
+            ]
             
         except Exception as e:
             logger.error(f"Error checking conflicts: {e}")
             return []
     
+    def find_free_slots(self, duration: timedelta, after: Optional[datetime] = None, count: int = 3) -> List[tuple]:
+        """Next free (start, end) slots of the given duration within working hours"""
+        after = after or datetime.now()
+        self.event_cache.ensure_fresh(self.calendar_service.service)
+        horizon_end = after + timedelta(days=FREE_SLOT_HORIZON_DAYS)
+        if self.event_cache.covers(after, horizon_end):
+            return self.event_cache.free_slots(after, duration, count)
+        # Past the synced window: search the events Google returns for the horizon
+        return IntervalIndex(self._events_between(after, horizon_end)).free_slots(after, duration, count)
+    
+    def _suggest_slots(self, title: str, start_dt: datetime, end_dt: datetime, emails: List[str]) -> List[Dict]:
+        """Alternative slots after a conflict, each ready to pass back to book_meeting"""
+        try:
+            slots = self.find_free_slots(end_dt - start_dt, after=start_dt)
+        except Exception as e:
+            logger.error(f"Error finding free slots: {e}")
+            return []
+        
+        return [
+            {
+                'start_time': slot_start.isoformat(),
+                'end_time': slot_end.isoformat(),
+                'input': f"{title} | {slot_start.isoformat()} | {slot_end.isoformat()} | {','.join(emails)}"
+            }
+            for slot_start, slot_end in slots
+        ]
+    
+    def _events_between(self, start_dt: datetime, end_dt: datetime, force_refresh: bool = False) -> List[Dict]:
+        """Events overlapping the window, served from the local cache when possible"""
+        service = self.calendar_service.service
+        try:
+            self.event_cache.ensure_fresh(service, force=force_refresh)
+            if self.event_cache.covers(start_dt, end_dt):
+                return self.event_cache.events_between(start_dt, end_dt)
+        except Exception as e:
+            logger.warning(f"Calendar cache sync failed, querying Google directly: {e}")
+        
+        events_result = service.events().list(
+            calendarId='primary',
+            timeMin=start_dt.isoformat() + 'Z',
+            timeMax=end_dt.isoformat() + 'Z',
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute()
+        return [normalize_event(event) for event in events_result.get('items', [])]
+    
+    def _calendar_event_row(self, event: Dict, user_id: str) -> CalendarEvent:
+        return CalendarEvent(
+            google_event_id=event['id'],
+            user_id=user_id,
+            title=event.get('summary', ''),
+            description=event.get('description', ''),
+            start_time=datetime.fromisoformat(event['start']['dateTime'].replace('Z', '')),
+            end_time=datetime.fromisoformat(event['end']['dateTime'].replace('Z', '')),
+            attendees=json.dumps([att.get('email') for att in event.get('attendees', [])]),
+            location=event.get('location', '')
+        )
+    
     def _save_event_to_db(self, event: Dict, user_id: str):
         """Save event to database"""
         try:
-            db = next(get_db())
-            
-            calendar_event = CalendarEvent(
-                google_event_id=event['id'],
-                user_id=user_id,
-                title=event.get('summary', ''),
-                description=event.get('description', ''),
-                start_time=datetime.fromisoformat(event['start']['dateTime'].replace('Z', '')),
-                end_time=datetime.fromisoformat(event['end']['dateTime'].replace('Z', '')),
-                attendees=json.dumps([att.get('email') for att in event.get('attendees', [])]),
-                location=event.get('location', '')
-            )
-            
-            db.add(calendar_event)
-            db.commit()
+            with session_scope() as db:
+                db.add(self._calendar_event_row(event, user_id))
             
         except Exception as e:
             logger.error(f"Error saving event to database: {e}")
     
-    def get_events(self, query: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    async def _save_event_to_db_async(self, event: Dict, user_id: str):
+        """Queue the event for the next batched write; failures are logged by the queue"""
+        try:
+            write_queue.add(f"events:{user_id}", self._calendar_event_row(event, user_id))
+            
+        except Exception as e:
+            logger.error(f"Error saving event to database: {e}")
+    
+    def get_events(self, query: str, user_id: Optional[str] = None, force_refresh: bool = False) -> Dict[str, Any]:
         """Get calendar events with enhanced filtering"""
         try:
             if not self.calendar_service.is_available():
@@ -336,16 +418,7 @@ class EnhancedCalendarTools:
                 end_date = start_date + timedelta(days=1)
                 date_label = "today"
             
-            events_result = self.calendar_service.service.events().list(
-                calendarId='primary',
-                timeMin=start_date.isoformat() + 'Z',
-                timeMax=end_date.isoformat() + 'Z',
-                maxResults=20,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            events = self._events_between(start_date, end_date, force_refresh)[:20]
             
             if not events:
                 return {
@@ -356,22 +429,18 @@ class EnhancedCalendarTools:
             
             formatted_events = []
             for event in events:
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                end = event['end'].get('dateTime', event['end'].get('date'))
-                
                 # Format datetime
-                if 'T' in start:
-                    start_dt = datetime.fromisoformat(start.replace('Z', ''))
-                    formatted_time = start_dt.strftime('%I:%M %p')
-                else:
+                if event['all_day']:
                     formatted_time = 'All day'
+                else:
+                    formatted_time = event['local_start'].strftime('%I:%M %p')
                 
                 formatted_events.append({
-                    'title': event.get('summary', 'Untitled Event'),
+                    'title': event['summary'],
                     'time': formatted_time,
-                    'location': event.get('location', ''),
-                    'attendees': len(event.get('attendees', [])),
-                    'link': event.get('htmlLink', '')
+                    'location': event['location'],
+                    'attendees': len(event['attendees']),
+                    'link': event['link']
                 })
             
             event_list = [f"📅 Events for {date_label}:"]
@@ -394,52 +463,132 @@ class EnhancedCalendarTools:
                 'error_type': 'system'
             }
 
+    async def get_events_async(self, query: str, user_id: Optional[str] = None, force_refresh: bool = False) -> Dict[str, Any]:
+        """get_events for the event loop; cache syncs call the blocking Calendar client"""
+        try:
+            return await tool_executor.run('calendar', self.get_events, query, user_id, force_refresh)
+        except TimeoutError:
+            return self._timeout_result('fetch events')
+    
+    def _timeout_result(self, action: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'message': f'❌ Failed to {action}: Google Calendar is taking too long to respond. Please try again.',
+            'error_type': 'timeout'
+        }
+
 class EnhancedTaskTools:
+    def _parse_task(self, description: str) -> tuple[str, str, Optional[datetime]]:
+        """Split a task description into (name, priority, due date)"""
+        # Parse priority and due date
+        priority = "medium"
+        due_date = None
+        task_name = description
+        
+        # Extract priority
+        if "high priority" in description.lower():
+            priority = "high"
+            task_name = re.sub(r'high priority\s*', '', task_name, flags=re.IGNORECASE)
+        elif "low priority" in description.lower():
+            priority = "low"
+            task_name = re.sub(r'low priority\s*', '', task_name, flags=re.IGNORECASE)
+        elif "urgent" in description.lower():
+            priority = "high"
+            task_name = re.sub(r'urgent\s*', '', task_name, flags=re.IGNORECASE)
+        
+        # Extract due date
+        due_patterns = [
+            r'due\s+(tomorrow|today|next week)',
+            r'by\s+(tomorrow|today|next week)',
+            r'deadline\s+(tomorrow|today|next week)'
+        ]
+        
+        for pattern in due_patterns:
+            match = re.search(pattern, task_name.lower())
+            if match:
+                due_text = match.group(1)
+                if due_text == 'tomorrow':
+                    due_date = datetime.now() + timedelta(days=1)
+                elif due_text == 'today':
+                    due_date = datetime.now()
+                elif due_text == 'next week':
+                    due_date = datetime.now() + timedelta(days=7)
+                
+                task_name = re.sub(pattern, '', task_name, flags=re.IGNORECASE)
+                break
+        
+        # Clean up task name
+        task_name = re.sub(r'task\s+to\s+', '', task_name, flags=re.IGNORECASE)
+        task_name = re.sub(r'create\s+', '', task_name, flags=re.IGNORECASE)
+        return task_name.strip(), priority, due_date
+    
+    def _local_task(self, task_name: str, description: str, priority: str, due_date: Optional[datetime]) -> Dict[str, Any]:
+        return {
+            'title': task_name,
+            'description': description,
+            'priority': priority,
+            'status': 'pending',
+            'due_date': due_date.isoformat() if due_date else None,
+            'created_at': datetime.now().isoformat()
+        }
+    
+    def _task_created(self, task_id: Any, task_name: str, priority: str, due_date: Optional[datetime]) -> Dict[str, Any]:
+        due_info = f" (due {due_date.strftime('%B %d')})" if due_date else ""
+        priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}[priority]
+        
+        return {
+            'success': True,
+            'message': f'✅ Task created: "{task_name}" {priority_emoji} {priority} priority{due_info}',
+            'task': {
+                'id': task_id,
+                'title': task_name,
+                'priority': priority,
+                'due_date': due_date.isoformat() if due_date else None
+            }
+        }
+    
     def create_task(self, description: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Create task with enhanced parsing and database storage"""
         try:
-            # Parse priority and due date
-            priority = "medium"
-            due_date = None
-            task_name = description
-            
-            # Extract priority
-            if "high priority" in description.lower():
-                priority = "high"
-                task_name = re.sub(r'high priority\s*', '', task_name, flags=re.IGNORECASE)
-            elif "low priority" in description.lower():
-                priority = "low"
-                task_name = re.sub(r'low priority\s*', '', task_name, flags=re.IGNORECASE)
-            elif "urgent" in description.lower():
-                priority = "high"
-                task_name = re.sub(r'urgent\s*', '', task_name, flags=re.IGNORECASE)
-            
-            # Extract due date
-            due_patterns = [
-                r'due\s+(tomorrow|today|next week)',
-                r'by\s+(tomorrow|today|next week)',
-                r'deadline\s+(tomorrow|today|next week)'
-            ]
+            task_name, priority, due_date = self._parse_task(description)
+            if not task_name:
+                return {
+                    'success': False,
+                    'message': '❌ Please provide a task description',
+                    'error_type': 'validation'
+                }
             
-            for pattern in due_patterns:
-                match = re.search(pattern, task_name.lower())
-                if match:
-                    due_text = match.group(1)
-                    if due_text == 'tomorrow':
-                        due_date = datetime.now() + timedelta(days=1)
-                    elif due_text == 'today':
-                        due_date = datetime.now()
-                    elif due_text == 'next week':
-                        due_date = datetime.now() + timedelta(days=7)
-                    
-                    task_name = re.sub(pattern, '', task_name, flags=re.IGNORECASE)
-                    break
-            
-            # Clean up task name
-            task_name = re.sub(r'task\s+to\s+', '', task_name, flags=re.IGNORECASE)
-            task_name = re.sub(r'create\s+', '', task_name, flags=re.IGNORECASE)
-            task_name = task_name.strip()
+            # Save to database if user_id provided
+            if user_id:
+                with session_scope() as db:
+                    task = Task(
+                        user_id=user_id,
+                        title=task_name,
+                        description=description,
+                        priority=priority,
+                        due_date=due_date
+                    )
+                    db.add(task)
+                    db.flush()
+                    task_id = task.id
+            else:
+                # Fallback to the local task log
+                task_id = task_store.create(self._local_task(task_name, description, priority, due_date))['id']
             
+            return self._task_created(task_id, task_name, priority, due_date)
+            
+        except Exception as e:
+            logger.error(f"Error creating task: {e}")
+            return {
+                'success': False,
+                'message': f'❌ Failed to create task: {str(e)}',
+                'error_type': 'system'
+            }
+    
+    async def create_task_async(self, description: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """create_task for the event loop: the insert goes through the async engine"""
+        try:
+            task_name, priority, due_date = self._parse_task(description)
             if not task_name:
                 return {
                     'success': False,
@@ -447,55 +596,35 @@ class EnhancedTaskTools:
                     'error_type': 'validation'
                 }
             
-            # Save to database if user_id provided
             if user_id:
-                db = next(get_db())
+                # Committed with whatever else is queued; wait so the reply only claims a saved task
                 task = Task(
+                    id=str(uuid.uuid4()),
                     user_id=user_id,
                     title=task_name,
                     description=description,
                     priority=priority,
                     due_date=due_date
                 )
-                db.add(task)
-                db.commit()
+                try:
+                    # Shielded: on timeout the write stays queued rather than being abandoned
+                    await asyncio.wait_for(asyncio.shield(write_queue.add(f"tasks:{user_id}", task)), TASK_WRITE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Task write for {user_id} still pending after {TASK_WRITE_TIMEOUT:g}s")
+                    return {
+                        'success': False,
+                        'message': '❌ Failed to create task: saving is taking too long. Please check your tasks before trying again.',
+                        'error_type': 'timeout'
+                    }
                 task_id = task.id
             else:
-                # Fallback to JSON file
-                tasks_file = 'tasks.json'
-                tasks = []
-                if os.path.exists(tasks_file):
-                    with open(tasks_file, 'r') as f:
-                        tasks = json.load(f)
-                
-                task_id = len(tasks) + 1
-                new_task = {
-                    'id': task_id,
-                    'title': task_name,
-                    'description': description,
-                    'priority': priority,
-                    'status': 'pending',
-                    'due_date': due_date.isoformat() if due_date else None,
-                    'created_at': datetime.now().isoformat()
-                }
-                tasks.append(new_task)
-                
-                with open(tasks_file, 'w') as f:
-                    json.dump(tasks, f, indent=2)
+                # The task log takes a file lock, so keep it off the loop
+                new_task = await tool_executor.run(
+                    'tasks', task_store.create, self._local_task(task_name, description, priority, due_date)
+                )
+                task_id = new_task['id']
             
-            due_info = f" (due {due_date.strftime('%B %d')})" if due_date else ""
-            priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}[priority]
-            
-            return {
-                'success': True,
-                'message': f'✅ Task created: "{task_name}" {priority_emoji} {priority} priority{due_info}',
-                'task': {
-                    'id': task_id,
-                    'title': task_name,
-                    'priority': priority,
-                    'due_date': due_date.isoformat() if due_date else None
-                }
-            }
+            return self._task_created(task_id, task_name, priority, due_date)
             
         except Exception as e:
             logger.error(f"Error creating task: {e}")
@@ -505,90 +634,140 @@ class EnhancedTaskTools:
                 'error_type': 'system'
             }
     
-    def get_tasks(self, query: str = "", user_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get tasks with enhanced filtering"""
+    def _task_filter(self, query: str) -> Optional[str]:
+        query_lower = query.lower()
+        for name in ('pending', 'completed', 'high', 'overdue'):
+            if name in query_lower:
+                return name
+        return None
+    
+    def _tasks_statement(self, user_id: str, task_filter: Optional[str], limit: Optional[int], cursor: Optional[str]):
+        """SELECT for one page of a user's tasks, filtered, sorted and paginated in SQL"""
+        statement = select(Task).where(Task.user_id == user_id)
+        
+        # Each filter is served by one of the (user_id, ...) indexes on Task
+        sort_column = Task.created_at
+        if task_filter == 'pending':
+            statement = statement.where(Task.status == 'pending')
+        elif task_filter == 'completed':
+            statement = statement.where(Task.status == 'completed')
+        elif task_filter == 'high':
+            statement = statement.where(Task.priority == 'high')
+        elif task_filter == 'overdue':
+            statement = statement.where(Task.due_date.isnot(None), Task.due_date < datetime.now())
+            sort_column = Task.due_date
+        
+        # Keyset pagination: resume strictly after the last (sort value, id) seen
+        if cursor:
+            last_value, last_id = cursor.rsplit('|', 1)
+            last_value = datetime.fromisoformat(last_value)
+            statement = statement.where(or_(
+                sort_column > last_value,
+                and_(sort_column == last_value, Task.id > last_id)
+            ))
+        
+        statement = statement.order_by(sort_column, Task.id)
+        if limit is None:
+            return statement
+        # One extra row tells us whether another page exists
+        return statement.limit(limit + 1)
+    
+    def _page_db_tasks(self, rows: List[Task], task_filter: Optional[str],
+                       limit: Optional[int]) -> tuple[List[Dict], Optional[str]]:
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            last_value = last.due_date if task_filter == 'overdue' else last.created_at
+            next_cursor = f"{last_value.isoformat()}|{last.id}"
+        tasks = [
+            {
+                'id': task.id,
+                'title': task.title,
+                'priority': task.priority,
+                'status': task.status,
+                'due_date': task.due_date,
+                'created_at': task.created_at
+            }
+            for task in rows
+        ]
+        return tasks, next_cursor
+    
+    def _query_local_tasks(self, task_filter: Optional[str], limit: Optional[int],
+                           cursor: Optional[str]) -> tuple[List[Dict], Optional[str]]:
+        """One page of tasks from the local task log"""
+        tasks = task_store.list()
+        if cursor:
+            tasks = [t for t in tasks if t['id'] > int(cursor)]
+        
+        if task_filter in ('pending', 'completed'):
+            tasks = [t for t in tasks if t['status'] == task_filter]
+        elif task_filter == 'high':
+            tasks = [t for t in tasks if t['priority'] == 'high']
+        elif task_filter == 'overdue':
+            now = datetime.now()
+            tasks = [t for t in tasks if t.get('due_date') and datetime.fromisoformat(t['due_date']) < now]
+        
+        next_cursor = None
+        if limit is not None and len(tasks) > limit:
+            next_cursor = str(tasks[limit - 1]['id'])
+            tasks = tasks[:limit]
+        tasks = [
+            {
+                **task,
+                'title': task.get('title') or task.get('name'),
+                'due_date': datetime.fromisoformat(task['due_date']) if task.get('due_date') else None
+            }
+            for task in tasks
+        ]
+        return tasks, next_cursor
+    
+    def get_tasks(self, query: str = "", user_id: Optional[str] = None,
+                  limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get tasks with enhanced filtering.
+        
+        Returns every matching task unless ``limit`` is given; then at most
+        ``limit``, and the returned ``next_cursor`` passed back as ``cursor``
+        fetches the next page.
+        """
         try:
-            tasks = []
+            task_filter = self._task_filter(query) if query else None
             
             if user_id:
                 # Get from database
-                db = next(get_db())
-                db_tasks = db.query(Task).filter(Task.user_id == user_id).all()
-                tasks = [
-                    {
-                        'id': task.id,
-                        'title': task.title,
-                        'priority': task.priority,
-                        'status': task.status,
-                        'due_date': task.due_date.isoformat() if task.due_date else None,
-                        'created_at': task.created_at.isoformat()
-                    }
-                    for task in db_tasks
-                ]
+                with session_scope() as db:
+                    rows = db.execute(self._tasks_statement(user_id, task_filter, limit, cursor)).scalars().all()
+                    tasks, next_cursor = self._page_db_tasks(rows, task_filter, limit)
             else:
-                # Fallback to JSON file
-                tasks_file = 'tasks.json'
-                if os.path.exists(tasks_file):
-                    with open(tasks_file, 'r') as f:
-                        tasks = json.load(f)
-            
-            if not tasks:
-                return {
-                    'success': True,
-                    'message': '📋 No tasks found. Create your first task!',
-                    'tasks': []
-                }
-            
-            # Filter tasks
-            filtered_tasks = tasks
-            if query:
-                query_lower = query.lower()
-                if "pending" in query_lower:
-                    filtered_tasks = [t for t in tasks if t['status'] == 'pending']
-                elif "completed" in query_lower:
-                    filtered_tasks = [t for t in tasks if t['status'] == 'completed']
-                elif "high" in query_lower:
-                    filtered_tasks = [t for t in tasks if t['priority'] == 'high']
-                elif "overdue" in query_lower:
-                    now = datetime.now()
-                    filtered_tasks = [
-                        t for t in tasks 
-                        if t.get('due_date') and datetime.fromisoformat(t['due_date']) < now
-                    ]
-            
-            if not filtered_tasks:
-                return {
-                    'success': True,
-                    'message': f'📋 No tasks found matching "{query}"',
-                    'tasks': []
-                }
+                # Fallback to the local task log
+                tasks, next_cursor = self._query_local_tasks(task_filter, limit, cursor)
             
-            # Format task list
-            task_list = ["📋 Your Tasks:"]
-            priority_emojis = {"high": "🔴", "medium": "🟡", "low": "🟢"}
-            status_emojis = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
-            
-            for task in filtered_tasks:
-                priority_emoji = priority_emojis.get(task['priority'], '⚪')
-                status_emoji = status_emojis.get(task['status'], '❓')
-                
-                due_info = ""
-                if task.get('due_date'):
-                    due_date = datetime.fromisoformat(task['due_date'])
-                    if due_date.date() == datetime.now().date():
-                        due_info = " (due today)"
-                    elif due_date.date() == (datetime.now() + timedelta(days=1)).date():
-                        due_info = " (due tomorrow)"
-                    elif due_date < datetime.now():
-                        due_info = " (overdue)"
-                
-                task_list.append(f"{status_emoji} {priority_emoji} {task['title']}{due_info}")
+            return self._format_tasks(tasks, next_cursor, query, task_filter)
             
+        except Exception as e:
+            logger.error(f"Error fetching tasks: {e}")
             return {
-                'success': True,
-                'message': '\n'.join(task_list),
-                'tasks': filtered_tasks
+                'success': False,
+                'message': f'❌ Failed to fetch tasks: {str(e)}',
+                'error_type': 'system'
             }
+    
+    async def get_tasks_async(self, query: str = "", user_id: Optional[str] = None,
+                              limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """get_tasks for the event loop: the query goes through the async engine"""
+        try:
+            task_filter = self._task_filter(query) if query else None
+            
+            if user_id:
+                # See tasks this user just created that are still queued
+                await write_queue.flush_for(f"tasks:{user_id}")
+                async with async_session_scope() as db:
+                    result = await db.execute(self._tasks_statement(user_id, task_filter, limit, cursor))
+                    tasks, next_cursor = self._page_db_tasks(result.scalars().all(), task_filter, limit)
+            else:
+                tasks, next_cursor = await tool_executor.run('tasks', self._query_local_tasks, task_filter, limit, cursor)
+            
+            return self._format_tasks(tasks, next_cursor, query, task_filter)
             
         except Exception as e:
             logger.error(f"Error fetching tasks: {e}")
@@ -597,6 +776,54 @@ class EnhancedTaskTools:
                 'message': f'❌ Failed to fetch tasks: {str(e)}',
                 'error_type': 'system'
             }
+    
+    def _format_tasks(self, tasks: List[Dict], next_cursor: Optional[str],
+                      query: str, task_filter: Optional[str]) -> Dict[str, Any]:
+        if not tasks:
+            message = f'📋 No tasks found matching "{query}"' if task_filter else '📋 No tasks found. Create your first task!'
+            return {
+                'success': True,
+                'message': message,
+                'tasks': [],
+                'next_cursor': None
+            }
+        
+        # Format task list
+        task_list = ["📋 Your Tasks:"]
+        priority_emojis = {"high": "🔴", "medium": "🟡", "low": "🟢"}
+        status_emojis = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
+        now = datetime.now()
+        today = now.date()
+        tomorrow = (now + timedelta(days=1)).date()
+        
+        for task in tasks:
+            priority_emoji = priority_emojis.get(task['priority'], '⚪')
+            status_emoji = status_emojis.get(task['status'], '❓')
+            
+            due_info = ""
+            due_date = task['due_date']
+            if due_date:
+                if due_date.date() == today:
+                    due_info = " (due today)"
+                elif due_date.date() == tomorrow:
+                    due_info = " (due tomorrow)"
+                elif due_date < now:
+                    due_info = " (overdue)"
+                task['due_date'] = due_date.isoformat()
+            if isinstance(task.get('created_at'), datetime):
+                task['created_at'] = task['created_at'].isoformat()
+            
+            task_list.append(f"{status_emoji} {priority_emoji} {task['title']}{due_info}")
+        
+        if next_cursor:
+            task_list.append("… more tasks available")
+        
+        return {
+            'success': True,
+            'message': '\n'.join(task_list),
+            'tasks': tasks,
+            'next_cursor': next_cursor
+        }
 
 # Global instances
 calendar_tools = EnhancedCalendarTools()
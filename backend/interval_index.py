@@ -0,0 +1,97 @@
+"""Sorted-array interval index for calendar overlap and free-slot queries"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Iterable, List, Sequence, Tuple
+
+# How many days ahead free_slots looks
+FREE_SLOT_HORIZON_DAYS = 14
+
+
+class IntervalIndex:
+    """Immutable index over half-open [start, end) intervals.
+
+    Items are sorted by start, alongside a running maximum of their ends.
+    An overlap query bisects both arrays to bound the candidates, then
+    scans only that range. The range is O(log n + k) unless a very long
+    event (a multi-week block) precedes the window, in which case its
+    neighbours are scanned too.
+    """
+
+    def __init__(self, items: Iterable[Any], start_key=lambda item: item['start'], end_key=lambda item: item['end']):
+        self._items = sorted(items, key=start_key)
+        self._starts = [start_key(item) for item in self._items]
+        self._ends = [end_key(item) for item in self._items]
+        self._max_ends = list(accumulate(self._ends, max))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _candidate_range(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        # Everything before lo ends at or before `start`; everything from hi on starts at or after `end`
+        lo = bisect_right(self._max_ends, start)
+        hi = bisect_left(self._starts, end)
+        return lo, hi
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Any]:
+        """Items overlapping [start, end), ordered by start"""
+        lo, hi = self._candidate_range(start, end)
+        return [self._items[i] for i in range(lo, hi) if self._ends[i] > start]
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """Whether anything overlaps [start, end)"""
+        lo, hi = self._candidate_range(start, end)
+        return any(self._ends[i] > start for i in range(lo, hi))
+
+    def busy_periods(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Merged busy intervals within [start, end)"""
+        merged: List[List[datetime]] = []
+        lo, hi = self._candidate_range(start, end)
+        for i in range(lo, hi):
+            if self._ends[i] <= start:
+                continue
+            item_start, item_end = max(self._starts[i], start), min(self._ends[i], end)
+            if merged and item_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], item_end)
+            else:
+                merged.append([item_start, item_end])
+        return [(busy_start, busy_end) for busy_start, busy_end in merged]
+
+    def free_slots(
+        self,
+        after: datetime,
+        duration: timedelta,
+        count: int = 3,
+        work_start_hour: int = 9,
+        work_end_hour: int = 17,
+        working_days: Sequence[int] = (0, 1, 2, 3, 4),
+        step: timedelta = timedelta(minutes=30),
+        horizon_days: int = FREE_SLOT_HORIZON_DAYS
+    ) -> List[Tuple[datetime, datetime]]:
+        """Next ``count`` free [start, end) slots of ``duration`` within working hours"""
+        slots: List[Tuple[datetime, datetime]] = []
+        day = after.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        for _ in range(horizon_days):
+            if day.weekday() in working_days:
+                window_start = max(day.replace(hour=work_start_hour), after)
+                window_end = day.replace(hour=work_end_hour)
+                cursor = _align(window_start, day, step)
+
+                for busy_start, busy_end in self.busy_periods(window_start, window_end) + [(window_end, window_end)]:
+                    while cursor + duration <= busy_start:
+                        slots.append((cursor, cursor + duration))
+                        if len(slots) >= count:
+                            return slots
+                        cursor += step
+                    if busy_end > cursor:
+                        cursor = _align(busy_end, day, step)
+            day += timedelta(days=1)
+
+        return slots
+
+
+def _align(moment: datetime, origin: datetime, step: timedelta) -> datetime:
+    """Round ``moment`` up to the next multiple of ``step`` after ``origin``"""
+    remainder = (moment - origin) % step
+    return moment if not remainder else moment + (step - remainder)
@@ -0,0 +1,147 @@
+"""Process-wide pooled LLM clients shared across requests"""
+import os
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+    OPENAI_AVAILABLE = True
+except Exception:
+    OPENAI_AVAILABLE = False
+
+# Connection pool and timeout settings
+POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+
+class ConnectionStats:
+    """Counts requests and new TCP connections to measure keep-alive reuse"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': reused,
+                'reuse_ratio': round(reused / self.requests, 3) if self.requests else 0.0
+            }
+
+
+class LLMClientRegistry:
+    """Lazily builds one sync and one async OpenAI client per process.
+
+    Both clients sit on an httpx connection pool so TLS handshakes and
+    connection setup are paid once and reused by later calls.
+    """
+
+    def __init__(self, api_key: Optional[str] = None):
+        # Read when a client is first built; None lets the SDK use OPENAI_API_KEY
+        self.api_key = api_key
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+        self.sync_stats = ConnectionStats()
+        self.async_stats = ConnectionStats()
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+        )
+
+    def _timeout(self):
+        return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+    def get_client(self) -> "OpenAI":
+        """Shared synchronous OpenAI client"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    stats = self.sync_stats
+
+                    def trace(event_name: str, info: Dict):
+                        if event_name == "connection.connect_tcp.complete":
+                            stats.record_connection()
+
+                    def on_request(request):
+                        stats.record_request()
+                        request.extensions["trace"] = trace
+
+                    http_client = httpx.Client(
+                        limits=self._limits(),
+                        timeout=self._timeout(),
+                        event_hooks={'request': [on_request]}
+                    )
+                    self._client = OpenAI(api_key=self.api_key, http_client=http_client, max_retries=MAX_RETRIES)
+                    logger.info("Pooled OpenAI client initialized")
+        return self._client
+
+    def get_async_client(self) -> "AsyncOpenAI":
+        """Shared asynchronous OpenAI client"""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    stats = self.async_stats
+
+                    async def trace(event_name: str, info: Dict):
+                        if event_name == "connection.connect_tcp.complete":
+                            stats.record_connection()
+
+                    async def on_request(request):
+                        stats.record_request()
+                        request.extensions["trace"] = trace
+
+                    http_client = httpx.AsyncClient(
+                        limits=self._limits(),
+                        timeout=self._timeout(),
+                        event_hooks={'request': [on_request]}
+                    )
+                    self._async_client = AsyncOpenAI(
+                        api_key=self.api_key, http_client=http_client, max_retries=MAX_RETRIES
+                    )
+                    logger.info("Pooled async OpenAI client initialized")
+        return self._async_client
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection reuse metrics for both clients"""
+        return {
+            'sync': self.sync_stats.to_dict(),
+            'async': self.async_stats.to_dict()
+        }
+
+    async def aclose(self):
+        """Close pooled connections, e.g. on application shutdown"""
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            await async_client.close()
+
+
+# Global client registry
+llm_clients = LLMClientRegistry()
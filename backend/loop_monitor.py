@@ -0,0 +1,73 @@
+"""Event loop lag probe: measures how late a periodic timer fires"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL = float(os.getenv("LOOP_LAG_PROBE_INTERVAL", "0.5"))
+# Lag above this is logged as a stall; something blocked the loop
+STALL_THRESHOLD = float(os.getenv("LOOP_LAG_STALL_THRESHOLD", "0.1"))
+WINDOW = 120
+
+
+class LoopLagMonitor:
+    """Sleeps for ``interval`` in a loop and records the overshoot.
+
+    Any coroutine that blocks the event loop (sync DB calls, blocking HTTP)
+    delays the wake-up by as long as it blocks, so the overshoot is a direct
+    measure of how long the loop was unavailable.
+    """
+
+    def __init__(self, interval: float = PROBE_INTERVAL, stall_threshold: float = STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.samples: Deque[float] = deque(maxlen=WINDOW)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - expected, 0.0)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.stall_threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop stalled for {lag * 1000:.0f}ms")
+
+    def get_stats(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        if not samples:
+            return {'running': self._task is not None, 'samples': 0}
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'samples': len(samples),
+            'last_ms': round(self.samples[-1] * 1000, 2),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+            'p99_ms': round(samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000, 2),
+            'max_ms': round(self.max_lag * 1000, 2),
+            'stalls': self.stalls
+        }
+
+
+# Global loop lag monitor
+loop_monitor = LoopLagMonitor()
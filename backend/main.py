@@ -1,16 +1,22 @@
 """
 Simplified FastAPI backend with OpenAI integration
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-import openai
+from typing import List
 import os
 from datetime import datetime
 import logging
-import json
+import asyncio
+
+from streaming import sse_stream
+from loop_monitor import loop_monitor
+from tool_executor import tool_executor
+from llm_clients import llm_clients
+from database import dispose_async_engine
+from write_behind import write_queue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,8 +34,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# OpenAI client
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# OpenAI client (built lazily by llm_clients on the first chat)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await loop_monitor.stop()
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    await llm_clients.aclose()
+
+@app.on_event("shutdown")
+async def flush_pending_writes():
+    await write_queue.stop()
+
+@app.on_event("shutdown")
+async def close_database_pool():
+    # Registered after flush_pending_writes, which still needs the engine
+    await dispose_async_engine()
 
 # Pydantic models
 class Message(BaseModel):
@@ -47,15 +74,10 @@ class ChatResponse(BaseModel):
 async def chat_endpoint(request: ChatRequest):
     """Streaming chat endpoint compatible with Vercel AI SDK"""
     try:
-        if not openai.api_key:
-            def generate_fallback():
-                response_text = "Hello! I'm Aether AI. OpenAI API key not configured, but I'm here to help with basic responses."
-                for char in response_text:
-                    yield f"data: {json.dumps({'content': char})}\n\n"
-                yield "data: [DONE]\n\n"
-            
+        if not OPENAI_API_KEY:
+            response_text = "Hello! I'm Aether AI. OpenAI API key not configured, but I'm here to help with basic responses."
             return StreamingResponse(
-                generate_fallback(),
+                sse_stream([response_text]),
                 media_type="text/plain"
             )
         
@@ -71,10 +93,13 @@ async def chat_endpoint(request: ChatRequest):
             "content": "You are Aether, a helpful AI assistant. Be concise and helpful."
         }
         
-        def generate_response():
+        async def generate_response():
+            # Async generator so each in-flight stream holds a socket, not a
+            # threadpool worker. Starlette cancels it when the client disconnects.
+            response = None
             try:
                 # Call OpenAI with streaming
-                response = openai.ChatCompletion.create(
+                response = await llm_clients.get_async_client().chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[system_message] + openai_messages,
                     max_tokens=1000,
@@ -82,45 +107,54 @@ async def chat_endpoint(request: ChatRequest):
                     stream=True
                 )
                 
-                for chunk in response:
-                    if chunk.choices[0].delta.get('content'):
-                        content = chunk.choices[0].delta.content
-                        yield f"data: {json.dumps({'content': content})}\n\n"
-                
-                yield "data: [DONE]\n\n"
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            
+            except asyncio.CancelledError:
+                logger.info("Client disconnected, cancelling OpenAI stream")
+                raise
                 
             except Exception as e:
                 logger.error(f"OpenAI streaming error: {e}")
-                error_msg = "I apologize, but I encountered an error. Please try again."
-                for char in error_msg:
-                    yield f"data: {json.dumps({'content': char})}\n\n"
-                yield "data: [DONE]\n\n"
+                yield "I apologize, but I encountered an error. Please try again."
+            
+            finally:
+                # Release the upstream connection instead of draining it
+                if response is not None:
+                    await response.close()
         
         return StreamingResponse(
-            generate_response(),
+            sse_stream(generate_response()),
             media_type="text/plain"
         )
         
     except Exception as e:
         logger.error(f"Chat error: {e}")
-        def generate_error():
-            error_msg = "I apologize, but I encountered an error. Please try again."
-            for char in error_msg:
-                yield f"data: {json.dumps({'content': char})}\n\n"
-            yield "data: [DONE]\n\n"
-        
+        error_msg = "I apologize, but I encountered an error. Please try again."
         return StreamingResponse(
-            generate_error(),
+            sse_stream([error_msg]),
             media_type="text/plain"
         )
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
+    try:
+        # Imported lazily: the AI service pulls in the provider SDKs
+        from ai_service import ai_service
+        ai_providers = ai_service.get_health()
+    except Exception as e:
+        ai_providers = {"error": str(e)}
+    
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
-        "openai_configured": bool(openai.api_key)
+        "openai_configured": bool(OPENAI_API_KEY),
+        "event_loop": loop_monitor.get_stats(),
+        "tools": tool_executor.get_stats(),
+        "ai_providers": ai_providers,
+        "writes": write_queue.get_stats()
     }
 
 # Remove static file serving since we're using Next.js frontend
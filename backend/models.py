@@ -1,5 +1,5 @@
 """Database models for Aether AI"""
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -44,7 +44,8 @@ class Message(Base):
     content = Column(Text)
     is_user = Column(Boolean)
     timestamp = Column(DateTime, default=datetime.utcnow)
-    metadata = Column(Text)  # JSON for additional data
+    # "metadata" is reserved on declarative models, so the attribute is renamed
+    message_metadata = Column("metadata", Text)  # JSON for additional data
     
     # Relationships
     session = relationship("ChatSession", back_populates="messages")
@@ -64,6 +65,13 @@ class Task(Base):
     
     # Relationships
     user = relationship("User", back_populates="tasks")
+    
+    # Composite indexes for the per-user filters in EnhancedTaskTools.get_tasks
+    __table_args__ = (
+        Index("ix_tasks_user_status", "user_id", "status"),
+        Index("ix_tasks_user_priority", "user_id", "priority"),
+        Index("ix_tasks_user_due_date", "user_id", "due_date"),
+    )
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
@@ -0,0 +1,222 @@
+"""Circuit breakers and health scores for AI providers"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Trip once at least BREAKER_MIN_CALLS of the last BREAKER_WINDOW calls
+# have been made and BREAKER_ERROR_RATE of them failed or were too slow
+BREAKER_WINDOW = int(os.getenv("AI_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", "0.5"))
+# Successful calls slower than this count against the provider
+BREAKER_SLOW_CALL = float(os.getenv("AI_BREAKER_SLOW_CALL", "10"))
+# How long an open breaker waits before letting one probe call through
+BREAKER_OPEN_SECONDS = float(os.getenv("AI_BREAKER_OPEN_SECONDS", "30"))
+
+# Health score smoothing, and the latency at which the score halves
+HEALTH_ALPHA = 0.2
+HEALTH_LATENCY_REFERENCE = float(os.getenv("AI_HEALTH_LATENCY_REFERENCE", "2.0"))
+# A provider keeps its preferred position unless it scores this much below the best
+HEALTH_MARGIN = float(os.getenv("AI_HEALTH_MARGIN", "0.3"))
+# Time constant (seconds) over which an idle provider's success rate drifts back
+# to 1, so a demoted provider is eventually tried first again
+HEALTH_RECOVERY = float(os.getenv("AI_HEALTH_RECOVERY", "60"))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """The provider was skipped because its breaker is open"""
+
+    def __init__(self, name: str):
+        super().__init__(f"circuit open for {name}")
+        self.name = name
+
+
+class CircuitBreaker:
+    """Closed -> open on a high error rate; open -> half-open after a cool-down.
+
+    While open, calls are refused without touching the network. In
+    half-open a single probe call is let through: success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        slow_call: float = BREAKER_SLOW_CALL,
+        open_seconds: float = BREAKER_OPEN_SECONDS
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=window)  # True = bad
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def _ready_to_probe(self) -> bool:
+        return self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds
+
+    def available(self) -> bool:
+        """Whether a call would currently be allowed (without claiming the probe)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN:
+            return not self._probe_in_flight
+        return self._ready_to_probe()
+
+    def allow(self) -> bool:
+        """Claim permission for one call"""
+        if self._ready_to_probe():
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, probing")
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, bad: bool):
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if bad:
+                self._open()
+            else:
+                self.state = CLOSED
+                self.outcomes.clear()
+                logger.info(f"Circuit for {self.name} closed")
+            return
+
+        self.outcomes.append(bad)
+        if (self.state == CLOSED and len(self.outcomes) >= self.min_calls
+                and sum(self.outcomes) / len(self.outcomes) >= self.error_rate):
+            self._open()
+
+    def release(self):
+        """The call was abandoned (e.g. lost a hedge race) without an outcome"""
+        self._probe_in_flight = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.warning(f"Circuit for {self.name} opened")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'error_rate': round(sum(self.outcomes) / len(self.outcomes), 3) if self.outcomes else 0.0,
+            'recent_calls': len(self.outcomes),
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+            'retry_in_seconds': round(max(self.opened_at + self.open_seconds - time.monotonic(), 0), 1)
+            if self.state == OPEN else None
+        }
+
+
+class ProviderHealth:
+    """Breaker plus a rolling health score per provider.
+
+    The score multiplies a smoothed success rate by a latency factor
+    (1.0 when instant, 0.5 at HEALTH_LATENCY_REFERENCE), so it falls as a
+    provider starts erroring or slowing down, before its breaker trips.
+    The success rate recovers while no outcomes come in, since a demoted
+    provider only gets traffic again once it is back in front.
+    """
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._success: Dict[str, float] = {}
+        self._latency: Dict[str, float] = {}
+        self._updated: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def score(self, name: str) -> float:
+        if not self.breaker(name).available():
+            return 0.0
+        latency = self._latency.get(name, 0.0)
+        return self._success_rate(name) / (1 + latency / HEALTH_LATENCY_REFERENCE)
+
+    def _success_rate(self, name: str) -> float:
+        success = self._success.get(name, 1.0)
+        idle = time.monotonic() - self._updated.get(name, 0.0)
+        return 1.0 - (1.0 - success) * math.exp(-idle / HEALTH_RECOVERY)
+
+    def order(self, names: List[str]) -> List[str]:
+        """Usable providers, healthiest first.
+
+        ``names`` is the preference order; a provider only moves down if it
+        scores more than HEALTH_MARGIN below the best, so small jitter
+        doesn't flip the primary back and forth.
+        """
+        with self._lock:
+            scores = {name: self.score(name) for name in names}
+        usable = [name for name in names if scores[name] > 0]
+        if not usable:
+            return []
+        best = max(scores[name] for name in usable)
+        preferred = [name for name in usable if scores[name] >= best - HEALTH_MARGIN]
+        demoted = sorted((name for name in usable if name not in preferred), key=lambda name: -scores[name])
+        return preferred + demoted
+
+    def allow(self, name: str) -> bool:
+        with self._lock:
+            return self.breaker(name).allow()
+
+    def _update(self, name: str, ok: bool, latency: Optional[float]):
+        self._success[name] = (1 - HEALTH_ALPHA) * self._success_rate(name) + HEALTH_ALPHA * (1.0 if ok else 0.0)
+        self._updated[name] = time.monotonic()
+        if latency is not None:
+            previous = self._latency.get(name)
+            self._latency[name] = latency if previous is None else (1 - HEALTH_ALPHA) * previous + HEALTH_ALPHA * latency
+
+    def record_success(self, name: str, latency: float):
+        with self._lock:
+            breaker = self.breaker(name)
+            breaker.record(latency > breaker.slow_call)
+            self._update(name, True, latency)
+
+    def record_failure(self, name: str, latency: Optional[float] = None):
+        with self._lock:
+            self.breaker(name).record(True)
+            self._update(name, False, latency)
+
+    def release(self, name: str):
+        with self._lock:
+            self.breaker(name).release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    **breaker.to_dict(),
+                    'score': round(self.score(name), 3),
+                    'success_rate': round(self._success_rate(name), 3),
+                    'avg_latency_ms': round(self._latency[name] * 1000, 1) if name in self._latency else None
+                }
+                for name, breaker in self._breakers.items()
+            }
@@ -0,0 +1,223 @@
+"""Deadline-bounded, hedged calls across AI providers"""
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from provider_health import CircuitOpenError, ProviderHealth
+
+logger = logging.getLogger(__name__)
+
+# Hedge after this long until a provider has enough samples for a p95
+HEDGE_DEFAULT_DELAY = float(os.getenv("AI_HEDGE_DEFAULT_DELAY", "2.0"))
+HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "0.1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_PERCENTILE = 0.95
+
+# Upper bounds (seconds) of the latency histogram buckets; the last is open-ended
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LATENCY_WINDOW = 200
+
+
+class LatencyHistogram:
+    """Bucketed latency counts plus a rolling window for percentiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window: int = LATENCY_WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.recent.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.recent)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        samples = sorted(self.recent)
+        return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}s" for bound in self.buckets] + ['inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'p50_ms': _ms(self.percentile(0.5)),
+            'p95_ms': _ms(self.percentile(0.95)),
+            'p99_ms': _ms(self.percentile(0.99))
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class _ProviderStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.attempts = 0
+        self.wins = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.hedged = 0
+        self.short_circuited = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'attempts': self.attempts,
+            'wins': self.wins,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'hedged_after': self.hedged,
+            'short_circuited': self.short_circuited,
+            'latency': self.latency.to_dict()
+        }
+
+
+@dataclass
+class ProviderAttempt:
+    """One provider's call for a single request"""
+    name: str
+    call: Callable[[], Awaitable[Dict[str, Any]]]
+    deadline: float
+
+
+class AllProvidersFailed(Exception):
+    def __init__(self, errors: Dict[str, Exception]):
+        super().__init__(", ".join(f"{name}: {error!r}" for name, error in errors.items()) or "no providers")
+        self.errors = errors
+
+
+class ProviderScheduler:
+    """Runs provider attempts in order, hedging slow ones.
+
+    The first attempt starts immediately. If it hasn't answered by its
+    provider's p95 latency, the next attempt starts alongside it (a hedge);
+    if it fails outright, the next starts at once. The first success wins
+    and every other attempt still running is cancelled. Each attempt is
+    bounded by its own deadline.
+
+    With ``health``, outcomes feed the providers' circuit breakers and an
+    attempt whose breaker is open is skipped without being called.
+    """
+
+    def __init__(
+        self,
+        default_delay: float = HEDGE_DEFAULT_DELAY,
+        min_delay: float = HEDGE_MIN_DELAY,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        health: Optional[ProviderHealth] = None
+    ):
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.health = health
+        self._stats: Dict[str, _ProviderStats] = {}
+
+    def stats_for(self, name: str) -> _ProviderStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _ProviderStats()
+        return stats
+
+    def hedge_delay(self, attempt: ProviderAttempt) -> float:
+        """How long to give ``attempt`` before starting the next provider"""
+        latency = self.stats_for(attempt.name).latency
+        if len(latency) < self.min_samples:
+            delay = self.default_delay
+        else:
+            delay = max(latency.percentile(HEDGE_PERCENTILE), self.min_delay)
+        return min(delay, attempt.deadline)
+
+    async def _attempt(self, attempt: ProviderAttempt) -> Dict[str, Any]:
+        return await asyncio.wait_for(attempt.call(), attempt.deadline)
+
+    async def run(self, attempts: List[ProviderAttempt]) -> Dict[str, Any]:
+        """Result of the first attempt to succeed; AllProvidersFailed if none do"""
+        pending: Dict[asyncio.Task, tuple] = {}
+        errors: Dict[str, Exception] = {}
+        remaining = list(attempts)
+        hedge_at = None
+
+        def launch():
+            nonlocal hedge_at
+            hedge_at = None
+            while remaining:
+                attempt = remaining.pop(0)
+                if self.health is not None and not self.health.allow(attempt.name):
+                    self.stats_for(attempt.name).short_circuited += 1
+                    errors[attempt.name] = CircuitOpenError(attempt.name)
+                    continue
+                self.stats_for(attempt.name).attempts += 1
+                started = time.monotonic()
+                pending[asyncio.ensure_future(self._attempt(attempt))] = (attempt, started)
+                hedge_at = started + self.hedge_delay(attempt) if remaining else None
+                return
+
+        try:
+            while pending or remaining:
+                if not pending:
+                    launch()
+                    if not pending:
+                        break
+
+                timeout = max(hedge_at - time.monotonic(), 0) if hedge_at is not None else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # The newest attempt is past its p95: hedge with the next provider
+                    slow = max(pending.values(), key=lambda item: item[1])[0]
+                    self.stats_for(slow.name).hedged += 1
+                    logger.info(f"{slow.name} slower than usual, hedging with {remaining[0].name}")
+                    launch()
+                    continue
+
+                for task in done:
+                    attempt, started = pending.pop(task)
+                    stats = self.stats_for(attempt.name)
+                    elapsed = time.monotonic() - started
+                    try:
+                        result = task.result()
+                    except asyncio.TimeoutError as e:
+                        stats.timeouts += 1
+                        errors[attempt.name] = e
+                        self._record_failure(attempt.name, elapsed)
+                        logger.error(f"{attempt.name} missed its {attempt.deadline:g}s deadline")
+                    except Exception as e:
+                        stats.failures += 1
+                        errors[attempt.name] = e
+                        self._record_failure(attempt.name, elapsed)
+                        logger.error(f"{attempt.name} failed: {e}")
+                    else:
+                        stats.wins += 1
+                        stats.latency.observe(elapsed)
+                        if self.health is not None:
+                            self.health.record_success(attempt.name, elapsed)
+                        return result
+        finally:
+            # Cancel the losers (or everything, if we were cancelled ourselves)
+            for task, (attempt, _) in pending.items():
+                if not task.done():
+                    task.cancel()
+                    self.stats_for(attempt.name).cancelled += 1
+                # A cancelled call says nothing about the provider's health
+                if self.health is not None:
+                    self.health.release(attempt.name)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        raise AllProvidersFailed(errors)
+
+    def _record_failure(self, name: str, elapsed: float):
+        if self.health is not None:
+            self.health.record_failure(name, elapsed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: stats.to_dict() for name, stats in self._stats.items()}
@@ -0,0 +1,149 @@
+"""Delta coalescing for streamed chat responses"""
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many bytes of text are buffered...
+COALESCE_MAX_BYTES = int(os.getenv("STREAM_COALESCE_MAX_BYTES", "256"))
+# ...or once the oldest buffered delta is this old
+COALESCE_FLUSH_INTERVAL = float(os.getenv("STREAM_COALESCE_FLUSH_MS", "50")) / 1000
+
+# Bytes of framing around the JSON-escaped content of one SSE frame:
+# 'data: {"content": "' + '"}\n\n'
+SSE_FRAME_OVERHEAD = len(f"data: {json.dumps({'content': ''})}\n\n")
+SSE_DONE = "data: [DONE]\n\n"
+
+
+class CoalesceStats:
+    """Counters for one coalesced stream"""
+
+    def __init__(self):
+        self.deltas_in = 0
+        self.chunks_out = 0
+        self.bytes_in = 0
+
+    @property
+    def frames_saved(self) -> int:
+        return max(self.deltas_in - self.chunks_out, 0)
+
+    @property
+    def sse_bytes_saved(self) -> int:
+        """Framing bytes avoided versus one SSE frame per delta"""
+        return self.frames_saved * SSE_FRAME_OVERHEAD
+
+    def to_dict(self) -> dict:
+        return {
+            'deltas_in': self.deltas_in,
+            'chunks_out': self.chunks_out,
+            'bytes_in': self.bytes_in,
+            'frames_saved': self.frames_saved,
+            'bytes_saved': self.sse_bytes_saved
+        }
+
+
+async def _as_async(deltas: Union[Iterable[str], AsyncIterator[str]]) -> AsyncIterator[str]:
+    if hasattr(deltas, '__aiter__'):
+        async for delta in deltas:
+            yield delta
+    else:
+        for delta in deltas:
+            yield delta
+
+
+async def coalesce(
+    deltas: Union[Iterable[str], AsyncIterator[str]],
+    max_bytes: int = COALESCE_MAX_BYTES,
+    flush_interval: float = COALESCE_FLUSH_INTERVAL,
+    stats: Optional[CoalesceStats] = None
+) -> AsyncIterator[str]:
+    """Join small text deltas into larger chunks.
+
+    A chunk is emitted when the buffer reaches ``max_bytes`` or when
+    ``flush_interval`` seconds have passed since the first buffered delta,
+    even if the upstream is stalled.
+    """
+    stats = stats or CoalesceStats()
+    source = _as_async(deltas).__aiter__()
+    buffer = []
+    buffered_bytes = 0
+    first_buffered_at = 0.0
+    pending = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(source.__anext__())
+
+            timeout = None
+            if buffer:
+                timeout = max(first_buffered_at + flush_interval - time.monotonic(), 0)
+
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                # Upstream is slow: flush what we have so the user sees progress
+                stats.chunks_out += 1
+                yield "".join(buffer)
+                buffer, buffered_bytes = [], 0
+                continue
+
+            try:
+                delta = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            if not delta:
+                continue
+
+            size = len(delta.encode('utf-8'))
+            stats.deltas_in += 1
+            stats.bytes_in += size
+            if not buffer:
+                first_buffered_at = time.monotonic()
+            buffer.append(delta)
+            buffered_bytes += size
+
+            if buffered_bytes >= max_bytes or time.monotonic() - first_buffered_at >= flush_interval:
+                stats.chunks_out += 1
+                yield "".join(buffer)
+                buffer, buffered_bytes = [], 0
+
+        if buffer:
+            stats.chunks_out += 1
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # The source must be idle before it can be closed
+            await asyncio.gather(pending, return_exceptions=True)
+        if hasattr(source, 'aclose'):
+            await source.aclose()
+
+
+def sse_frame(content: str) -> str:
+    """Format one Vercel AI SDK compatible SSE frame"""
+    return f"data: {json.dumps({'content': content})}\n\n"
+
+
+async def sse_stream(
+    deltas: Union[Iterable[str], AsyncIterator[str]],
+    max_bytes: int = COALESCE_MAX_BYTES,
+    flush_interval: float = COALESCE_FLUSH_INTERVAL
+) -> AsyncIterator[str]:
+    """Coalesce text deltas into SSE frames, terminated by [DONE]"""
+    stats = CoalesceStats()
+    try:
+        async for chunk in coalesce(deltas, max_bytes, flush_interval, stats):
+            yield sse_frame(chunk)
+        yield SSE_DONE
+    finally:
+        logger.info(
+            "SSE stream coalesced %d deltas into %d frames (%d frames, %d bytes saved)",
+            stats.deltas_in, stats.chunks_out, stats.frames_saved, stats.sse_bytes_saved
+        )
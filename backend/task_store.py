@@ -0,0 +1,232 @@
+"""Append-only JSON-lines task store used when tasks aren't kept in the database"""
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TASKS_LOG_FILE = os.getenv("TASKS_LOG_FILE", "tasks.jsonl")
+LEGACY_TASKS_FILE = 'tasks.json'
+# Rewrite the log once it holds this many times more records than live tasks
+COMPACT_RATIO = 2.0
+COMPACT_MIN_RECORDS = 1000
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(f, exclusive: bool):
+        # msvcrt only has exclusive locks
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f, exclusive: bool):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class TaskStore:
+    """Tasks kept in memory and persisted as an append-only log.
+
+    Each write appends one ``{"op": "put", "task": {...}}`` line, so inserts
+    are O(1) regardless of how many tasks exist. The in-memory index is
+    rebuilt from the log on startup, and before every operation the store
+    reads any lines other processes have appended since. A separate lock
+    file serializes writers across processes, and IDs are assigned under
+    that lock so concurrent writers never reuse one. A compacted log starts
+    with a ``{"op": "meta", "next_id": N}`` header, so the IDs of deleted
+    tasks aren't handed out again either.
+    """
+
+    def __init__(self, path: str = TASKS_LOG_FILE, legacy_path: Optional[str] = LEGACY_TASKS_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock_path = path + '.lock'
+        self._thread_lock = threading.Lock()
+        self._tasks: Dict[int, Dict[str, Any]] = {}
+        self._max_id = 0
+        self._records = 0
+        self._offset = 0
+        self._inode = None
+        self._loaded = False
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._thread_lock:
+            # The first load may migrate the legacy file, which needs the exclusive lock
+            exclusive = exclusive or not self._loaded
+            with open(self._lock_path, 'a+') as lock_file:
+                _lock_file(lock_file, exclusive)
+                try:
+                    if not self._loaded:
+                        self._load()
+                    else:
+                        self._catch_up()
+                    yield
+                finally:
+                    _unlock_file(lock_file)
+
+    def _load(self):
+        if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate_legacy()
+        self._reset()
+        self._catch_up()
+        self._loaded = True
+
+    def _reset(self):
+        self._tasks = {}
+        self._max_id = 0
+        self._records = 0
+        self._offset = 0
+        self._inode = None
+
+    def _catch_up(self):
+        """Apply lines appended since the last read, reloading after compaction"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if self._inode is not None and (stat.st_ino != self._inode or stat.st_size < self._offset):
+            # Another process compacted the log
+            self._reset()
+        self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Only consume complete lines; a writer may be mid-append
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping corrupt line in {self.path}")
+                continue
+            self._apply(record)
+        self._offset += end
+
+    def _apply(self, record: Dict[str, Any]):
+        self._records += 1
+        if record.get('op') == 'put':
+            task = record['task']
+            self._tasks[task['id']] = task
+            self._max_id = max(self._max_id, task['id'])
+        elif record.get('op') == 'delete':
+            self._tasks.pop(record['id'], None)
+        elif record.get('op') == 'meta':
+            self._max_id = max(self._max_id, record['next_id'] - 1)
+
+    def _append(self, record: Dict[str, Any]):
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self._offset:
+            # Holding the exclusive lock, leftover bytes can only be a torn write from a crash
+            os.truncate(self.path, self._offset)
+        with open(self.path, 'ab') as f:
+            f.write(line)
+        self._apply(record)
+        self._offset += len(line)
+        if self._inode is None:
+            self._inode = os.stat(self.path).st_ino
+
+    def _migrate_legacy(self):
+        """Import tasks.json into the log once"""
+        try:
+            with open(self.legacy_path, 'r') as f:
+                tasks = json.load(f)
+        except Exception as e:
+            logger.error(f"Could not read legacy task file {self.legacy_path}: {e}")
+            return
+
+        # tasks.json was rewritten without a lock, so racing writers could
+        # save two tasks under one id; keep both by renumbering the later one
+        max_id = max((task['id'] for task in tasks if isinstance(task.get('id'), int)), default=0)
+        seen = set()
+        renumbered = 0
+        for task in tasks:
+            if not isinstance(task.get('id'), int) or task['id'] in seen:
+                max_id += 1
+                task['id'] = max_id
+                renumbered += 1
+            seen.add(task['id'])
+        if renumbered:
+            logger.warning(f"Gave {renumbered} legacy tasks with duplicate or missing ids new ids")
+
+        self._write_snapshot(tasks, max_id + 1)
+        logger.info(f"Migrated {len(tasks)} tasks from {self.legacy_path} to {self.path}")
+
+    def _write_snapshot(self, tasks: List[Dict[str, Any]], next_id: int):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps({'op': 'meta', 'next_id': next_id}) + '\n')
+            for task in tasks:
+                f.write(json.dumps({'op': 'put', 'task': task}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _maybe_compact(self):
+        live = len(self._tasks)
+        if self._records < COMPACT_MIN_RECORDS or self._records < live * COMPACT_RATIO:
+            return
+        self._write_snapshot(sorted(self._tasks.values(), key=lambda task: task['id']), self._max_id + 1)
+        self._reset()
+        self._catch_up()
+        logger.info(f"Compacted {self.path} to {live} tasks")
+
+    def create(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new task, assigning its id and created_at"""
+        with self._locked(exclusive=True):
+            new_task = dict(task)
+            new_task['id'] = self._max_id + 1
+            new_task.setdefault('created_at', datetime.now().isoformat())
+            self._append({'op': 'put', 'task': new_task})
+            self._maybe_compact()
+            return dict(new_task)
+
+    def update(self, task_id: int, **fields) -> Optional[Dict[str, Any]]:
+        with self._locked(exclusive=True):
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            updated = {**task, **fields, 'id': task_id}
+            self._append({'op': 'put', 'task': updated})
+            self._maybe_compact()
+            return dict(updated)
+
+    def delete(self, task_id: int) -> bool:
+        with self._locked(exclusive=True):
+            if task_id not in self._tasks:
+                return False
+            self._append({'op': 'delete', 'id': task_id})
+            self._maybe_compact()
+            return True
+
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        with self._locked(exclusive=False):
+            task = self._tasks.get(task_id)
+            return dict(task) if task else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All tasks in creation order"""
+        with self._locked(exclusive=False):
+            return [dict(self._tasks[task_id]) for task_id in sorted(self._tasks)]
+
+
+# Global task store
+task_store = TaskStore()
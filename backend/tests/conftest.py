@@ -0,0 +1,40 @@
+"""Shared test setup: backend modules on sys.path and a throwaway SQLite database"""
+import os
+import sys
+import asyncio
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Must be set before config/database are imported
+_tmp_dir = tempfile.mkdtemp(prefix="aether-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+
+
+@pytest.fixture
+def db():
+    """Fresh tables for each test"""
+    from database import engine
+    from models import Base
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a new loop, closing async DB connections before the loop goes away"""
+    from database import dispose_async_engine
+
+    async def _with_cleanup(coro):
+        try:
+            return await coro
+        finally:
+            await dispose_async_engine()
+
+    def _run(coro):
+        return asyncio.run(_with_cleanup(coro))
+    return _run
@@ -0,0 +1,118 @@
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import agent_router
+from agent_cache import DecisionCache, InMemoryCacheBackend
+from tool_executor import ToolExecutor
+
+
+class FakeClock:
+    today = datetime(2024, 1, 1, 9)
+
+    @classmethod
+    def now(cls):
+        return cls.today
+
+
+class FakeModel:
+    """Chat completions that pick get_events for 'tomorrow', resolved against FakeClock,
+    then phrase a reply from the tool result"""
+
+    def __init__(self):
+        self.calls = 0
+        self.selections = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        if messages[-1]['role'] == 'tool':
+            message = SimpleNamespace(content=f"You have: {messages[-1]['content']}", tool_calls=None)
+        else:
+            self.selections += 1
+            tomorrow = FakeClock.today.replace(day=FakeClock.today.day + 1).date().isoformat()
+            call = SimpleNamespace(id='call-1', function=SimpleNamespace(
+                name='get_events', arguments=json.dumps({'date_str': tomorrow})
+            ))
+            message = SimpleNamespace(content=None, tool_calls=[call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_cached_decisions_do_not_outlive_the_day(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(agent_router, 'datetime', FakeClock)
+    monkeypatch.setattr(FakeClock, 'today', datetime(2024, 1, 1, 9))
+    monkeypatch.setattr(agent_router, 'llm_enabled', lambda: True)
+    monkeypatch.setattr(agent_router, 'llm_clients', SimpleNamespace(get_client=lambda: model))
+    monkeypatch.setattr(agent_router, 'decision_cache', DecisionCache(InMemoryCacheBackend()))
+    monkeypatch.setattr(agent_router, '_call_tool', lambda name, args: f"{name} {args['date_str']}")
+
+    assert agent_router.run_agent("what's on tomorrow") == "You have: get_events 2024-01-02"
+    # Same day: the tool choice is replayed from the cache, only the reply is phrased
+    assert agent_router.run_agent("what's on tomorrow") == "You have: get_events 2024-01-02"
+    assert model.selections == 1 and model.calls == 3
+
+    monkeypatch.setattr(FakeClock, 'today', datetime(2024, 1, 2, 9))
+    assert agent_router.run_agent("what's on tomorrow") == "You have: get_events 2024-01-03"
+    assert model.selections == 2 and model.calls == 5
+
+
+def test_cache_hits_reply_like_misses_in_async_runs(run, monkeypatch):
+    model = FakeModel()
+
+    async def create(**kwargs):
+        return model.create(**kwargs)
+
+    async_model = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(agent_router, 'datetime', FakeClock)
+    monkeypatch.setattr(FakeClock, 'today', datetime(2024, 1, 1, 9))
+    monkeypatch.setattr(agent_router, 'llm_enabled', lambda: True)
+    monkeypatch.setattr(agent_router, 'llm_clients', SimpleNamespace(get_async_client=lambda: async_model))
+    monkeypatch.setattr(agent_router, 'decision_cache', DecisionCache(InMemoryCacheBackend()))
+    monkeypatch.setattr(agent_router, '_call_tool', lambda name, args: f"{name} {args['date_str']}")
+
+    miss = run(agent_router.run_agent_async("what's on tomorrow"))
+    hit = run(agent_router.run_agent_async("What's on tomorrow?"))
+    assert miss == hit == "You have: get_events 2024-01-02"
+    assert model.selections == 1 and model.calls == 3
+
+
+def _executor_with_slow_tools(monkeypatch):
+    executor = ToolExecutor(max_workers=4)
+    monkeypatch.setattr(agent_router, 'tool_executor', executor)
+    monkeypatch.setitem(agent_router.TOOL_TIMEOUTS, 'get_tasks', 0.05)
+
+    def slow_tool(name, args):
+        time.sleep(0.2 if name == 'get_tasks' else 0.1)
+        return f"{name} done"
+
+    monkeypatch.setattr(agent_router, '_call_tool', slow_tool)
+    return executor
+
+
+CALLS = [('get_events', {}), ('book_appointment', {}), ('get_tasks', {})]
+
+
+def test_tool_calls_run_concurrently_on_the_shared_executor(monkeypatch):
+    executor = _executor_with_slow_tools(monkeypatch)
+    started = time.monotonic()
+    results = agent_router._run_tool_calls(CALLS)
+    elapsed = time.monotonic() - started
+
+    assert results[:2] == ["get_events done", "book_appointment done"]
+    assert results[2] == agent_router._tool_timeout_message('get_tasks')
+    assert elapsed < 0.18
+    assert executor.get_stats()['tools']['calendar']['calls'] == 2
+    executor.shutdown(wait=True)
+
+
+def test_async_tool_calls_use_the_shared_executor(run, monkeypatch):
+    executor = _executor_with_slow_tools(monkeypatch)
+    results = run(agent_router._run_tool_calls_async(CALLS))
+
+    assert results[:2] == ["get_events done", "book_appointment done"]
+    assert results[2] == agent_router._tool_timeout_message('get_tasks')
+    stats = executor.get_stats()['tools']
+    assert stats['calendar']['calls'] == 2 and stats['tasks']['timeouts'] == 1
+    executor.shutdown(wait=True)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+
+import backplane
+from backplane import InProcessBackplane, InProcessHub, RedisBackplane
+from websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        self.frames.append(json.loads(payload))
+
+    async def close(self, code=1000):
+        pass
+
+    def contents(self):
+        return [frame.get('content') for frame in self.frames if frame.get('type') != 'system']
+
+
+def _workers(ttl=30):
+    hub = InProcessHub()
+    return (
+        hub,
+        ConnectionManager(backplane=InProcessBackplane(hub, worker_id='w1', ttl=ttl)),
+        ConnectionManager(backplane=InProcessBackplane(hub, worker_id='w2', ttl=ttl))
+    )
+
+
+async def _shutdown(*managers):
+    for manager in managers:
+        for session_id in manager.get_active_sessions():
+            manager.disconnect(session_id)
+        await manager.stop()
+
+
+async def _settle():
+    # Let backplane deliveries and socket writers run
+    await asyncio.sleep(0.05)
+
+
+def test_user_broadcast_reaches_sessions_on_other_workers(run):
+    async def scenario():
+        _, first, second = _workers()
+        local, remote, bystander = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await first.connect(local, 'alice', 's1')
+        await second.connect(remote, 'alice', 's2')
+        await second.connect(bystander, 'bob', 's3')
+
+        delivered = await first.broadcast_to_user('alice', {'type': 'notification', 'content': 'meeting moved'})
+        await first.broadcast_all({'type': 'system_notice', 'content': 'maintenance'})
+        await _settle()
+        stats = first.get_stats()['backplane'], second.get_stats()['backplane']
+        await _shutdown(first, second)
+        return delivered, local, remote, bystander, stats
+
+    delivered, local, remote, bystander, (sent, received) = run(scenario())
+    assert delivered == 1
+    assert local.contents() == ['meeting moved', 'maintenance']
+    assert remote.contents() == ['meeting moved', 'maintenance']
+    assert bystander.contents() == ['maintenance']
+    assert sent['published'] == 2 and received['received'] == 2
+
+
+def test_presence_expires_without_heartbeats(run):
+    async def scenario():
+        _, first, second = _workers(ttl=0.05)
+        await first.connect(FakeWebSocket(), 'alice', 's1')
+        before = await second.is_user_online_anywhere('alice')
+        await asyncio.sleep(0.1)
+        after = await second.is_user_online_anywhere('alice')
+        # Nothing is published to a worker whose presence has lapsed
+        routed = await second.backplane.publish_to_user('alice', {'content': 'lost'})
+        await _shutdown(first, second)
+        return before, after, routed
+
+    assert run(scenario()) == (True, False, 0)
+
+
+def test_stop_and_disconnect_remove_presence(run):
+    async def scenario():
+        hub, first, second = _workers()
+        await second.start()
+        await first.connect(FakeWebSocket(), 'alice', 's1')
+        await first.connect(FakeWebSocket(), 'bob', 's2')
+        first.disconnect('s2')
+        await _settle()
+        bob_online = await second.is_user_online_anywhere('bob')
+        alice_online = await second.is_user_online_anywhere('alice')
+        await first.stop()
+        alice_after_stop = await second.is_user_online_anywhere('alice')
+        subscribed = {worker for channel in hub.subscribers.values() for worker in channel}
+        await _shutdown(first, second)
+        return bob_online, alice_online, alice_after_stop, subscribed
+
+    assert run(scenario()) == (False, True, False, {'w2'})
+
+
+class FakePubSub:
+    """redis.asyncio PubSub whose connection the test can drop"""
+
+    def __init__(self, fail_subscribe=False):
+        self.fail_subscribe = fail_subscribe
+        self.items = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        if self.fail_subscribe:
+            raise ConnectionError("Connection refused")
+        for channel in channels:
+            self.items.put_nowait({'type': 'subscribe', 'channel': channel, 'data': 1})
+
+    async def listen(self):
+        while True:
+            item = await self.items.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def publish(self, envelope):
+        self.items.put_nowait({'type': 'message', 'data': json.dumps(envelope)})
+
+    async def unsubscribe(self):
+        pass
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self, failed_subscribes=0):
+        self.failed_subscribes = failed_subscribes
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub(fail_subscribe=len(self.pubsubs) < self.failed_subscribes)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def aclose(self):
+        pass
+
+
+def _redis_backplane(client):
+    redis_backplane = RedisBackplane("redis://localhost:6379/0", worker_id='w1')
+    redis_backplane.client = client
+    return redis_backplane
+
+
+def test_redis_reader_resubscribes_after_the_connection_drops(run, monkeypatch):
+    monkeypatch.setattr(backplane, 'RECONNECT_MIN_DELAY', 0.01)
+    client = FakeRedis()
+    received = []
+
+    async def deliver(envelope):
+        received.append(envelope['message']['content'])
+
+    async def scenario():
+        redis_backplane = _redis_backplane(client)
+        await redis_backplane.start(deliver)
+        client.pubsubs[0].publish({'message': {'content': 'before'}})
+        await _settle()
+        client.pubsubs[0].items.put_nowait(ConnectionError("Connection reset by peer"))
+        await _settle()
+        client.pubsubs[-1].publish({'message': {'content': 'after'}})
+        await _settle()
+        stats = redis_backplane.get_stats()
+        await redis_backplane.stop()
+        return stats
+
+    stats = run(scenario())
+    assert received == ['before', 'after']
+    assert len(client.pubsubs) == 2 and client.pubsubs[0].closed
+    assert stats['reconnects'] == 1 and stats['received'] == 2
+
+
+def test_redis_reader_backs_off_while_redis_is_down(run, monkeypatch, caplog):
+    monkeypatch.setattr(backplane, 'RECONNECT_MIN_DELAY', 0.01)
+    monkeypatch.setattr(backplane, 'RECONNECT_MAX_DELAY', 0.04)
+    # The first subscribe succeeds; the next four are refused
+    client = FakeRedis()
+    received = []
+
+    async def deliver(envelope):
+        received.append(envelope['message']['content'])
+
+    async def scenario():
+        redis_backplane = _redis_backplane(client)
+        await redis_backplane.start(deliver)
+        client.failed_subscribes = 5
+        client.pubsubs[0].items.put_nowait(ConnectionError("Connection reset by peer"))
+        await asyncio.sleep(0.3)
+        client.pubsubs[-1].publish({'message': {'content': 'back'}})
+        await _settle()
+        stats = redis_backplane.get_stats()
+        await redis_backplane.stop()
+        return stats
+
+    with caplog.at_level(logging.WARNING, logger='backplane'):
+        stats = run(scenario())
+    delays = [record.getMessage().rsplit(' ', 1)[1] for record in caplog.records
+              if 'reconnecting in' in record.getMessage()]
+    assert delays == ['0.01s', '0.02s', '0.04s', '0.04s', '0.04s']
+    assert stats['reconnects'] == 5 and received == ['back']
+    assert all(pubsub.closed for pubsub in client.pubsubs[:-1])
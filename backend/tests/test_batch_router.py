@@ -0,0 +1,97 @@
+import asyncio
+
+import agent_router
+from batch_router import BatchStats, RateLimiter, route_batch
+
+MESSAGES = [
+    "hello there",
+    "create task buy milk",
+    "what can you do",
+    "thanks!",
+    "show my tasks",
+    "qwerty",
+]
+
+
+def test_chat_family_goes_to_llm_and_results_keep_input_order(run, monkeypatch):
+    asked = []
+
+    async def fake_select_tools(message):
+        asked.append(message)
+        # Earlier messages answer last, so ordering can't come from completion order
+        await asyncio.sleep(0.01 * (len(MESSAGES) - MESSAGES.index(message)))
+        if message == "qwerty":
+            return [('get_tasks', {})]
+        return []
+
+    monkeypatch.setattr(agent_router, 'select_tools_async', fake_select_tools)
+
+    async def scenario():
+        stats = BatchStats()
+        results = [result async for result in route_batch(MESSAGES, stats, use_llm=True, rate_per_second=1000)]
+        return results, stats
+
+    results, stats = run(scenario())
+    assert [result['message'] for result in results] == MESSAGES
+    assert sorted(asked) == sorted(["hello there", "what can you do", "thanks!", "qwerty"])
+    assert [result['source'] for result in results] == ['llm', 'rule_based', 'llm', 'llm', 'rule_based', 'llm']
+    assert results[1]['intent'] == 'create_task' and results[4]['intent'] == 'list_tasks'
+    assert results[5]['intent'] == 'list_tasks' and results[5]['tools'] == [{'name': 'get_tasks', 'args': {}}]
+    assert stats.llm == 4 and stats.rule_based == 2
+
+
+def test_llm_failure_keeps_rule_based_result(run, monkeypatch):
+    async def failing_select_tools(message):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(agent_router, 'select_tools_async', failing_select_tools)
+
+    async def scenario():
+        stats = BatchStats()
+        results = [result async for result in route_batch(["hello there"], stats, use_llm=True, rate_per_second=1000)]
+        return results, stats
+
+    results, stats = run(scenario())
+    assert results[0]['intent'] == 'greeting' and results[0]['source'] == 'rule_based'
+    assert stats.llm_errors == 1
+
+
+def test_zero_rate_means_no_rate_limit(run, monkeypatch):
+    async def fake_select_tools(message):
+        return []
+
+    monkeypatch.setattr(agent_router, 'select_tools_async', fake_select_tools)
+
+    async def scenario():
+        limiter = RateLimiter(0)
+        await asyncio.wait_for(asyncio.gather(*[limiter.acquire() for _ in range(100)]), 0.5)
+        stats = BatchStats()
+        results = [result async for result in route_batch(["hello", "thanks", "qwerty"], stats,
+                                                          use_llm=True, rate_per_second=0)]
+        return results, stats
+
+    results, stats = run(scenario())
+    assert [result['source'] for result in results] == ['llm'] * 3
+    assert stats.llm == 3
+
+
+def test_average_call_time_counts_failed_calls_too(run, monkeypatch):
+    async def half_failing_select_tools(message):
+        await asyncio.sleep(0.05)
+        if message.startswith("hello"):
+            raise RuntimeError("provider down")
+        return []
+
+    monkeypatch.setattr(agent_router, 'select_tools_async', half_failing_select_tools)
+
+    async def scenario():
+        stats = BatchStats()
+        messages = ["hello a", "hello b", "thanks a", "thanks b"]
+        async for _ in route_batch(messages, stats, use_llm=True, rate_per_second=1000):
+            pass
+        return stats.to_dict()
+
+    stats = run(scenario())
+    assert stats['llm'] == 2 and stats['llm_errors'] == 2 and stats['llm_calls'] == 4
+    # Each call took ~50ms; dividing four calls' time by two successes would double it
+    assert 0.04 <= stats['llm_avg_call_seconds'] < 0.08
@@ -0,0 +1,147 @@
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from googleapiclient.errors import HttpError
+
+from calendar_cache import CalendarEventCache
+from enhanced_tools import EnhancedCalendarTools
+
+
+def _event(event_id, start, hours=1, status='confirmed'):
+    return {
+        'id': event_id,
+        'status': status,
+        'summary': event_id,
+        'start': {'dateTime': start.isoformat() + 'Z'},
+        'end': {'dateTime': (start + timedelta(hours=hours)).isoformat() + 'Z'}
+    }
+
+
+def _parse(value):
+    return datetime.fromisoformat(value.replace('Z', ''))
+
+
+class FakeCalendarService:
+    """Stand-in for ``service.events().list(...).execute()`` with sync tokens and paging"""
+
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.stored = {}
+        self.changes = []
+        self.calls = []
+        self.expire_tokens = False
+        self.gate = None
+
+    def put(self, item):
+        self.stored[item['id']] = item
+        self.changes.append(item)
+
+    def cancel(self, event_id):
+        self.stored.pop(event_id)
+        self.changes.append({'id': event_id, 'status': 'cancelled'})
+
+    def events_list(self, params):
+        if self.gate is not None:
+            self.gate.wait(2)
+        self.calls.append(params)
+        if 'syncToken' in params:
+            if self.expire_tokens:
+                raise HttpError(SimpleNamespace(status=410, reason='Gone'), b'{}')
+            items = self.changes[int(params['syncToken']):]
+        else:
+            low, high = _parse(params['timeMin']), _parse(params['timeMax'])
+            items = [
+                item for item in self.stored.values()
+                if _parse(item['end']['dateTime']) > low and _parse(item['start']['dateTime']) < high
+            ]
+        offset = int(params.get('pageToken', 0))
+        page = {'items': items[offset:offset + self.page_size]}
+        if offset + self.page_size < len(items):
+            page['nextPageToken'] = str(offset + self.page_size)
+        else:
+            page['nextSyncToken'] = str(len(self.changes))
+        return page
+
+    def events(self):
+        return SimpleNamespace(list=lambda **params: SimpleNamespace(execute=lambda: self.events_list(params)))
+
+
+def _now():
+    return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+def test_full_sync_is_bounded_and_later_syncs_use_the_token():
+    now = _now()
+    service = FakeCalendarService()
+    for i in range(3):
+        service.put(_event(f'e{i}', now + timedelta(hours=2 * i)))
+    service.put(_event('ancient', now - timedelta(days=400)))
+    cache = CalendarEventCache(max_staleness=60, past_days=1, future_days=30)
+
+    cache.ensure_fresh(service)
+    full = service.calls[0]
+    assert now - timedelta(days=2) < _parse(full['timeMin']) < now
+    assert now + timedelta(days=29) < _parse(full['timeMax']) < now + timedelta(days=31)
+    assert 'syncToken' not in full
+    assert len(service.calls) == 2  # three events over pages of two
+    assert {event['id'] for event in cache.events_between(now - timedelta(days=1), now + timedelta(days=1))} == {'e0', 'e1', 'e2'}
+
+    service.cancel('e1')
+    service.put(_event('e3', now + timedelta(days=3)))
+    service.put(_event('far', now + timedelta(days=365)))
+    cache.ensure_fresh(service, force=True)
+    incremental = service.calls[-1]
+    assert incremental['syncToken'] and 'timeMin' not in incremental
+    assert set(cache._state('primary').events) == {'e0', 'e2', 'e3'}
+    assert cache.get_stats()['calendars']['primary']['incremental_syncs'] == 1
+
+
+def test_expired_sync_token_falls_back_to_full_sync():
+    service = FakeCalendarService()
+    service.put(_event('e0', _now() + timedelta(hours=1)))
+    cache = CalendarEventCache()
+    cache.ensure_fresh(service)
+
+    service.expire_tokens = True
+    cache.ensure_fresh(service, force=True)
+    assert 'timeMin' in service.calls[-1]
+    assert cache.get_stats()['calendars']['primary']['full_syncs'] == 2
+
+
+def test_stale_snapshot_is_served_while_syncing_in_background():
+    now = _now()
+    service = FakeCalendarService()
+    service.put(_event('e0', now + timedelta(hours=1)))
+    cache = CalendarEventCache(max_staleness=0)
+    cache.ensure_fresh(service)
+
+    service.put(_event('e1', now + timedelta(hours=3)))
+    service.gate = threading.Event()
+    cache.ensure_fresh(service)
+    # The read doesn't wait for the sync that is still blocked in the API call
+    assert [event['id'] for event in cache.events_between(now, now + timedelta(days=1))] == ['e0']
+
+    service.gate.set()
+    cache._state('primary').refresher.join(2)
+    assert [event['id'] for event in cache.events_between(now, now + timedelta(days=1))] == ['e0', 'e1']
+
+
+def test_reads_outside_the_window_go_to_google():
+    now = _now()
+    service = FakeCalendarService()
+    service.put(_event('soon', now + timedelta(days=1)))
+    later = now + timedelta(days=60)
+    service.put(_event('later', later))
+    tools = EnhancedCalendarTools.__new__(EnhancedCalendarTools)
+    tools.calendar_service = SimpleNamespace(service=service, is_available=lambda: True)
+    tools.event_cache = CalendarEventCache(future_days=30)
+
+    assert [event['id'] for event in tools._events_between(now, now + timedelta(days=2))] == ['soon']
+    assert [event['id'] for event in tools._events_between(later, later + timedelta(days=1))] == ['later']
+    assert not tools.event_cache.covers(later, later + timedelta(days=1))
+    assert 'timeMin' in service.calls[-1] and 'orderBy' in service.calls[-1]
+
+    # Slots past the window are checked against the events Google returns
+    slots = tools.find_free_slots(timedelta(hours=1), after=later.replace(hour=0), count=50)
+    assert slots and all(not (start < later + timedelta(hours=1) and later < end) for start, end in slots)
@@ -0,0 +1,33 @@
+from context_window import ContextAssembler, TokenCounter
+
+
+def _history(turns, words=30):
+    return [{'content': f"turn {i} " + "word " * words, 'is_user': i % 2 == 0} for i in range(turns)]
+
+
+def test_short_history_is_sent_whole():
+    window = ContextAssembler().assemble("system", "hi", _history(4))
+    assert window.included == 4 and window.summarized == 0
+    assert [message['role'] for message in window.messages] == ['system', 'user', 'assistant', 'user', 'assistant', 'user']
+
+
+def test_summarized_counts_only_turns_in_the_summary():
+    assembler = ContextAssembler(TokenCounter(), budget=600, max_message_tokens=100, summary_tokens=120)
+    context = _history(60)
+    window = assembler.assemble("system", "hi", context)
+
+    summary = next(message['content'] for message in window.messages[1:] if message['role'] == 'system')
+    summary_lines = summary.splitlines()[1:]
+    left_out = len(context) - window.included
+    assert 0 < window.summarized == len(summary_lines) < left_out
+    # The summary keeps the newest of the turns it had to leave out
+    assert summary_lines[-1].startswith(f"- {'User' if left_out % 2 else 'Assistant'}: turn {left_out - 1} ")
+    assert window.tokens <= assembler.budget
+    assert window.report()['summarized_messages'] == window.summarized
+
+
+def test_oversized_message_is_truncated():
+    assembler = ContextAssembler(TokenCounter(), max_message_tokens=50)
+    window = assembler.assemble("system", "hi", [{'content': "word " * 2000, 'is_user': True}])
+    assert window.truncated == 1
+    assert window.messages[1]['content'].endswith("[...]")
@@ -0,0 +1,86 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from conversation_store import ConversationStore
+from database import async_session_scope
+from models import ChatSession, Message
+from write_behind import WriteBehindQueue
+
+
+async def _stored_messages(session_id):
+    async with async_session_scope() as db:
+        return (await db.execute(
+            select(func.count()).select_from(Message).where(Message.session_id == session_id)
+        )).scalar()
+
+
+def test_ring_buffer_keeps_most_recent_messages(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        store = ConversationStore(capacity=3, writes=queue)
+        for i in range(5):
+            store.append('s1', 'u1', f'm{i}', is_user=i % 2 == 0)
+        history = await store.history('s1')
+        await queue.stop()
+        return history
+
+    history = run(scenario())
+    assert [message['content'] for message in history] == ['m2', 'm3', 'm4']
+    assert [message['is_user'] for message in history] == [True, False, True]
+
+
+def test_history_is_written_once_with_its_session_row(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        store = ConversationStore(writes=queue)
+        store.append('s1', 'u1', 'hello', is_user=True)
+        store.append('s1', 'u1', 'hi there', is_user=False, metadata={'source': 'rule_based'})
+        await store.close_session('s1')
+        async with async_session_scope() as session:
+            sessions = (await session.execute(select(ChatSession))).scalars().all()
+        return [(row.id, row.user_id) for row in sessions], await _stored_messages('s1')
+
+    sessions, messages = run(scenario())
+    assert sessions == [('s1', 'u1')]
+    assert messages == 2
+
+
+def test_evicted_session_is_flushed_and_reloads(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        store = ConversationStore(max_sessions=1, writes=queue)
+        store.append('s1', 'u1', 'first session', is_user=True)
+        store.append('s2', 'u2', 'second session', is_user=True)
+        # Eviction flushes in the background; give it a turn of the loop
+        await asyncio.sleep(0.1)
+        written = await _stored_messages('s1')
+
+        reloaded = ConversationStore(writes=queue)
+        history = await reloaded.history('s1')
+        await queue.stop()
+        return store.get_stats(), written, history
+
+    stats, written, history = run(scenario())
+    assert stats['evicted'] == 1 and stats['sessions_in_memory'] == 1
+    assert written == 1
+    assert [message['content'] for message in history] == ['first session']
+
+
+def test_reload_merges_database_history_with_new_messages(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        before = ConversationStore(writes=queue)
+        before.append('s1', 'u1', 'old question', is_user=True)
+        before.append('s1', 'u1', 'old answer', is_user=False)
+        await before.close_session('s1')
+
+        # A new process: a message arrives before the history is first read
+        after = ConversationStore(writes=queue)
+        after.append('s1', 'u1', 'new question', is_user=True)
+        history = await after.history('s1')
+        await queue.stop()
+        return history
+
+    history = run(scenario())
+    assert [message['content'] for message in history] == ['old question', 'old answer', 'new question']
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select, text
+
+from config import settings
+from database import async_database_url, async_session_scope, engine, pool_stats, session_scope
+from models import Task
+
+
+def _count(user_id):
+    with session_scope() as db:
+        return db.execute(select(func.count()).select_from(Task).where(Task.user_id == user_id)).scalar()
+
+
+def test_session_scope_commits_on_success(db):
+    with session_scope() as session:
+        session.add(Task(user_id='u1', title='kept'))
+    assert _count('u1') == 1
+
+
+def test_session_scope_rolls_back_and_returns_connection_on_error(db):
+    checked_out = pool_stats.checked_out
+    with pytest.raises(RuntimeError):
+        with session_scope() as session:
+            session.add(Task(user_id='u2', title='discarded'))
+            session.flush()
+            raise RuntimeError("boom")
+    assert _count('u2') == 0
+    assert pool_stats.checked_out == checked_out
+
+
+def test_async_session_scope_rolls_back_on_error(db, run):
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async with async_session_scope() as session:
+                session.add(Task(user_id='u3', title='discarded'))
+                await session.flush()
+                raise RuntimeError("boom")
+        async with async_session_scope() as session:
+            session.add(Task(user_id='u3', title='kept'))
+
+    run(scenario())
+    assert _count('u3') == 1
+
+
+def test_sqlite_file_database_uses_wal(db):
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+
+def test_async_database_url_maps_drivers():
+    assert async_database_url("sqlite:///./aether.db") == "sqlite+aiosqlite:///./aether.db"
+    assert async_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert async_database_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_connections_stay_bounded_under_concurrent_load(db):
+    """Short soak; benchmarks/soak_sessions.py runs the full 10k operations"""
+    pool_stats.peak_checked_out = pool_stats.checked_out
+
+    def work(i):
+        if i % 5:
+            return _count('soak')
+        with session_scope() as session:
+            session.add(Task(user_id='soak', title=f'op {i}'))
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(work, range(1000)))
+
+    assert pool_stats.checked_out == 0
+    assert pool_stats.peak_checked_out <= settings.db_pool_size + settings.db_max_overflow
+    assert engine.pool.checkedin() <= settings.db_pool_size
+    assert _count('soak') == 200
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import enhanced_tools
+from database import session_scope
+from enhanced_tools import task_tools
+from models import Task
+from task_store import TaskStore
+from write_behind import write_queue
+
+
+def test_consecutive_async_task_creations_commit_and_list(db, run):
+    async def scenario():
+        first = await asyncio.wait_for(task_tools.create_task_async("Create task review docs", "u1"), 3)
+        second = await asyncio.wait_for(task_tools.create_task_async("Create task send invoice", "u1"), 3)
+        listed = await task_tools.get_tasks_async("", "u1")
+        await write_queue.stop()
+        return first, second, listed
+
+    first, second, listed = run(scenario())
+    assert first['success'] and second['success']
+    assert {task['id'] for task in listed['tasks']} == {first['task']['id'], second['task']['id']}
+
+
+def test_create_task_async_times_out_when_write_stalls(db, run, monkeypatch):
+    async def scenario():
+        stalled = asyncio.get_running_loop().create_future()
+        monkeypatch.setattr(write_queue, 'add', lambda *args: stalled)
+        monkeypatch.setattr(enhanced_tools, 'TASK_WRITE_TIMEOUT', 0.05)
+        return await asyncio.wait_for(task_tools.create_task_async("Create task stuck", "u2"), 1)
+
+    result = run(scenario())
+    assert result['success'] is False
+    assert result['error_type'] == 'timeout'
+
+
+def _add_tasks(user_id, count):
+    created = datetime(2024, 1, 1)
+    with session_scope() as db:
+        db.add_all([
+            Task(user_id=user_id, title=f"task {i}", created_at=created + timedelta(minutes=i))
+            for i in range(count)
+        ])
+
+
+def test_get_tasks_without_a_limit_returns_every_task(db, run):
+    _add_tasks('u3', 60)
+
+    listed = task_tools.get_tasks("", "u3")
+    listed_async = run(task_tools.get_tasks_async("", "u3"))
+
+    assert len(listed['tasks']) == len(listed_async['tasks']) == 60
+    assert listed['next_cursor'] is None and listed_async['next_cursor'] is None
+
+
+def test_get_tasks_pages_cover_every_task_once(db):
+    _add_tasks('u4', 60)
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = task_tools.get_tasks("", "u4", limit=25, cursor=cursor)
+        seen += [task['title'] for task in page['tasks']]
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == [f"task {i}" for i in range(60)]
+
+
+def test_local_task_log_is_unbounded_unless_limited(tmp_path, monkeypatch):
+    store = TaskStore(str(tmp_path / 'tasks.jsonl'), legacy_path=None)
+    for i in range(55):
+        store.create({'title': f"local {i}", 'priority': 'medium', 'status': 'pending'})
+    monkeypatch.setattr(enhanced_tools, 'task_store', store)
+
+    assert len(task_tools.get_tasks("")['tasks']) == 55
+    first = task_tools.get_tasks("", limit=50)
+    rest = task_tools.get_tasks("", limit=50, cursor=first['next_cursor'])
+    assert len(first['tasks']) == 50 and len(rest['tasks']) == 5 and rest['next_cursor'] is None
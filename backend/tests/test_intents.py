@@ -0,0 +1,54 @@
+from intents import extract_slots, intent_engine
+
+
+def _missing(message):
+    match = intent_engine.classify(message)
+    assert match.intent == 'book_meeting'
+    return match.slots['missing']
+
+
+def test_booking_without_details_asks_for_all_of_them():
+    assert _missing("book a meeting") == ['time', 'attendees', 'title']
+
+
+def test_complete_booking_has_nothing_missing():
+    assert _missing("book a project review meeting tomorrow at 2pm with jo@example.com") == []
+
+
+def test_title_check_only_strips_lowercase_booking_words():
+    # Same as the agent's original str.replace check: capitalized words still count towards a title
+    assert 'title' in _missing("book meeting appointment 2pm with x")
+    assert 'title' not in _missing("Book Meeting Appointment 2pm with x")
+
+
+def test_slots_are_extracted_in_one_pass():
+    slots = extract_slots(
+        "Book a HIGH priority review Tomorrow at 2:30 PM and 10am, or on 2025-03-14, "
+        "with Jo.Smith@Example.com and sam@corp.io"
+    )
+    assert slots == {
+        'emails': ['Jo.Smith@Example.com', 'sam@corp.io'],
+        'times': ['2:30 pm', '10am'],
+        'dates': ['tomorrow', '2025-03-14'],
+        'priority': 'high'
+    }
+
+
+def test_slot_patterns_respect_word_boundaries():
+    slots = extract_slots("todays standup at 1030, room 12:305, ticket 2025-03-145, nextweek")
+    assert slots == {'emails': [], 'times': [], 'dates': [], 'priority': None}
+
+
+def test_first_priority_wins_and_urgent_means_high():
+    assert extract_slots("urgent: low priority follow-up")['priority'] == 'high'
+    assert extract_slots("low priority, not high priority")['priority'] == 'low'
+    assert extract_slots("next   week on Friday")['dates'] == ['next   week', 'friday']
+
+
+def test_booking_and_task_matches_carry_slots():
+    booking = intent_engine.classify("book a meeting monday 9 am with ana@example.com")
+    assert booking.slots['emails'] == ['ana@example.com']
+    assert booking.slots['times'] == ['9 am'] and booking.slots['dates'] == ['monday']
+    task = intent_engine.classify("create a medium priority task for Friday")
+    assert task.intent == 'create_task'
+    assert task.slots['priority'] == 'medium' and task.slots['dates'] == ['friday']
@@ -0,0 +1,78 @@
+import random
+from datetime import datetime, timedelta
+
+from interval_index import IntervalIndex
+
+MONDAY = datetime(2024, 1, 1)
+
+
+def _event(start, minutes):
+    return {'start': start, 'end': start + timedelta(minutes=minutes)}
+
+
+def _brute_force_overlaps(events, start, end):
+    return [event for event in events if event['start'] < end and event['end'] > start]
+
+
+def test_overlaps_treats_intervals_as_half_open():
+    index = IntervalIndex([_event(MONDAY.replace(hour=10), 60)])
+    assert index.overlaps(MONDAY.replace(hour=10, minute=30), MONDAY.replace(hour=10, minute=45))
+    assert not index.overlaps(MONDAY.replace(hour=11), MONDAY.replace(hour=12))
+    assert not index.overlaps(MONDAY.replace(hour=9), MONDAY.replace(hour=10))
+    assert not IntervalIndex([]).overlaps(MONDAY, MONDAY + timedelta(days=1))
+
+
+def test_long_event_before_window_is_found():
+    block = _event(MONDAY - timedelta(days=7), 60 * 24 * 14)
+    short = [_event(MONDAY - timedelta(days=6) + timedelta(hours=i), 30) for i in range(10)]
+    index = IntervalIndex(short + [block])
+    assert index.overlapping(MONDAY.replace(hour=9), MONDAY.replace(hour=10)) == [block]
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(7)
+    events = [_event(MONDAY + timedelta(minutes=rng.randrange(0, 60 * 24 * 30, 15)), rng.choice([15, 30, 60, 600]))
+              for _ in range(500)]
+    index = IntervalIndex(events)
+    for _ in range(200):
+        start = MONDAY + timedelta(minutes=rng.randrange(0, 60 * 24 * 30))
+        end = start + timedelta(minutes=rng.randrange(1, 300))
+        expected = _brute_force_overlaps(events, start, end)
+        assert sorted(map(id, index.overlapping(start, end))) == sorted(map(id, expected))
+        assert index.overlaps(start, end) == bool(expected)
+
+
+def test_busy_periods_merge_and_clip():
+    index = IntervalIndex([
+        _event(MONDAY.replace(hour=8), 90),
+        _event(MONDAY.replace(hour=9), 60),
+        _event(MONDAY.replace(hour=13), 30),
+    ])
+    assert index.busy_periods(MONDAY.replace(hour=9), MONDAY.replace(hour=17)) == [
+        (MONDAY.replace(hour=9), MONDAY.replace(hour=10)),
+        (MONDAY.replace(hour=13), MONDAY.replace(hour=13, minute=30)),
+    ]
+
+
+def test_free_slots_skip_busy_time_and_weekends():
+    friday = MONDAY + timedelta(days=4)
+    index = IntervalIndex([
+        _event(friday.replace(hour=9), 60 * 7),  # busy until 16:00
+    ])
+    slots = index.free_slots(friday.replace(hour=8), timedelta(hours=1), count=3)
+    assert slots == [
+        (friday.replace(hour=16), friday.replace(hour=17)),
+        (MONDAY.replace(day=8, hour=9), MONDAY.replace(day=8, hour=10)),
+        (MONDAY.replace(day=8, hour=9, minute=30), MONDAY.replace(day=8, hour=10, minute=30)),
+    ]
+    assert not any(index.overlaps(start, end) for start, end in slots)
+
+
+def test_free_slots_start_on_step_after_requested_time():
+    slots = IntervalIndex([]).free_slots(MONDAY.replace(hour=10, minute=10), timedelta(minutes=30), count=1)
+    assert slots == [(MONDAY.replace(hour=10, minute=30), MONDAY.replace(hour=11))]
+
+
+def test_free_slots_give_up_after_horizon():
+    busy = [_event(MONDAY + timedelta(days=day), 60 * 24) for day in range(30)]
+    assert IntervalIndex(busy).free_slots(MONDAY, timedelta(hours=1), horizon_days=14) == []
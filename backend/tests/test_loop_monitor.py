@@ -0,0 +1,32 @@
+import time
+import asyncio
+
+from loop_monitor import LoopLagMonitor
+
+
+def test_blocking_the_loop_is_recorded_as_lag(run):
+    monitor = LoopLagMonitor(interval=0.01, stall_threshold=0.1)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        before = monitor.get_stats()
+        # A synchronous call holding the loop, as a blocking DB or HTTP call would
+        time.sleep(0.25)
+        await asyncio.sleep(0.05)
+        during = monitor.get_stats()
+        await monitor.stop()
+        return before, during
+
+    before, during = run(scenario())
+    assert before['running'] and before['stalls'] == 0 and before['max_ms'] < 100
+    # The probe due 10ms into the block woke up ~240ms late
+    assert 200 <= during['max_ms'] < 1000
+    assert during['stalls'] == 1 and during['samples'] > before['samples']
+    assert not monitor.get_stats()['running']
+
+
+def test_stop_without_start_is_a_no_op(run):
+    monitor = LoopLagMonitor()
+    run(monitor.stop())
+    assert monitor.get_stats() == {'running': False, 'samples': 0}
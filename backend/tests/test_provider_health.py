@@ -0,0 +1,131 @@
+import pytest
+
+import provider_health
+from provider_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderHealth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(provider_health, 'time', clock)
+    return clock
+
+
+def _opened(clock, open_seconds=30):
+    breaker = CircuitBreaker('openai', window=10, min_calls=4, error_rate=0.5, open_seconds=open_seconds)
+    for _ in range(4):
+        assert breaker.allow()
+        breaker.record(True)
+    return breaker
+
+
+def test_breaker_opens_after_min_calls_at_the_error_rate(clock):
+    breaker = CircuitBreaker('openai', window=10, min_calls=4, error_rate=0.5)
+    for _ in range(3):
+        breaker.record(True)
+    # Three failures are under min_calls
+    assert breaker.state == CLOSED
+
+    breaker.record(True)
+    assert breaker.state == OPEN
+    assert not breaker.allow() and not breaker.available()
+    assert breaker.to_dict()['rejected'] == 1 and breaker.to_dict()['times_opened'] == 1
+
+
+def test_breaker_stays_closed_below_the_error_rate(clock):
+    breaker = CircuitBreaker('openai', window=10, min_calls=4, error_rate=0.5)
+    for bad in (True, False, False, False, True, False):
+        breaker.record(bad)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_exactly_one_probe_through(clock):
+    breaker = _opened(clock)
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.available()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # The probe is still in flight
+    assert not breaker.available()
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(False)
+
+    assert breaker.state == CLOSED
+    assert breaker.to_dict()['recent_calls'] == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_for_another_cooldown(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True)
+
+    assert breaker.state == OPEN and breaker.times_opened == 2
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_abandoned_probe_frees_the_slot(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN and breaker.allow()
+
+
+def test_failing_provider_is_demoted_before_its_breaker_trips(clock):
+    health = ProviderHealth()
+    assert health.order(['openai', 'amazon_q']) == ['openai', 'amazon_q']
+
+    health.record_success('amazon_q', 0.5)
+    health.record_success('openai', 0.5)
+    for _ in range(2):
+        health.record_failure('openai')
+    # Still within HEALTH_MARGIN of the best, so the preference order stands
+    assert health.order(['openai', 'amazon_q']) == ['openai', 'amazon_q']
+
+    health.record_failure('openai')
+    assert health.breaker('openai').state == CLOSED
+    assert health.score('openai') < health.score('amazon_q') - provider_health.HEALTH_MARGIN
+    assert health.order(['openai', 'amazon_q']) == ['amazon_q', 'openai']
+
+    # An idle provider drifts back to a full success rate and regains first place
+    clock.now += provider_health.HEALTH_RECOVERY * 5
+    assert health.order(['openai', 'amazon_q']) == ['openai', 'amazon_q']
+
+
+def test_slow_provider_scores_lower(clock):
+    health = ProviderHealth()
+    health.record_success('fast', 0.1)
+    health.record_success('slow', provider_health.HEALTH_LATENCY_REFERENCE)
+    assert health.score('slow') == pytest.approx(0.5)
+    assert health.score('fast') > health.score('slow')
+
+
+def test_open_breaker_removes_provider_from_order(clock):
+    health = ProviderHealth()
+    for _ in range(provider_health.BREAKER_MIN_CALLS):
+        health.record_failure('openai')
+    assert health.score('openai') == 0.0
+    assert health.order(['openai', 'amazon_q']) == ['amazon_q']
+    assert health.get_stats()['openai']['state'] == OPEN
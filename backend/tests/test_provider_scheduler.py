@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from provider_health import CircuitOpenError, ProviderHealth
+from provider_scheduler import AllProvidersFailed, LatencyHistogram, ProviderAttempt, ProviderScheduler
+
+
+class FakeProvider:
+    """Answers after ``latency`` seconds, or raises ``error``"""
+
+    def __init__(self, name, latency=0.0, error=None):
+        self.name = name
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return {'provider': self.name}
+
+    def attempt(self, deadline=5.0):
+        return ProviderAttempt(self.name, self, deadline)
+
+
+def _run_timed(run, scheduler, providers):
+    async def scenario():
+        started = time.monotonic()
+        try:
+            return await scheduler.run([provider.attempt() for provider in providers]), time.monotonic() - started
+        except AllProvidersFailed as e:
+            return e, time.monotonic() - started
+    return run(scenario())
+
+
+def test_fast_primary_wins_without_hedging(run):
+    primary, fallback = FakeProvider('primary', 0.01), FakeProvider('fallback')
+    scheduler = ProviderScheduler(default_delay=0.2)
+    result, _ = _run_timed(run, scheduler, [primary, fallback])
+    assert result == {'provider': 'primary'}
+    assert fallback.calls == 0
+    assert scheduler.get_stats()['primary']['wins'] == 1
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled(run):
+    primary, fallback = FakeProvider('primary', 1.0), FakeProvider('fallback', 0.01)
+    scheduler = ProviderScheduler(default_delay=0.05)
+    result, elapsed = _run_timed(run, scheduler, [primary, fallback])
+    assert result == {'provider': 'fallback'}
+    assert elapsed < 0.5
+    assert primary.cancelled == 1
+    stats = scheduler.get_stats()
+    assert stats['primary']['hedged_after'] == 1 and stats['primary']['cancelled'] == 1
+    assert stats['fallback']['wins'] == 1
+
+
+def test_failed_primary_starts_fallback_immediately(run):
+    primary = FakeProvider('primary', 0.01, error=RuntimeError("502"))
+    fallback = FakeProvider('fallback', 0.01)
+    scheduler = ProviderScheduler(default_delay=5)
+    result, elapsed = _run_timed(run, scheduler, [primary, fallback])
+    assert result == {'provider': 'fallback'}
+    assert elapsed < 1
+    assert scheduler.get_stats()['primary']['failures'] == 1
+
+
+def test_deadline_bounds_each_attempt(run):
+    primary = FakeProvider('primary', 1.0)
+
+    async def scenario():
+        started = time.monotonic()
+        with pytest.raises(AllProvidersFailed) as failure:
+            await ProviderScheduler().run([primary.attempt(deadline=0.05)])
+        return failure.value, time.monotonic() - started
+
+    failure, elapsed = run(scenario())
+    assert isinstance(failure.errors['primary'], asyncio.TimeoutError)
+    assert elapsed < 0.5
+
+
+def test_all_failures_are_reported(run):
+    providers = [FakeProvider('a', error=RuntimeError("a down")), FakeProvider('b', error=ValueError("b down"))]
+    failure, _ = _run_timed(run, ProviderScheduler(), providers)
+    assert isinstance(failure, AllProvidersFailed)
+    assert set(failure.errors) == {'a', 'b'}
+
+
+def test_hedge_delay_follows_p95_once_warmed_up():
+    scheduler = ProviderScheduler(default_delay=2.0, min_delay=0.1, min_samples=20)
+    attempt = FakeProvider('primary').attempt(deadline=5.0)
+    assert scheduler.hedge_delay(attempt) == 2.0
+
+    latency = scheduler.stats_for('primary').latency
+    for i in range(100):
+        latency.observe(0.3 if i < 95 else 3.0)
+    assert scheduler.hedge_delay(attempt) == 3.0
+    assert scheduler.hedge_delay(FakeProvider('primary').attempt(deadline=1.0)) == 1.0
+
+    fast = scheduler.stats_for('fast').latency
+    for _ in range(20):
+        fast.observe(0.01)
+    assert scheduler.hedge_delay(FakeProvider('fast').attempt()) == 0.1
+
+
+def test_open_breaker_skips_provider_without_calling_it(run):
+    health = ProviderHealth()
+    for _ in range(5):
+        health.record_failure('primary')
+    primary, fallback = FakeProvider('primary'), FakeProvider('fallback')
+    scheduler = ProviderScheduler(health=health)
+    result, _ = _run_timed(run, scheduler, [primary, fallback])
+    assert result == {'provider': 'fallback'}
+    assert primary.calls == 0
+    assert scheduler.get_stats()['primary']['short_circuited'] == 1
+
+    failure, _ = _run_timed(run, scheduler, [primary])
+    assert isinstance(failure.errors['primary'], CircuitOpenError)
+
+
+def test_latency_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(seconds)
+    report = histogram.to_dict()
+    assert report['buckets'] == {'le_0.1s': 2, 'le_1s': 1, 'inf': 1}
+    assert report['p50_ms'] == 500.0 and report['p99_ms'] == 2000.0
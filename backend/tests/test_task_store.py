@@ -0,0 +1,123 @@
+import json
+import multiprocessing
+
+import task_store
+from task_store import TaskStore
+
+
+def _store(tmp_path):
+    return TaskStore(str(tmp_path / 'tasks.jsonl'), legacy_path=str(tmp_path / 'tasks.json'))
+
+
+def _lines(tmp_path):
+    return (tmp_path / 'tasks.jsonl').read_text().splitlines()
+
+
+def test_index_is_rebuilt_from_the_log(tmp_path):
+    store = _store(tmp_path)
+    first = store.create({'task': 'write report'})
+    second = store.create({'task': 'send invoice'})
+    store.update(first['id'], completed=True)
+    store.delete(second['id'])
+
+    reopened = _store(tmp_path)
+    assert reopened.list() == [{**first, 'completed': True}]
+    assert reopened.create({'task': 'next'})['id'] == 3
+
+
+def test_other_instances_see_appends(tmp_path):
+    writer, reader = _store(tmp_path), _store(tmp_path)
+    assert reader.list() == []
+    task = writer.create({'task': 'shared'})
+    assert reader.get(task['id']) == task
+
+
+def test_compaction_rewrites_live_tasks_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_store, 'COMPACT_MIN_RECORDS', 10)
+    store, other = _store(tmp_path), _store(tmp_path)
+    task = store.create({'task': 'churn'})
+    other.list()
+    for i in range(20):
+        store.update(task['id'], note=i)
+
+    assert len(_lines(tmp_path)) < 10
+    assert store.get(task['id'])['note'] == 19
+    # A reader that loaded before compaction reloads instead of replaying from a stale offset
+    assert other.list() == [store.get(task['id'])]
+    assert _store(tmp_path).list() == other.list()
+
+
+def test_torn_last_line_is_ignored_then_truncated(tmp_path):
+    store = _store(tmp_path)
+    kept = store.create({'task': 'kept'})
+    with open(tmp_path / 'tasks.jsonl', 'a') as f:
+        f.write('{"op": "put", "task": {"id": 2, "tas')
+
+    recovered = _store(tmp_path)
+    assert recovered.list() == [kept]
+    added = recovered.create({'task': 'after crash'})
+    assert added['id'] == 2
+    assert [json.loads(line)['task']['task'] for line in _lines(tmp_path)] == ['kept', 'after crash']
+
+
+def test_corrupt_line_is_skipped(tmp_path):
+    (tmp_path / 'tasks.jsonl').write_text(
+        json.dumps({'op': 'put', 'task': {'id': 1, 'task': 'a'}}) + '\nnot json\n'
+        + json.dumps({'op': 'put', 'task': {'id': 2, 'task': 'b'}}) + '\n'
+    )
+    assert [task['id'] for task in _store(tmp_path).list()] == [1, 2]
+
+
+def test_legacy_file_is_migrated_once(tmp_path):
+    (tmp_path / 'tasks.json').write_text(json.dumps([{'id': 1, 'task': 'old', 'completed': False}]))
+    store = _store(tmp_path)
+    assert store.list() == [{'id': 1, 'task': 'old', 'completed': False}]
+    store.create({'task': 'new'})
+    (tmp_path / 'tasks.json').write_text('[]')
+    assert [task['task'] for task in _store(tmp_path).list()] == ['old', 'new']
+
+
+def _create_many(path, count):
+    store = TaskStore(path, legacy_path=None)
+    for i in range(count):
+        store.create({'task': f'worker task {i}'})
+
+
+def test_concurrent_processes_never_reuse_ids(tmp_path):
+    path = str(tmp_path / 'tasks.jsonl')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_create_many, args=(path, 50)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+
+    ids = [task['id'] for task in TaskStore(path, legacy_path=None).list()]
+    assert sorted(ids) == list(range(1, 151))
+
+
+def test_compaction_keeps_ids_of_deleted_tasks_retired(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_store, 'COMPACT_MIN_RECORDS', 10)
+    store = _store(tmp_path)
+    tasks = [store.create({'task': f'task {i}'}) for i in range(6)]
+    for task in tasks[1:]:
+        store.delete(task['id'])
+
+    assert json.loads(_lines(tmp_path)[0]) == {'op': 'meta', 'next_id': 7}
+    assert store.create({'task': 'after compaction'})['id'] == 7
+    assert _store(tmp_path).create({'task': 'reopened'})['id'] == 8
+
+
+def test_legacy_tasks_with_colliding_ids_are_renumbered(tmp_path):
+    # Two writers racing on tasks.json both saved id len(tasks) + 1
+    (tmp_path / 'tasks.json').write_text(json.dumps([
+        {'id': 1, 'task': 'first'},
+        {'id': 2, 'task': 'racer a'},
+        {'id': 2, 'task': 'racer b'},
+        {'task': 'no id'}
+    ]))
+    store = _store(tmp_path)
+    assert [(task['id'], task['task']) for task in store.list()] == [
+        (1, 'first'), (2, 'racer a'), (3, 'racer b'), (4, 'no id')
+    ]
+    assert store.create({'task': 'new'})['id'] == 5
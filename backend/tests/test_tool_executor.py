@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import pytest
+
+from tool_executor import ToolExecutor
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_finishes(run):
+    executor = ToolExecutor(max_workers=4, limits={'calendar': (1, 0.05)})
+    release = threading.Event()
+    started = []
+
+    def stuck():
+        started.append('stuck')
+        release.wait(5)
+        return 'late'
+
+    def quick():
+        started.append('quick')
+        return 'done'
+
+    async def scenario():
+        with pytest.raises(TimeoutError):
+            await executor.run('calendar', stuck)
+        # The caller gave up, but the thread is still running
+        waiting = asyncio.create_task(executor.run('calendar', quick))
+        await asyncio.sleep(0.1)
+        blocked = (started == ['stuck'], not waiting.done(), executor.get_stats()['tools']['calendar'])
+
+        release.set()
+        return blocked, await asyncio.wait_for(waiting, 1)
+
+    (only_stuck_started, still_waiting, stats), result = run(scenario())
+    assert only_stuck_started and still_waiting
+    assert stats['waiting'] == 1 and stats['running'] == 1 and stats['timeouts'] == 1
+    assert result == 'done' and started == ['stuck', 'quick']
+
+    stats = executor.get_stats()['tools']['calendar']
+    # The abandoned call is counted once its thread returns
+    assert stats['completed'] == 2 and stats['running'] == 0 and stats['errors'] == 0
+    executor.shutdown(wait=True)
+
+
+def test_each_tool_has_its_own_limit(run):
+    executor = ToolExecutor(max_workers=4, limits={'calendar': (1, 1.0), 'tasks': (1, 1.0)})
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.create_task(executor.run('calendar', release.wait, 5))
+        await asyncio.sleep(0.02)
+        # calendar's only slot is taken; tasks still runs straight away
+        result = await asyncio.wait_for(executor.run('tasks', lambda: 'listed'), 0.5)
+        release.set()
+        await blocked
+        return result
+
+    assert run(scenario()) == 'listed'
+    executor.shutdown(wait=True)
+
+
+def test_errors_reach_the_caller_and_the_stats(run):
+    executor = ToolExecutor(max_workers=2)
+
+    def broken():
+        raise ValueError("calendar unavailable")
+
+    with pytest.raises(ValueError):
+        run(executor.run('calendar', broken))
+    stats = executor.get_stats()['tools']['calendar']
+    assert stats['calls'] == 1 and stats['errors'] == 1 and stats['completed'] == 0
+    executor.shutdown(wait=True)
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import threading
+import datetime
+
+import pytest
+
+pytest.importorskip("langchain")
+
+import tools  # noqa: E402
+
+
+class FakeCredentials:
+    """Just enough of google.oauth2.credentials.Credentials for _get_credentials"""
+
+    def __init__(self, expiry):
+        self.expiry = expiry
+        self.refresh_token = 'refresh-token'
+        self.token = 'old-token'
+        self.refreshes = 0
+
+    @property
+    def valid(self):
+        return self.expiry > datetime.datetime.utcnow()
+
+    def refresh(self, request):
+        self.refreshes += 1
+        # Widen the window for other threads to race the refresh
+        time.sleep(0.05)
+        self.token = f'token-{self.refreshes}'
+        self.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    def to_json(self):
+        return json.dumps({'token': self.token, 'refresh_token': self.refresh_token})
+
+
+@pytest.fixture
+def token_file(tmp_path, monkeypatch):
+    path = tmp_path / 'token.json'
+    monkeypatch.setattr(tools, 'TOKEN_FILE', str(path))
+    monkeypatch.setattr(tools, '_creds', None)
+    return path
+
+
+def test_concurrent_callers_refresh_the_token_once(token_file, monkeypatch):
+    # Inside the refresh skew, so due for a refresh though not yet expired
+    creds = FakeCredentials(datetime.datetime.utcnow() + datetime.timedelta(minutes=1))
+    monkeypatch.setattr(tools, '_creds', creds)
+    start = threading.Barrier(8)
+    results = []
+
+    def call():
+        start.wait()
+        results.append(tools._get_credentials())
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert creds.refreshes == 1
+    assert results == [creds] * 8
+    assert json.loads(token_file.read_text())['token'] == 'token-1'
+    # Fresh credentials are served without the lock or another refresh
+    assert tools._get_credentials() is creds and creds.refreshes == 1
+
+
+def test_token_file_is_replaced_atomically(token_file, monkeypatch):
+    token_file.write_text('{"token": "previous"}')
+    replaced = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        # The new token is complete on disk before it takes the old file's place
+        replaced.append((src, dst, open(src).read()))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(tools.os, 'replace', recording_replace)
+    creds = FakeCredentials(datetime.datetime.utcnow())
+    tools._write_token_atomic(creds)
+
+    (src, dst, written), = replaced
+    assert os.path.dirname(src) == str(token_file.parent) and dst == str(token_file)
+    assert written == creds.to_json() == token_file.read_text()
+    assert os.listdir(token_file.parent) == ['token.json']
+
+
+def test_failed_token_write_keeps_the_old_file(token_file):
+    token_file.write_text('{"token": "previous"}')
+    creds = FakeCredentials(datetime.datetime.utcnow())
+    creds.to_json = lambda: (_ for _ in ()).throw(ValueError("unserializable"))
+
+    with pytest.raises(ValueError):
+        tools._write_token_atomic(creds)
+    assert token_file.read_text() == '{"token": "previous"}'
+    assert os.listdir(token_file.parent) == ['token.json']
+
+
+def test_service_is_built_once_per_thread(token_file, monkeypatch):
+    creds = FakeCredentials(datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+    monkeypatch.setattr(tools, '_creds', creds)
+    monkeypatch.setattr(tools, '_local', threading.local())
+    built = []
+    monkeypatch.setattr(tools, 'build', lambda *args, **kwargs: built.append(kwargs) or object())
+
+    first = tools.get_calender_service()
+    assert tools.get_calender_service() is first
+    other = []
+    thread = threading.Thread(target=lambda: other.append(tools.get_calender_service()))
+    thread.start()
+    thread.join(5)
+
+    assert len(built) == 2 and other[0] is not first
+    assert all(kwargs['static_discovery'] for kwargs in built)
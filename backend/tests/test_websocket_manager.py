@@ -0,0 +1,425 @@
+import sys
+import json
+import types
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+import conversation_store
+from websocket_manager import ChatSession, ChatWebSocketHandler, ConnectionManager, _Outbox
+from write_behind import write_queue
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        self.frames.append(json.loads(payload))
+
+    async def close(self, code=1000):
+        pass
+
+    def types(self):
+        return [frame['type'] for frame in self.frames if frame['type'] != 'system']
+
+
+class ClientWebSocket(FakeWebSocket):
+    """FakeWebSocket that also receives what the test sends as the client"""
+
+    def __init__(self):
+        super().__init__()
+        self.inbox = asyncio.Queue()
+
+    def client_send(self, **message):
+        self.inbox.put_nowait(json.dumps(message))
+
+    def client_disconnect(self):
+        self.inbox.put_nowait(None)
+
+    async def receive_text(self):
+        data = await self.inbox.get()
+        if data is None:
+            raise WebSocketDisconnect(1000)
+        return data
+
+
+class GatedWebSocket(FakeWebSocket):
+    """A client that reads nothing until ``gate`` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+        self.close_codes = []
+
+    async def send_text(self, payload):
+        await self.gate.wait()
+        await super().send_text(payload)
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+
+class FakeStream:
+    """Provider stream yielding ``deltas`` ``delay`` seconds apart"""
+
+    def __init__(self, deltas, delay):
+        self.deltas = deltas
+        self.delay = delay
+        self.source = None
+        self.confidence = 0.0
+        self.finished = False
+        self.closed = False
+
+    async def _generate(self):
+        for delta in self.deltas:
+            await asyncio.sleep(self.delay)
+            self.source, self.confidence = 'openai', 0.8
+            yield delta
+        self.finished = True
+
+    def __aiter__(self):
+        return self._generate()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeStreamingService:
+    def __init__(self, deltas, delay=0.0):
+        self.deltas = deltas
+        self.delay = delay
+        self.streams = []
+
+    def stream_response(self, message, context=None, user_id=None):
+        stream = FakeStream(self.deltas, self.delay)
+        self.streams.append(stream)
+        return stream
+
+
+def _handler(monkeypatch, seen_contexts):
+    # The handler imports ai_service lazily; keep the provider SDKs out of the test
+    monkeypatch.setitem(sys.modules, 'ai_service', types.SimpleNamespace(ai_service=object()))
+    handler = ChatWebSocketHandler(ConnectionManager())
+
+    async def fake_stream(ai_service, content, context, user_id, reply):
+        seen_contexts.append(context)
+        return f"reply to {content}"
+
+    monkeypatch.setattr(handler, '_stream_ai_response', fake_stream)
+    return handler
+
+
+async def _noop_reply(message):
+    pass
+
+
+def test_client_context_used_when_server_has_no_history(db, run, monkeypatch):
+    seen = []
+    handler = _handler(monkeypatch, seen)
+    client_context = [{'content': 'from the client', 'is_user': True}]
+
+    async def scenario():
+        await handler._handle_chat_message('ws1', 'u1', {'content': 'tell me a joke', 'context': client_context},
+                                           reply=_noop_reply)
+        await write_queue.stop()
+
+    run(scenario())
+    assert seen == [client_context]
+
+
+def test_server_history_replaces_client_context(db, run, monkeypatch):
+    seen = []
+    handler = _handler(monkeypatch, seen)
+    monkeypatch.setattr(conversation_store, 'conversation_store', conversation_store.ConversationStore())
+
+    async def scenario():
+        await handler._handle_chat_message('ws2', 'u1', {'content': 'tell me a joke'}, reply=_noop_reply)
+        await handler._handle_chat_message('ws2', 'u1', {'content': 'another one', 'context': [{'content': 'stale'}]},
+                                           reply=_noop_reply)
+        await write_queue.stop()
+
+    run(scenario())
+    assert seen[0] == []
+    assert [message['content'] for message in seen[1]] == ['tell me a joke', 'reply to tell me a joke']
+
+
+def test_ai_reply_streams_deltas_before_message_end(db, run, monkeypatch):
+    deltas = ['Once ', 'upon ', 'a ', 'time']
+    service = FakeStreamingService(deltas, delay=0.08)
+    monkeypatch.setitem(sys.modules, 'ai_service', types.SimpleNamespace(ai_service=service))
+    monkeypatch.setattr(conversation_store, 'conversation_store', conversation_store.ConversationStore())
+    websocket = FakeWebSocket()
+    # Record whether the provider had finished when each frame reached the socket
+    sent_while_streaming = []
+    send_text = websocket.send_text
+
+    async def tracking_send(payload):
+        await send_text(payload)
+        sent_while_streaming.append(bool(service.streams) and not service.streams[0].finished)
+
+    websocket.send_text = tracking_send
+
+    async def scenario():
+        manager = ConnectionManager()
+        handler = ChatWebSocketHandler(manager)
+        await manager.connect(websocket, 'u1', 'ws3')
+        await handler._handle_chat_message('ws3', 'u1', {'content': 'tell me a story'})
+        await asyncio.sleep(0.01)
+        manager.disconnect('ws3')
+        await write_queue.stop()
+        return await conversation_store.conversation_store.history('ws3')
+
+    history = run(scenario())
+    types_sent = websocket.types()
+    assert types_sent[:3] == ['typing', 'typing', 'ai_metadata']
+    assert types_sent[-1] == 'message_end'
+    assert set(types_sent[3:-1]) == {'message_delta'} and len(types_sent[3:-1]) >= 2
+
+    frames = [frame for frame in websocket.frames if frame['type'] != 'system']
+    # The first delta went out while the provider was still generating
+    first_delta = types_sent.index('message_delta')
+    assert sent_while_streaming[first_delta + 1]  # +1 for the welcome frame
+    end = frames[-1]
+    assert end['content'] == ''.join(deltas)
+    assert ''.join(frame['delta'] for frame in frames if frame['type'] == 'message_delta') == end['content']
+    assert {frame['id'] for frame in frames[3:]} == {end['id']}
+    assert frames[2]['source'] == 'openai'
+    assert 0 < end['ttft_ms'] < end['total_ms']
+    assert service.streams[0].closed
+    assert history[-1]['content'] == end['content']
+
+
+def test_broadcast_to_user_reaches_every_session_of_that_user(run):
+    async def scenario():
+        manager = ConnectionManager()
+        tabs = [FakeWebSocket() for _ in range(3)]
+        other = FakeWebSocket()
+        for i, websocket in enumerate(tabs):
+            await manager.connect(websocket, 'alice', f'tab{i}')
+        await manager.connect(other, 'bob', 'bob1')
+        delivered = await manager.broadcast_to_user('alice', {'type': 'notification', 'content': 'moved'})
+        await asyncio.sleep(0.01)
+        for session_id in manager.get_active_sessions():
+            manager.disconnect(session_id)
+        return delivered, tabs, other
+
+    delivered, tabs, other = run(scenario())
+    assert delivered == 3
+    assert all(websocket.types() == ['notification'] for websocket in tabs)
+    assert other.types() == []
+
+
+def test_disconnect_clears_both_indexes(run):
+    async def scenario():
+        manager = ConnectionManager()
+        first, second = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first, 'alice', 'tab1')
+        await manager.connect(second, 'alice', 'tab2')
+
+        manager.disconnect('tab1')
+        after_one = ({user: set(sessions) for user, sessions in manager.user_sessions.items()},
+                     dict(manager.session_users))
+        # A stale socket closing can't evict the session that replaced it
+        await manager.connect(FakeWebSocket(), 'alice', 'tab2')
+        manager.disconnect('tab2', second)
+        still_online = manager.is_user_online('alice')
+
+        manager.disconnect('tab2')
+        return after_one, still_online, manager
+
+    (user_sessions, session_users), still_online, manager = run(scenario())
+    assert user_sessions == {'alice': {'tab2'}} and session_users == {'tab2': 'alice'}
+    assert still_online
+    assert manager.user_sessions == {} and manager.session_users == {}
+    assert manager.get_active_sessions() == [] and manager.outboxes == {}
+    assert not manager.is_user_online('alice')
+
+
+def _session(monkeypatch, chat, concurrency):
+    manager = ConnectionManager()
+    handler = ChatWebSocketHandler(manager)
+    monkeypatch.setattr(handler, '_handle_chat_message', chat)
+    websocket = ClientWebSocket()
+    return manager, websocket, ChatSession(handler, websocket, 's1', 'u1', concurrency=concurrency)
+
+
+def test_replies_keep_message_order_when_a_later_one_finishes_first(run, monkeypatch):
+    delays = {'slow': 0.1, 'fast': 0.0}
+    finished = []
+
+    async def chat(session_id, user_id, message_data, reply=None):
+        content = message_data['content']
+        await reply({'type': 'message_delta', 'delta': content})
+        await asyncio.sleep(delays[content])
+        await reply({'type': 'message_end', 'content': content})
+        finished.append(content)
+
+    async def scenario():
+        manager, websocket, session = _session(monkeypatch, chat, concurrency=2)
+        await manager.connect(websocket, 'u1', 's1')
+        running = asyncio.create_task(session.run())
+        websocket.client_send(type='chat', content='slow', request_id='a')
+        websocket.client_send(type='chat', content='fast', request_id='b')
+        await asyncio.sleep(0.2)
+        websocket.client_disconnect()
+        with pytest.raises(WebSocketDisconnect):
+            await running
+        manager.disconnect('s1')
+        return websocket
+
+    websocket = run(scenario())
+    assert finished == ['fast', 'slow']
+    sent = [(frame['request_id'], frame['type']) for frame in websocket.frames if frame['type'] != 'system']
+    assert sent == [('a', 'message_delta'), ('a', 'message_end'), ('b', 'message_delta'), ('b', 'message_end')]
+
+
+def test_disconnect_cancels_in_flight_and_queued_requests(run, monkeypatch):
+    started = []
+    cancelled = []
+
+    async def chat(session_id, user_id, message_data, reply=None):
+        started.append(message_data['content'])
+        await reply({'type': 'message_delta', 'delta': message_data['content']})
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(message_data['content'])
+            raise
+
+    async def scenario():
+        manager, websocket, session = _session(monkeypatch, chat, concurrency=1)
+        await manager.connect(websocket, 'u1', 's1')
+        running = asyncio.create_task(session.run())
+        websocket.client_send(type='chat', content='first', request_id='a')
+        websocket.client_send(type='chat', content='queued', request_id='b')
+        await asyncio.sleep(0.05)
+        in_flight = session.requests['a'].task
+        websocket.client_disconnect()
+        with pytest.raises(WebSocketDisconnect):
+            # Well before the handler's own 10s sleep would end
+            await asyncio.wait_for(running, 1)
+        await asyncio.sleep(0.01)
+        # Checked before asyncio.run() would cancel any leftover tasks itself
+        was_cancelled = in_flight.cancelled() and cancelled == ['first']
+        manager.disconnect('s1')
+        return websocket, was_cancelled
+
+    websocket, was_cancelled = run(scenario())
+    assert was_cancelled
+    assert started == ['first']
+    # A closed session sends no cancelled frames
+    assert [(frame['request_id'], frame['type']) for frame in websocket.frames
+            if frame['type'] != 'system'] == [('a', 'message_delta')]
+
+
+async def _stalled_outbox(policy, max_frames):
+    """An outbox whose writer is stuck sending the first frame"""
+    manager = ConnectionManager()
+    websocket = GatedWebSocket()
+    await manager.connect(websocket, 'u1', 's1')
+    manager.outboxes['s1'].writer.cancel()
+    outbox = manager.outboxes['s1'] = _Outbox(manager, 's1', websocket, max_frames=max_frames, policy=policy)
+    outbox.put(json.dumps({'type': 'message', 'content': 'in flight'}))
+    await asyncio.sleep(0)
+    return manager, websocket, outbox
+
+
+def _frame(message_type, content=''):
+    return json.dumps({'type': message_type, 'content': content})
+
+
+def test_full_outbox_drops_low_priority_frames_before_evicting(run):
+    async def scenario():
+        manager, websocket, outbox = await _stalled_outbox('drop_low_priority', max_frames=3)
+        assert outbox.put(_frame('typing'), droppable=True)
+        assert outbox.put(_frame('message', 'a'))
+        assert outbox.put(_frame('ai_metadata'), droppable=True)
+        # Full: the queued typing and metadata frames make room
+        assert outbox.put(_frame('message', 'b'))
+        after_drop = (outbox.depth, outbox.dropped)
+        assert outbox.put(_frame('message', 'c'))
+        # Full of frames that matter: a new low-priority frame is dropped...
+        assert not outbox.put(_frame('typing'), droppable=True)
+        still_connected = manager.is_user_online('u1')
+        # ...and a frame that matters evicts the client
+        assert not outbox.put(_frame('message', 'd'))
+        await asyncio.sleep(0)
+        return manager, websocket, outbox, after_drop, still_connected
+
+    manager, websocket, outbox, after_drop, still_connected = run(scenario())
+    assert after_drop == (2, 2)
+    assert still_connected and outbox.dropped == 3
+    assert manager.evicted == 1 and not manager.is_user_online('u1')
+    assert websocket.close_codes == [1013]
+    assert outbox.writer.cancelled()
+
+
+def test_disconnect_policy_evicts_on_the_first_full_put(run):
+    async def scenario():
+        manager, websocket, outbox = await _stalled_outbox('disconnect', max_frames=2)
+        assert outbox.put(_frame('typing'), droppable=True)
+        assert outbox.put(_frame('message', 'a'))
+        assert not outbox.put(_frame('typing'), droppable=True)
+        await asyncio.sleep(0)
+        return manager, websocket, outbox
+
+    manager, websocket, outbox = run(scenario())
+    assert outbox.dropped == 0 and manager.evicted == 1
+    assert manager.get_active_sessions() == [] and websocket.close_codes == [1013]
+
+
+def test_writer_task_exits_when_the_session_closes(run):
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 'u1', 's1')
+        writer = manager.outboxes['s1'].writer
+        await asyncio.sleep(0)
+        # Idle, waiting for the next frame
+        idle = not writer.done()
+        manager.disconnect('s1')
+        await asyncio.sleep(0)
+        return idle, writer
+
+    idle, writer = run(scenario())
+    assert idle and writer.cancelled()
+
+
+def test_writer_task_exits_when_a_send_fails(run):
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 'u1', 's1')
+        outbox = manager.outboxes['s1']
+        await asyncio.sleep(0)
+
+        async def broken_send(payload):
+            raise RuntimeError("connection reset")
+
+        websocket.send_text = broken_send
+        outbox.put(_frame('message', 'lost'))
+        await asyncio.sleep(0.01)
+        return manager, outbox
+
+    manager, outbox = run(scenario())
+    assert outbox.writer.done()
+    assert manager.get_active_sessions() == [] and manager.evicted == 0
+
+
+def test_writer_evicts_a_client_that_stops_reading(run):
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.05)
+        websocket = GatedWebSocket()
+        await manager.connect(websocket, 'u1', 's1')
+        writer = manager.outboxes['s1'].writer
+        await asyncio.sleep(0.1)
+        return manager, websocket, writer
+
+    manager, websocket, writer = run(scenario())
+    assert writer.done() and manager.evicted == 1
+    assert manager.get_active_sessions() == [] and websocket.close_codes == [1013]
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from sqlalchemy import func, select
+
+from database import async_session_scope
+from models import Task
+from write_behind import WriteBehindQueue
+
+
+async def _count_tasks(user_id):
+    async with async_session_scope() as db:
+        return (await db.execute(select(func.count()).select_from(Task).where(Task.user_id == user_id))).scalar()
+
+
+def test_write_after_idle_flush_commits_within_interval(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(batch_size=200, flush_interval=0.05)
+        await asyncio.wait_for(queue.add('tasks:u1', Task(user_id='u1', title='first')), 1)
+        # Let the worker go idle after its first batch
+        await asyncio.sleep(0.2)
+        started = time.monotonic()
+        await asyncio.wait_for(queue.add('tasks:u1', Task(user_id='u1', title='second')), 1)
+        elapsed = time.monotonic() - started
+        await queue.stop()
+        return elapsed, queue.get_stats(), await _count_tasks('u1')
+
+    elapsed, stats, count = run(scenario())
+    assert elapsed < 0.5
+    assert count == 2
+    assert stats['pending'] == 0 and stats['batches'] == 2
+
+
+def test_full_batch_flushes_without_waiting_for_interval(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(batch_size=10, flush_interval=30)
+        futures = [queue.add('tasks:u2', Task(user_id='u2', title=f't{i}')) for i in range(10)]
+        await asyncio.wait_for(asyncio.gather(*futures), 2)
+        await queue.stop()
+        return queue.get_stats()
+
+    stats = run(scenario())
+    assert stats['batches'] == 1 and stats['written'] == 10
+
+
+def test_flush_for_gives_read_your_writes(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        queue.add('tasks:u3', Task(user_id='u3', title='queued'))
+        before = await _count_tasks('u3')
+        await queue.flush_for('tasks:u3')
+        after = await _count_tasks('u3')
+        await queue.stop()
+        return before, after
+
+    assert run(scenario()) == (0, 1)
+
+
+def test_bad_row_only_fails_its_own_write(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        good = queue.add('k', Task(user_id='u4', title='good'))
+        first = queue.add('k', Task(id='dup', user_id='u4'))
+        second = queue.add('k', Task(id='dup', user_id='u4'))
+        await queue.flush()
+        await queue.stop()
+        return good, first, second, queue.get_stats()
+
+    good, first, second, stats = run(scenario())
+    assert good.exception() is None and first.exception() is None
+    assert second.exception() is not None
+    assert stats['failed_writes'] == 1
+
+
+def test_stop_commits_pending_writes(db, run):
+    async def scenario():
+        queue = WriteBehindQueue(flush_interval=30)
+        queue.add('k', Task(user_id='u5', title='late'))
+        await queue.stop()
+        return await _count_tasks('u5')
+
+    assert run(scenario()) == 1
+
+
+def test_stop_on_an_idle_queue_is_a_no_op(run):
+    sessions = []
+
+    def session_scope():
+        sessions.append('opened')
+        raise AssertionError("an idle stop must not touch the database")
+
+    async def scenario():
+        queue = WriteBehindQueue(session_scope=session_scope)
+        await queue.stop()
+        await queue.stop()
+        return queue.get_stats()
+
+    stats = run(scenario())
+    assert sessions == [] and stats['batches'] == 0
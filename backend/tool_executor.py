@@ -0,0 +1,181 @@
+"""Bounded thread pool for blocking tool and provider calls made from async code"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOOL_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "16"))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_EXECUTOR_TIMEOUT", "20"))
+DEFAULT_TOOL_CONCURRENCY = 4
+
+# (max concurrent calls, timeout seconds) per tool
+TOOL_LIMITS: Dict[str, Tuple[int, float]] = {
+    'calendar': (4, 15.0),
+    'tasks': (8, 10.0),
+    'amazon_q': (8, 30.0),
+}
+
+
+class _ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.queued = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.errors
+        return {
+            'calls': self.calls,
+            'completed': self.completed,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'waiting': self.waiting,
+            'queued': self.queued,
+            'running': self.running,
+            'max_queue_depth': self.max_queue_depth,
+            'avg_wait_ms': round(self.wait_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            'avg_run_ms': round(self.run_seconds / finished * 1000, 2) if finished else 0.0
+        }
+
+
+class ToolExecutor:
+    """Runs blocking calls in a dedicated pool so the event loop stays free.
+
+    Each tool has its own concurrency limit, enforced with an asyncio
+    semaphore before anything reaches the pool, so one slow dependency
+    (say the Calendar API) can't occupy every worker. A call that exceeds
+    its timeout raises ``TimeoutError`` to the caller, but keeps its slot
+    until the thread actually finishes; otherwise repeated timeouts would
+    pile up threads behind the limit. Synchronous callers use ``submit``,
+    which shares the pool and stats but not the per-tool limit.
+    """
+
+    def __init__(self, max_workers: int = TOOL_WORKERS, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.max_workers = max_workers
+        self.limits = dict(TOOL_LIMITS if limits is None else limits)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+        # Stats are updated from worker threads as well as the loop
+        self._lock = threading.Lock()
+
+    def _limit(self, tool: str) -> Tuple[int, float]:
+        return self.limits.get(tool, (DEFAULT_TOOL_CONCURRENCY, DEFAULT_TOOL_TIMEOUT))
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(tool)
+        if semaphore is None:
+            semaphore = self._semaphores[tool] = asyncio.Semaphore(self._limit(tool)[0])
+        return semaphore
+
+    def _tool_stats(self, tool: str) -> _ToolStats:
+        stats = self._stats.get(tool)
+        if stats is None:
+            stats = self._stats[tool] = _ToolStats()
+        return stats
+
+    async def run(self, tool: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` in the pool under ``tool``'s limits"""
+        timeout = self._limit(tool)[1] if timeout is None else timeout
+        semaphore = self._semaphore(tool)
+        with self._lock:
+            stats = self._tool_stats(tool)
+            stats.calls += 1
+            stats.waiting += 1
+        submitted = time.perf_counter()
+
+        try:
+            await semaphore.acquire()
+        finally:
+            with self._lock:
+                stats.waiting -= 1
+
+        with self._lock:
+            stats.queued += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queued + stats.waiting)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, partial(self._call, stats, submitted, fn, args, kwargs))
+        future.add_done_callback(lambda _: semaphore.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                stats.timeouts += 1
+            logger.warning(f"Tool {tool} timed out after {timeout}s")
+            raise TimeoutError(f"{tool} did not respond within {timeout:g}s") from None
+        finally:
+            self._record_outcome(stats, future)
+
+    def submit(self, tool: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Start ``fn(*args, **kwargs)`` in the pool from synchronous code.
+
+        The per-tool limit is an asyncio semaphore, so these calls are only
+        bounded by the pool itself. The caller applies its own timeout.
+        """
+        with self._lock:
+            stats = self._tool_stats(tool)
+            stats.calls += 1
+            stats.queued += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queued + stats.waiting)
+        future = self._executor.submit(self._call, stats, time.perf_counter(), fn, args, kwargs)
+        future.add_done_callback(partial(self._submitted_done, stats))
+        return future
+
+    def _submitted_done(self, stats: _ToolStats, future: Future):
+        if future.cancelled():
+            # Cancelled before a worker picked it up
+            with self._lock:
+                stats.queued -= 1
+        self._record_outcome(stats, future)
+
+    def _call(self, stats: _ToolStats, submitted: float, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            stats.queued -= 1
+            stats.running += 1
+            stats.wait_seconds += started - submitted
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                stats.running -= 1
+                stats.run_seconds += time.perf_counter() - started
+
+    def _record_outcome(self, stats: _ToolStats, future: asyncio.Future):
+        if not future.done():
+            # Timed out or cancelled: count the abandoned call when it ends
+            future.add_done_callback(partial(self._record_outcome, stats))
+            return
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                stats.errors += 1
+            else:
+                stats.completed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'tools': {tool: stats.to_dict() for tool, stats in self._stats.items()}
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global tool executor
+tool_executor = ToolExecutor()
@@ -1,29 +1,85 @@
 import os
 import datetime
-import json
+import tempfile
+import threading
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from langchain.tools import tool
+from task_store import task_store
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
-def get_calender_service():
-    creds = None
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+TOKEN_FILE = 'token.json'
+# Refresh this long before the access token actually expires
+TOKEN_REFRESH_SKEW = datetime.timedelta(minutes=5)
+
+_creds = None
+_creds_lock = threading.Lock()
+# httplib2 isn't thread-safe, so each worker thread keeps its own service object
+_local = threading.local()
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
 
-        with open('token.json', 'w') as token:
+def _write_token_atomic(creds):
+    """Write token.json via a temp file so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(TOKEN_FILE))
+    fd, tmp_path = tempfile.mkstemp(prefix='.token.', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as token:
             token.write(creds.to_json())
-    return build('calendar', 'v3', credentials=creds)
+        os.replace(tmp_path, TOKEN_FILE)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _needs_refresh(creds) -> bool:
+    if not creds.valid:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth keeps expiry as naive UTC
+    return creds.expiry - datetime.datetime.utcnow() < TOKEN_REFRESH_SKEW
+
+
+def _get_credentials():
+    global _creds
+    creds = _creds
+    if creds is not None and not _needs_refresh(creds):
+        return creds
+
+    with _creds_lock:
+        # Another thread may have refreshed while we waited
+        creds = _creds
+        if creds is not None and not _needs_refresh(creds):
+            return creds
+
+        if creds is None and os.path.exists(TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+
+        if not creds or _needs_refresh(creds):
+            if creds and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
+                creds = flow.run_local_server(port=0)
+            _write_token_atomic(creds)
+
+        _creds = creds
+        return creds
+
+
+def get_calender_service():
+    creds = _get_credentials()
+    service = getattr(_local, 'service', None)
+    if service is None or getattr(_local, 'creds', None) is not creds:
+        # Bundled discovery document: no network fetch or cache lookup per build
+        service = build('calendar', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+        _local.service = service
+        _local.creds = creds
+    return service
 
 @tool
 def book_appointment(input_str: str) -> str:
@@ -184,23 +240,12 @@ def create_task(task_description: str) -> str:
         # Clean up task name
         task_name = task_name.replace("task to", "").replace("task:", "").strip()
         
-        tasks_file = 'tasks.json'
-        tasks = []
-        if os.path.exists(tasks_file):
-            with open(tasks_file, 'r') as f:
-                tasks = json.load(f)
-        
-        new_task = {
-            'id': len(tasks) + 1,
+        task_store.create({
             'name': task_name,
             'priority': priority,
             'status': 'pending',
             'created_at': datetime.datetime.now().isoformat()
-        }
-        tasks.append(new_task)
-        
-        with open(tasks_file, 'w') as f:
-            json.dump(tasks, f, indent=2)
+        })
         
         return f"✅ Task '{task_name}' created with {priority} priority"
     except Exception as e:
@@ -212,15 +257,9 @@ def get_tasks(query: str = "") -> str:
     Input can be empty or contain filters like 'pending', 'completed', 'high priority'.
     """
     try:
-        tasks_file = 'tasks.json'
-        if not os.path.exists(tasks_file):
-            return "No tasks found. Create your first task!"
-        
-        with open(tasks_file, 'r') as f:
-            tasks = json.load(f)
-        
+        tasks = task_store.list()
         if not tasks:
-            return "No tasks found."
+            return "No tasks found. Create your first task!"
         
         # Filter tasks based on query
         filtered_tasks = tasks
@@ -239,7 +278,7 @@ def get_tasks(query: str = "") -> str:
         task_list = ["📋 Your Tasks:"]
         for task in filtered_tasks:
             status_icon = "✅" if task['status'] == 'completed' else "⏳"
-            task_list.append(f"{status_icon} [{task['priority'].upper()}] {task['name']}")
+            task_list.append(f"{status_icon} [{task['priority'].upper()}] {task.get('name') or task.get('title')}")
         
         return "\n".join(task_list)
     except Exception as e:
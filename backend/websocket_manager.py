@@ -1,23 +1,224 @@
 """WebSocket manager for real-time chat functionality"""
+import os
 import json
+import time
+import uuid
 import logging
-from typing import Dict, List, Optional
+from collections import deque
+from functools import partial
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 import asyncio
 
+from backplane import HEARTBEAT_INTERVAL, create_backplane
+from intents import intent_engine
+from streaming import CoalesceStats, coalesce
+
 logger = logging.getLogger(__name__)
 
+# Chat messages processed in parallel per session, and how many may wait
+SESSION_CONCURRENCY = int(os.getenv("WS_SESSION_CONCURRENCY", "3"))
+SESSION_QUEUE_SIZE = int(os.getenv("WS_SESSION_QUEUE_SIZE", "32"))
+# A socket that can't take one frame in this many seconds is dropped
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+# Frames buffered per socket, and what to do when a slow client fills them:
+# "drop_low_priority" (drop typing/metadata, then disconnect) or "disconnect"
+OUTBOX_MAX_FRAMES = int(os.getenv("WS_OUTBOX_MAX_FRAMES", "256"))
+OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "drop_low_priority")
+LOW_PRIORITY_TYPES = frozenset(['typing', 'ai_metadata'])
+
+Reply = Callable[[dict], Awaitable[None]]
+
+def typing_frame(is_typing: bool) -> dict:
+    return {
+        "type": "typing",
+        "is_typing": is_typing,
+        "timestamp": datetime.now().isoformat()
+    }
+
+class _Outbox:
+    """Bounded outbound queue for one socket, drained by its own writer task.
+
+    Senders only enqueue, so a slow client never holds up the coroutine
+    sending to it. When the queue is full the overflow policy applies:
+    ``drop_low_priority`` discards queued typing/metadata frames (then the
+    new frame itself, if it is one) before giving up on the client;
+    ``disconnect`` evicts it straight away.
+    """
+
+    def __init__(self, manager: 'ConnectionManager', session_id: str, websocket: WebSocket,
+                 max_frames: int = OUTBOX_MAX_FRAMES, policy: str = OVERFLOW_POLICY):
+        self.manager = manager
+        self.session_id = session_id
+        self.websocket = websocket
+        self.max_frames = max_frames
+        self.policy = policy
+        self._frames: Deque[Tuple[str, float, bool]] = deque()
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.writer = asyncio.create_task(self._write())
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def put(self, payload: str, droppable: bool = False) -> bool:
+        """Queue a frame; False if it was dropped or the client was evicted"""
+        if len(self._frames) >= self.max_frames:
+            if self.policy != 'drop_low_priority':
+                self._evict("send queue full")
+                return False
+            if not self._drop_queued_low_priority():
+                if droppable:
+                    self.dropped += 1
+                    return False
+                self._evict("send queue full")
+                return False
+
+        self._frames.append((payload, time.monotonic(), droppable))
+        self.max_depth = max(self.max_depth, len(self._frames))
+        self._ready.set()
+        return True
+
+    def _drop_queued_low_priority(self) -> bool:
+        kept = deque(frame for frame in self._frames if not frame[2])
+        dropped = len(self._frames) - len(kept)
+        if dropped:
+            self._frames = kept
+            self.dropped += dropped
+        return bool(dropped)
+
+    async def _write(self):
+        while True:
+            if not self._frames:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            payload, enqueued_at, _ = self._frames.popleft()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(payload), self.manager.send_timeout)
+            except asyncio.TimeoutError:
+                self._evict(f"send timed out after {self.manager.send_timeout}s")
+                return
+            except Exception as e:
+                logger.error(f"Error sending message to {self.session_id}: {e}")
+                self.manager.disconnect(self.session_id, self.websocket)
+                return
+            latency = time.monotonic() - enqueued_at
+            self.sent += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def _evict(self, reason: str):
+        logger.warning(f"Dropping slow session {self.session_id}: {reason}")
+        self.manager.evicted += 1
+        self.manager.disconnect(self.session_id, self.websocket)
+        # Close in the background; the client may not be reading at all
+        asyncio.ensure_future(self._close())
+
+    async def _close(self):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1013), self.manager.send_timeout)
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.depth,
+            'max_depth': self.max_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'avg_latency_ms': round(self.latency_total / self.sent * 1000, 2) if self.sent else 0.0,
+            'max_latency_ms': round(self.latency_max * 1000, 2)
+        }
+
+
+def _log_backplane_failure(task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Backplane update failed: {task.exception()}")
+
 class ConnectionManager:
-    def __init__(self):
+    """Tracks live WebSocket sessions and fans messages out to them.
+    
+    A user may hold several sessions (one per tab or device), so sessions
+    are indexed both ways: user -> set of sessions and session -> user.
+    Connect and disconnect are O(1). Sends go through each socket's
+    outbox, so they never wait on the client.
+    
+    With a backplane (see backplane.py), user broadcasts, system notices
+    and presence also reach sessions held by other workers.
+    """
+    
+    def __init__(self, send_timeout: float = SEND_TIMEOUT, backplane=None):
+        self.send_timeout = send_timeout
+        self.backplane = backplane
+        self._heartbeat: Optional[asyncio.Task] = None
         self.active_connections: Dict[str, WebSocket] = {}
-        self.user_sessions: Dict[str, str] = {}  # user_id -> session_id
+        self.outboxes: Dict[str, _Outbox] = {}
+        self.user_sessions: Dict[str, Set[str]] = {}  # user_id -> session_ids
+        self.session_users: Dict[str, str] = {}  # session_id -> user_id
+        self.evicted = 0
+    
+    async def start(self):
+        """Join the backplane, if any. Idempotent; connect() calls it."""
+        if self.backplane is None or self._heartbeat is not None:
+            return
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            await self.backplane.start(self._on_backplane_message)
+        except Exception as e:
+            # Keep serving local sessions; the next connect retries
+            logger.error(f"Failed to join WebSocket backplane: {e}")
+            self._heartbeat.cancel()
+            self._heartbeat = None
+            return
+        logger.info(f"Joined WebSocket backplane as {self.backplane.worker_id}")
+    
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+            await self.backplane.stop()
+    
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self.backplane.heartbeat(dict(self.session_users))
+            except Exception as e:
+                logger.error(f"Presence heartbeat failed: {e}")
+    
+    async def _on_backplane_message(self, envelope: Dict[str, Any]):
+        """Deliver a message another worker routed here"""
+        if envelope.get('origin') == self.backplane.worker_id:
+            return
+        if envelope.get('kind') == 'user':
+            await self._fan_out(self.get_user_sessions(envelope['user_id']), envelope['message'])
+        elif envelope.get('kind') == 'all':
+            await self._fan_out(self.get_active_sessions(), envelope['message'])
+    
+    def _backplane_call(self, coro):
+        # For sync callers: run a presence update in the background
+        asyncio.ensure_future(coro).add_done_callback(_log_backplane_failure)
     
     async def connect(self, websocket: WebSocket, user_id: str, session_id: str):
         """Accept WebSocket connection and store it"""
         await websocket.accept()
+        await self.start()
+        if session_id in self.session_users:
+            # Reconnect reusing a session id: drop the stale socket first
+            self.disconnect(session_id)
         self.active_connections[session_id] = websocket
-        self.user_sessions[user_id] = session_id
+        self.outboxes[session_id] = _Outbox(self, session_id, websocket)
+        self.session_users[session_id] = user_id
+        self.user_sessions.setdefault(user_id, set()).add(session_id)
+        if self.backplane is not None:
+            await self.backplane.add_session(user_id, session_id)
         logger.info(f"User {user_id} connected to session {session_id}")
         
         # Send welcome message
@@ -27,171 +228,377 @@ class ConnectionManager:
             "timestamp": datetime.now().isoformat()
         })
     
-    def disconnect(self, session_id: str):
-        """Remove WebSocket connection"""
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
+    def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None):
+        """Remove WebSocket connection.
+        
+        Pass ``websocket`` to only remove the session if it is still that
+        socket, so a closing old socket can't evict a reconnect that reused
+        its session id.
+        """
+        if websocket is not None and self.active_connections.get(session_id) is not websocket:
+            return
+        self.active_connections.pop(session_id, None)
+        outbox = self.outboxes.pop(session_id, None)
+        if outbox is not None:
+            outbox.writer.cancel()
         
         # Remove from user sessions
-        for user_id, sess_id in list(self.user_sessions.items()):
-            if sess_id == session_id:
-                del self.user_sessions[user_id]
-                break
+        user_id = self.session_users.pop(session_id, None)
+        if user_id is not None:
+            sessions = self.user_sessions.get(user_id)
+            if sessions is not None:
+                sessions.discard(session_id)
+                if not sessions:
+                    del self.user_sessions[user_id]
+            if self.backplane is not None:
+                self._backplane_call(self.backplane.remove_session(user_id, session_id))
         
         logger.info(f"Session {session_id} disconnected")
     
-    async def send_message(self, session_id: str, message: dict):
-        """Send message to specific session"""
-        if session_id in self.active_connections:
-            try:
-                await self.active_connections[session_id].send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Error sending message to {session_id}: {e}")
-                self.disconnect(session_id)
+    async def send_message(self, session_id: str, message: dict) -> bool:
+        """Queue message for a specific session; False if it wasn't accepted"""
+        return self._send_text(session_id, json.dumps(message), message.get("type") in LOW_PRIORITY_TYPES)
+    
+    def _send_text(self, session_id: str, payload: str, droppable: bool = False) -> bool:
+        outbox = self.outboxes.get(session_id)
+        if outbox is None:
+            return False
+        return outbox.put(payload, droppable)
     
     async def send_typing_indicator(self, session_id: str, is_typing: bool = True):
         """Send typing indicator"""
-        await self.send_message(session_id, {
-            "type": "typing",
-            "is_typing": is_typing,
-            "timestamp": datetime.now().isoformat()
-        })
+        await self.send_message(session_id, typing_frame(is_typing))
     
-    async def broadcast_to_user(self, user_id: str, message: dict):
-        """Send message to all sessions of a user"""
-        if user_id in self.user_sessions:
-            session_id = self.user_sessions[user_id]
-            await self.send_message(session_id, message)
+    async def _fan_out(self, session_ids: List[str], message: dict) -> int:
+        # Serialize once; each socket's writer delivers at its own pace
+        payload = json.dumps(message)
+        droppable = message.get("type") in LOW_PRIORITY_TYPES
+        return sum(self._send_text(session_id, payload, droppable) for session_id in session_ids)
+    
+    async def broadcast_to_user(self, user_id: str, message: dict) -> int:
+        """Send message to all sessions of a user, on any worker.
+        
+        Returns how many sessions on this worker received it.
+        """
+        delivered = await self._fan_out(list(self.user_sessions.get(user_id, ())), message)
+        if self.backplane is not None:
+            await self.backplane.publish_to_user(user_id, message)
+        return delivered
+    
+    async def broadcast_all(self, message: dict) -> int:
+        """Send a message (e.g. a system notice) to every connected session, on any worker"""
+        delivered = await self._fan_out(list(self.active_connections), message)
+        if self.backplane is not None:
+            await self.backplane.publish_all(message)
+        return delivered
     
     def get_active_sessions(self) -> List[str]:
         """Get list of active session IDs"""
         return list(self.active_connections.keys())
     
+    def get_user_sessions(self, user_id: str) -> List[str]:
+        """Session IDs the user is connected on"""
+        return list(self.user_sessions.get(user_id, ()))
+    
     def is_user_online(self, user_id: str) -> bool:
-        """Check if user is online"""
+        """Check if user is online on this worker"""
         return user_id in self.user_sessions
+    
+    async def is_user_online_anywhere(self, user_id: str) -> bool:
+        """Check if user is online on any worker, via the shared presence index"""
+        if user_id in self.user_sessions:
+            return True
+        if self.backplane is None:
+            return False
+        return await self.backplane.is_user_online(user_id)
+    
+    def get_connection_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Queue depth, drops and send latency for one session"""
+        outbox = self.outboxes.get(session_id)
+        return outbox.get_stats() if outbox else None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        outboxes = list(self.outboxes.values())
+        return {
+            'connections': len(self.active_connections),
+            'users': len(self.user_sessions),
+            'queued': sum(outbox.depth for outbox in outboxes),
+            'max_queued': max((outbox.depth for outbox in outboxes), default=0),
+            'dropped': sum(outbox.dropped for outbox in outboxes),
+            'evicted': self.evicted,
+            'backplane': self.backplane.get_stats() if self.backplane is not None else None
+        }
 
 # Global connection manager
-manager = ConnectionManager()
+manager = ConnectionManager(backplane=create_backplane())
+
+class _ChatRequest:
+    __slots__ = ('seq', 'request_id', 'data', 'cancelled', 'task')
+
+    def __init__(self, seq: int, request_id: str, data: dict):
+        self.seq = seq
+        self.request_id = request_id
+        self.data = data
+        self.cancelled = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class _OrderedReplies:
+    """Releases each request's frames only once every earlier request has finished.
+
+    Frames for the oldest unfinished request go straight out; later
+    requests buffer theirs until they reach the front.
+    """
+
+    def __init__(self, send: Reply):
+        self._send = send
+        self._next = 0
+        self._buffers: Dict[int, List[dict]] = {}
+        self._done: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    async def send(self, seq: int, message: dict):
+        async with self._lock:
+            if seq == self._next:
+                await self._send(message)
+            else:
+                self._buffers.setdefault(seq, []).append(message)
+
+    async def finish(self, seq: int):
+        async with self._lock:
+            self._done.add(seq)
+            while self._next in self._done:
+                self._done.discard(self._next)
+                self._next += 1
+                for message in self._buffers.pop(self._next, []):
+                    await self._send(message)
+
+
+class ChatSession:
+    """Receive loop and bounded worker pool for one WebSocket connection.
+
+    The receive loop never waits on a chat reply: chat messages go on a
+    queue for the workers, while pings, typing and cancel frames are
+    handled inline. Every chat message carries a ``request_id`` (the
+    client's, or one generated here) that tags all frames sent for it,
+    and replies are delivered in the order messages arrived. A client
+    can cancel a request with ``{"type": "cancel", "request_id": ...}``
+    or by sending a chat message with ``"supersedes": <request_id>``.
+    """
+
+    def __init__(self, handler: 'ChatWebSocketHandler', websocket: WebSocket, session_id: str, user_id: str,
+                 concurrency: int = SESSION_CONCURRENCY, queue_size: int = SESSION_QUEUE_SIZE):
+        self.handler = handler
+        self.websocket = websocket
+        self.session_id = session_id
+        self.user_id = user_id
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.requests: Dict[str, _ChatRequest] = {}
+        self.replies = _OrderedReplies(partial(handler.manager.send_message, session_id))
+        self._seq = 0
+        self._closed = False
+
+    async def run(self):
+        """Receive until the client disconnects"""
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            while True:
+                data = await self.websocket.receive_text()
+                await self._dispatch(json.loads(data))
+        finally:
+            self._closed = True
+            for request in self.requests.values():
+                if request.task is not None:
+                    request.task.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _dispatch(self, message_data: dict):
+        message_type = message_data.get("type", "chat")
+
+        if message_type == "chat":
+            await self._enqueue(message_data)
+        elif message_type == "cancel":
+            self.cancel(message_data.get("request_id"))
+        elif message_type == "typing":
+            await self.handler._handle_typing(self.session_id, message_data)
+        elif message_type == "ping":
+            await self.handler._handle_ping(self.session_id)
+        else:
+            logger.warning(f"Unknown message type: {message_type}")
+
+    async def _enqueue(self, message_data: dict):
+        request_id = str(message_data.get("request_id") or f"req_{uuid.uuid4().hex[:12]}")
+        if message_data.get("supersedes"):
+            self.cancel(message_data["supersedes"])
+
+        if self.queue.full():
+            await self.handler.manager.send_message(self.session_id, {
+                "type": "error",
+                "request_id": request_id,
+                "content": "Too many messages are waiting for a reply. Please try again shortly.",
+                "timestamp": datetime.now().isoformat()
+            })
+            return
+
+        request = _ChatRequest(self._seq, request_id, message_data)
+        self._seq += 1
+        self.requests[request_id] = request
+        self.queue.put_nowait(request)
+
+    def cancel(self, request_id: Any) -> bool:
+        """Cancel a queued or running request; it still replies, with a ``cancelled`` frame"""
+        request = self.requests.get(str(request_id))
+        if request is None:
+            return False
+        request.cancelled = True
+        if request.task is not None:
+            request.task.cancel()
+        return True
+
+    async def _reply(self, request: _ChatRequest, message: dict):
+        if not self._closed:
+            await self.replies.send(request.seq, {**message, "request_id": request.request_id})
+
+    async def _worker(self):
+        while True:
+            request = await self.queue.get()
+            try:
+                if not request.cancelled:
+                    request.task = asyncio.create_task(self.handler._handle_chat_message(
+                        self.session_id, self.user_id, request.data, reply=partial(self._reply, request)
+                    ))
+                    # wait() doesn't raise when only the request task is cancelled
+                    await asyncio.wait({request.task})
+                if request.cancelled:
+                    await self._reply(request, typing_frame(False))
+                    await self._reply(request, {
+                        "type": "cancelled",
+                        "timestamp": datetime.now().isoformat()
+                    })
+            finally:
+                if self.requests.get(request.request_id) is request:
+                    del self.requests[request.request_id]
+                if not self._closed:
+                    await self.replies.finish(request.seq)
+                self.queue.task_done()
+
 
 class ChatWebSocketHandler:
     def __init__(self, connection_manager: ConnectionManager):
         self.manager = connection_manager
-    
+
     async def handle_message(self, websocket: WebSocket, session_id: str, user_id: str):
         """Handle incoming WebSocket messages"""
         try:
-            while True:
-                # Receive message
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
-                
-                # Process different message types
-                message_type = message_data.get("type", "chat")
-                
-                if message_type == "chat":
-                    await self._handle_chat_message(session_id, user_id, message_data)
-                elif message_type == "typing":
-                    await self._handle_typing(session_id, message_data)
-                elif message_type == "ping":
-                    await self._handle_ping(session_id)
-                else:
-                    logger.warning(f"Unknown message type: {message_type}")
-        
+            await ChatSession(self, websocket, session_id, user_id).run()
+
         except WebSocketDisconnect:
-            self.manager.disconnect(session_id)
+            self.manager.disconnect(session_id, websocket)
         except Exception as e:
             logger.error(f"WebSocket error for session {session_id}: {e}")
-            self.manager.disconnect(session_id)
+            self.manager.disconnect(session_id, websocket)
+        finally:
+            await self._flush_history(session_id)
     
-    async def _handle_chat_message(self, session_id: str, user_id: str, message_data: dict):
-        """Handle chat messages"""
+    async def _flush_history(self, session_id: str):
+        """Commit the session's queued chat history before the socket goes away"""
+        try:
+            from conversation_store import conversation_store
+            await conversation_store.close_session(session_id)
+        except Exception as e:
+            logger.error(f"Failed to flush history for session {session_id}: {e}")
+
+    async def _handle_chat_message(self, session_id: str, user_id: str, message_data: dict,
+                                   reply: Optional[Reply] = None):
+        """Handle chat messages; ``reply`` sends this message's frames (default: straight to the session)"""
+        reply = reply or partial(self.manager.send_message, session_id)
         try:
             content = message_data.get("content", "")
             if not content.strip():
                 return
             
             # Send typing indicator
-            await self.manager.send_typing_indicator(session_id, True)
+            await reply(typing_frame(True))
             
             # Import AI service
             from ai_service import ai_service
             from enhanced_tools import calendar_tools, task_tools
+            from conversation_store import conversation_store
             
-            # Get conversation context (simplified for now)
-            context = message_data.get("context", [])
+            # History is kept server-side; a client-sent context is only
+            # used when the server has none for this session yet
+            context = await conversation_store.history(session_id) or message_data.get("context", [])
+            conversation_store.append(session_id, user_id, content, is_user=True)
             
             # Check if this is a tool-related request
-            content_lower = content.lower()
+            route = intent_engine.route(content)
             
-            if any(keyword in content_lower for keyword in ['book', 'schedule', 'meeting', 'appointment']):
+            if route == 'book_meeting':
                 # Handle calendar booking
-                result = calendar_tools.book_meeting(content, user_id)
+                result = await calendar_tools.book_meeting_async(content, user_id)
                 response_content = result['message']
                 
                 # Send additional data if successful
                 if result['success'] and 'event' in result:
-                    await self.manager.send_message(session_id, {
+                    await reply({
                         "type": "event_created",
                         "event": result['event'],
                         "timestamp": datetime.now().isoformat()
                     })
             
-            elif any(keyword in content_lower for keyword in ['create', 'add']) and 'task' in content_lower:
+            elif route == 'create_task':
                 # Handle task creation
-                result = task_tools.create_task(content, user_id)
+                result = await task_tools.create_task_async(content, user_id)
                 response_content = result['message']
                 
                 # Send additional data if successful
                 if result['success'] and 'task' in result:
-                    await self.manager.send_message(session_id, {
+                    await reply({
                         "type": "task_created",
                         "task": result['task'],
                         "timestamp": datetime.now().isoformat()
                     })
             
-            elif any(keyword in content_lower for keyword in ['show', 'list', 'get']) and ('event' in content_lower or 'calendar' in content_lower):
+            elif route == 'list_events':
                 # Handle event listing
-                result = calendar_tools.get_events(content, user_id)
+                result = await calendar_tools.get_events_async(content, user_id)
                 response_content = result['message']
                 
                 if result['success'] and 'events' in result:
-                    await self.manager.send_message(session_id, {
+                    await reply({
                         "type": "events_list",
                         "events": result['events'],
                         "timestamp": datetime.now().isoformat()
                     })
             
-            elif any(keyword in content_lower for keyword in ['show', 'list', 'get']) and 'task' in content_lower:
+            elif route == 'list_tasks':
                 # Handle task listing
-                result = task_tools.get_tasks(content, user_id)
+                result = await task_tools.get_tasks_async(content, user_id)
                 response_content = result['message']
                 
                 if result['success'] and 'tasks' in result:
-                    await self.manager.send_message(session_id, {
+                    await reply({
                         "type": "tasks_list",
                         "tasks": result['tasks'],
                         "timestamp": datetime.now().isoformat()
                     })
             
             else:
-                # Handle general AI conversation
-                ai_response = await ai_service.generate_response(content, context, user_id)
-                response_content = ai_response['content']
-                
-                # Send AI metadata
-                await self.manager.send_message(session_id, {
-                    "type": "ai_metadata",
-                    "source": ai_response['source'],
-                    "confidence": ai_response['confidence'],
-                    "timestamp": datetime.now().isoformat()
-                })
+                # Handle general AI conversation, streamed as it's generated
+                response_content = await self._stream_ai_response(ai_service, content, context, user_id, reply)
+                conversation_store.append(session_id, user_id, response_content, is_user=False)
+                return
+            
+            conversation_store.append(session_id, user_id, response_content, is_user=False)
             
             # Stop typing indicator
-            await self.manager.send_typing_indicator(session_id, False)
+            await reply(typing_frame(False))
             
             # Send AI response
-            await self.manager.send_message(session_id, {
+            await reply({
                 "type": "message",
                 "content": response_content,
                 "is_user": False,
@@ -201,13 +608,74 @@ class ChatWebSocketHandler:
             
         except Exception as e:
             logger.error(f"Error handling chat message: {e}")
-            await self.manager.send_typing_indicator(session_id, False)
-            await self.manager.send_message(session_id, {
+            await reply(typing_frame(False))
+            await reply({
                 "type": "error",
                 "content": "I encountered an error processing your message. Please try again.",
                 "timestamp": datetime.now().isoformat()
             })
     
+    async def _stream_ai_response(self, ai_service, content: str, context: list, user_id: str, reply: Reply) -> str:
+        """Send the AI reply as ``message_delta`` frames, then ``message_end``; returns the full text.
+        
+        Deltas are coalesced by size and age before sending. ``message_end``
+        carries the full text plus time to first delta (``ttft_ms``) and
+        total time (``total_ms``).
+        """
+        message_id = f"msg_{int(datetime.now().timestamp() * 1000)}"
+        stream = ai_service.stream_response(content, context, user_id)
+        stats = CoalesceStats()
+        parts = []
+        started = time.perf_counter()
+        first_delta_at = None
+        
+        async def started_answering():
+            await reply(typing_frame(False))
+            await reply({
+                "type": "ai_metadata",
+                "source": stream.source,
+                "confidence": stream.confidence,
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        try:
+            async for chunk in coalesce(stream, stats=stats):
+                if first_delta_at is None:
+                    first_delta_at = time.perf_counter()
+                    await started_answering()
+                parts.append(chunk)
+                await reply({
+                    "type": "message_delta",
+                    "id": message_id,
+                    "delta": chunk,
+                    "timestamp": datetime.now().isoformat()
+                })
+        finally:
+            await stream.aclose()
+        
+        finished = time.perf_counter()
+        if first_delta_at is None:
+            first_delta_at = finished
+            await started_answering()
+        
+        ttft_ms = round((first_delta_at - started) * 1000, 1)
+        total_ms = round((finished - started) * 1000, 1)
+        response_content = "".join(parts)
+        await reply({
+            "type": "message_end",
+            "id": message_id,
+            "content": response_content,
+            "is_user": False,
+            "ttft_ms": ttft_ms,
+            "total_ms": total_ms,
+            "timestamp": datetime.now().isoformat()
+        })
+        logger.info(
+            f"Streamed {message_id} from {stream.source}: ttft {ttft_ms}ms, total {total_ms}ms, "
+            f"{stats.deltas_in} deltas in {stats.chunks_out} frames"
+        )
+        return response_content
+    
     async def _handle_typing(self, session_id: str, message_data: dict):
         """Handle typing indicators"""
         # For now, just acknowledge - could be used for multi-user chats
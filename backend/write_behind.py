@@ -0,0 +1,192 @@
+"""Write-behind queue that groups database writes into batched transactions"""
+import os
+import asyncio
+import logging
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from database import async_session_scope
+
+logger = logging.getLogger(__name__)
+
+# Commit once WRITE_BEHIND_BATCH_SIZE writes are queued, or WRITE_BEHIND_FLUSH_INTERVAL
+# seconds after the first one, whichever comes first
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.1"))
+
+Apply = Callable[[Any], Awaitable[None]]
+
+
+class _Intent:
+    __slots__ = ('key', 'op', 'future')
+
+    def __init__(self, key: str, op: Union[tuple, Apply], future: asyncio.Future):
+        self.key = key
+        self.op = op
+        self.future = future
+
+
+class WriteBehindQueue:
+    """Collects writes from request handlers and commits them in batches.
+
+    Each write is queued under a key naming what it belongs to (e.g.
+    ``session:<id>`` or ``tasks:<user_id>``) and returns a future that
+    resolves once it is committed; await it if the caller needs the write
+    to be durable, or ignore it for fire-and-forget writes. Readers call
+    ``flush_for(key)`` first to see their own writes. If a batch fails,
+    its writes are retried one transaction each, so one bad row only
+    fails its own future.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        session_scope=async_session_scope
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._session_scope = session_scope
+        self._pending: List[_Intent] = []
+        self._in_flight: List[_Intent] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.batches = 0
+        self.written = 0
+        self.failed_batches = 0
+        self.failed_writes = 0
+        self.max_pending = 0
+
+    def add(self, key: str, *objects) -> asyncio.Future:
+        """Queue ORM objects to be inserted"""
+        return self._submit(key, objects)
+
+    def execute(self, key: str, apply: Apply) -> asyncio.Future:
+        """Queue ``await apply(db)``, for writes that need to query first"""
+        return self._submit(key, apply)
+
+    def _submit(self, key: str, op: Union[tuple, Apply]) -> asyncio.Future:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_Intent(key, op, future))
+        self.queued += 1
+        self.max_pending = max(self.max_pending, len(self._pending))
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._batch_full.set()
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            # Sleep until something is queued
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.batch_size:
+                # Give the batch until the flush interval to fill up
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Commit everything queued so far; returns how many writes succeeded"""
+        if self._flush_lock is None:
+            return 0
+        async with self._flush_lock:
+            written = 0
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+                self._in_flight = batch
+                try:
+                    written += await self._write(batch)
+                except asyncio.CancelledError:
+                    # Stopped mid-batch: requeue what wasn't committed for the final flush
+                    self._pending[:0] = [intent for intent in batch if not intent.future.done()]
+                    raise
+                finally:
+                    self._in_flight = []
+            return written
+
+    async def flush_for(self, key: str):
+        """Read-your-writes: return once every write queued under ``key`` is committed"""
+        if any(intent.key == key for intent in chain(self._in_flight, self._pending)):
+            await self.flush()
+
+    async def _apply(self, db, intent: _Intent):
+        if isinstance(intent.op, tuple):
+            db.add_all(intent.op)
+        else:
+            await intent.op(db)
+
+    async def _write(self, batch: List[_Intent]) -> int:
+        try:
+            async with self._session_scope() as db:
+                for intent in batch:
+                    await self._apply(db, intent)
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+                return 0
+            self.failed_batches += 1
+            logger.warning(f"Batch of {len(batch)} writes failed ({e}), retrying one at a time")
+            written = 0
+            for intent in batch:
+                written += await self._write([intent])
+            return written
+
+        self.batches += 1
+        self.written += len(batch)
+        for intent in batch:
+            if not intent.future.done():
+                intent.future.set_result(None)
+        return len(batch)
+
+    def _fail(self, intent: _Intent, error: Exception):
+        self.failed_writes += 1
+        logger.error(f"Dropping write for {intent.key}: {error}")
+        if not intent.future.done():
+            intent.future.set_exception(error)
+            # Already logged here; don't warn again if nobody awaits it
+            intent.future.exception()
+
+    async def stop(self):
+        """Stop the background worker and commit what's left (call on shutdown).
+
+        A no-op on a queue that has nothing queued and no worker running.
+        """
+        if self._worker is None and not self._pending:
+            return
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self._pending),
+            'max_pending': self.max_pending,
+            'queued': self.queued,
+            'written': self.written,
+            'batches': self.batches,
+            'avg_batch_size': round(self.written / self.batches, 1) if self.batches else 0.0,
+            'failed_batches': self.failed_batches,
+            'failed_writes': self.failed_writes
+        }
+
+
+# Global write-behind queue instance
+write_queue = WriteBehindQueue()